@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .upstream import AsyncUpstreamClient, UpstreamClient, UpstreamError, UpstreamResponse
+
+
+REDACTED = "<redacted>"
+# Credentials never written to a cassette, matched case-insensitively.
+SECRET_HEADERS = frozenset({"access-token", "authorization", "set-cookie"})
+SECRET_FIELDS = frozenset({"apikey", "access_token", "accesstoken"})
+# Request and response fields holding patient claims, issued credentials and
+# nonces. Their values keep their JSON shape (so replays still parse) but not
+# their content.
+SENSITIVE_FIELDS = frozenset({"content", "payload", "holderdid", "credential", "nonce", "data"})
+
+# Path segments that carry per-request identifiers (UUIDs, transaction IDs).
+_ID_SEGMENT = re.compile(r"^(?=.*\d)[\w.~:-]{8,}$")
+
+
+def _encode(data: Optional[bytes]) -> Dict[str, Any]:
+    if data is None:
+        return {}
+    try:
+        return {"text": data.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(data).decode("ascii")}
+
+
+def _decode(encoded: Mapping[str, Any]) -> bytes:
+    if "base64" in encoded:
+        return base64.b64decode(encoded["base64"])
+    return str(encoded.get("text", "")).encode("utf-8")
+
+
+def _b64url_json(value: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def _mask_jwt(token: str) -> str:
+    """Unsigned stand-in for ``token`` that keeps only its ``jti`` claim."""
+
+    try:
+        segment = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+        jti = claims.get("jti") if isinstance(claims, dict) else None
+    except (IndexError, ValueError, UnicodeDecodeError):
+        return REDACTED
+    if not jti:
+        return REDACTED
+    return f"{_b64url_json({'alg': 'none'})}.{_b64url_json({'jti': jti})}."
+
+
+def _mask(value: Any) -> Any:
+    # Same JSON type, no content: strings become <redacted>, numbers 0.
+    if isinstance(value, dict):
+        return {key: _mask(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_mask(item) for item in value]
+    if isinstance(value, str):
+        return _mask_jwt(value) if value.count(".") == 2 else REDACTED
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return 0
+    return value
+
+
+def _redact_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        redacted: Dict[str, Any] = {}
+        for key, item in value.items():
+            if key.lower() in SECRET_FIELDS:
+                redacted[key] = REDACTED
+            elif key.lower() in SENSITIVE_FIELDS:
+                redacted[key] = _mask(item)
+            else:
+                redacted[key] = _redact_json(item)
+        return redacted
+    if isinstance(value, list):
+        return [_redact_json(item) for item in value]
+    return value
+
+
+def _redact_body(data: Optional[bytes], *, sort_keys: bool = True) -> Optional[bytes]:
+    # Idempotent, so a recorded (already redacted) request body and a live
+    # one with the same shape produce the same exact key.
+    if not data:
+        return data
+    try:
+        parsed = json.loads(data)
+    except (ValueError, UnicodeDecodeError):
+        return data
+    return json.dumps(_redact_json(parsed), ensure_ascii=False, sort_keys=sort_keys).encode("utf-8")
+
+
+# Keys leave out scheme and host so a cassette recorded against the real
+# sandbox replays under any MEDSSI_GOV_*_BASE (and vice versa).
+def exact_key(method: str, url: str, body: Optional[bytes]) -> str:
+    parts = urllib.parse.urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    return f"{method.upper()} {target} {(_redact_body(body) or b'').decode('utf-8', 'replace')}"
+
+
+def shape_key(method: str, url: str) -> str:
+    """Method and path with identifier segments, query and body stripped."""
+
+    parts = urllib.parse.urlsplit(url)
+    segments = ["*" if _ID_SEGMENT.match(segment) else segment for segment in parts.path.split("/")]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class Cassette:
+    """JSON-lines file of upstream request/response pairs.
+
+    In ``record`` mode every exchange is appended with its observed latency;
+    access tokens, API keys and cookies are replaced by ``<redacted>`` before
+    they reach the file. Values under claim fields (``content``, ``payload``,
+    ``holderDid``) and under ``credential``, ``nonce`` or ``data`` are masked
+    in JSON request and response bodies alike: strings become
+    ``<redacted>``, numbers 0, and credential JWTs keep only their ``jti`` so
+    imports still resolve on replay. In ``replay`` mode requests are answered
+    from the file: first by exact method, URL and (masked) body, then by
+    request shape (identifier path segments, query and body ignored) so
+    workloads that generate fresh transaction IDs still replay. Entries for
+    one key are served in recorded order and wrap around. ``latency`` is ``"recorded"`` to sleep
+    for the observed time or ``"zero"`` to answer immediately.
+    """
+
+    def __init__(self, path: str, *, mode: str = "replay", latency: str = "recorded") -> None:
+        if mode not in {"record", "replay"}:
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        if latency not in {"recorded", "zero"}:
+            raise ValueError(f"Unknown replay latency {latency!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._exact: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._shape: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self.recorded = 0
+        self.exact_hits = 0
+        self.shape_hits = 0
+        self.misses = 0
+        if mode == "replay":
+            self._load()
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                request = entry["request"]
+                body = _decode(request["body"]) if request.get("body") else None
+                self._exact[exact_key(request["method"], request["url"], body)].append(entry)
+                self._shape[shape_key(request["method"], request["url"])].append(entry)
+
+    # Recording ------------------------------------------------------------------
+    def record(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes],
+        headers: Mapping[str, str],
+        outcome: Any,
+        elapsed: float,
+    ) -> None:
+        request = {
+            "method": method.upper(),
+            "url": url,
+            "headers": {
+                key: REDACTED if key.lower() in SECRET_HEADERS else value
+                for key, value in headers.items()
+            },
+            "body": _encode(_redact_body(body)),
+        }
+        if isinstance(outcome, UpstreamResponse):
+            response: Dict[str, Any] = {
+                "status": outcome.status,
+                "reason": outcome.reason,
+                "headers": {
+                    key: REDACTED if key.lower() in SECRET_HEADERS else value
+                    for key, value in outcome.headers.items()
+                },
+                "charset": outcome.charset,
+                "body": _encode(_redact_body(outcome.body, sort_keys=False)),
+            }
+        else:
+            response = {
+                "error": getattr(outcome, "reason", str(outcome)),
+                "kind": getattr(outcome, "kind", "connection"),
+            }
+        line = json.dumps(
+            {"request": request, "response": response, "elapsed_ms": round(elapsed * 1000, 3)},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+            self.recorded += 1
+
+    # Replaying ------------------------------------------------------------------
+    def lookup(self, method: str, url: str, body: Optional[bytes]) -> Tuple[Any, float]:
+        """Return ``(UpstreamResponse | UpstreamError, delay_seconds)``."""
+
+        keys = (("exact", self._exact, exact_key(method, url, body)), ("shape", self._shape, shape_key(method, url)))
+        with self._lock:
+            for kind, table, key in keys:
+                entries = table.get(key)
+                if not entries:
+                    continue
+                cursor = f"{kind} {key}"
+                entry = entries[self._cursor[cursor] % len(entries)]
+                self._cursor[cursor] += 1
+                if kind == "exact":
+                    self.exact_hits += 1
+                else:
+                    self.shape_hits += 1
+                break
+            else:
+                self.misses += 1
+                return UpstreamError(f"No recorded response for {method.upper()} {url}"), 0.0
+
+        delay = entry.get("elapsed_ms", 0) / 1000 if self.latency == "recorded" else 0.0
+        recorded = entry["response"]
+        if "error" in recorded:
+            return UpstreamError(recorded["error"], recorded.get("kind", "connection")), delay
+        return (
+            UpstreamResponse(
+                recorded["status"],
+                recorded.get("reason", ""),
+                recorded.get("headers", {}),
+                _decode(recorded["body"]),
+                recorded.get("charset"),
+            ),
+            delay,
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "mode": self.mode,
+                "latency": self.latency,
+                "recorded": self.recorded,
+                "entries": sum(len(entries) for entries in self._exact.values()),
+                "exact_hits": self.exact_hits,
+                "shape_hits": self.shape_hits,
+                "misses": self.misses,
+            }
+
+
+class CassetteClient:
+    """``UpstreamClient`` stand-in that records through it or replays."""
+
+    def __init__(self, cassette: Cassette, client: UpstreamClient) -> None:
+        self.cassette = cassette
+        self.client = client
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> UpstreamResponse:
+        if self.cassette.mode == "replay":
+            outcome, delay = self.cassette.lookup(method, url, body)
+            if delay:
+                time.sleep(delay)
+        else:
+            started = time.perf_counter()
+            try:
+                outcome = self.client.request(method, url, body=body, headers=headers)
+            except UpstreamError as exc:
+                outcome = exc
+            self.cassette.record(method, url, body, headers or {}, outcome, time.perf_counter() - started)
+        if isinstance(outcome, UpstreamError):
+            raise outcome
+        return outcome
+
+
+class AsyncCassetteClient:
+    """``AsyncUpstreamClient`` counterpart of :class:`CassetteClient`."""
+
+    def __init__(self, cassette: Cassette, client: AsyncUpstreamClient) -> None:
+        self.cassette = cassette
+        self.client = client
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> UpstreamResponse:
+        if self.cassette.mode == "replay":
+            outcome, delay = self.cassette.lookup(method, url, body)
+            if delay:
+                await asyncio.sleep(delay)
+        else:
+            started = time.perf_counter()
+            try:
+                outcome = await self.client.request(method, url, body=body, headers=headers)
+            except UpstreamError as exc:
+                outcome = exc
+            elapsed = time.perf_counter() - started
+            # The append is blocking file I/O; keep it off the event loop.
+            await asyncio.to_thread(self.cassette.record, method, url, body, headers or {}, outcome, elapsed)
+        if isinstance(outcome, UpstreamError):
+            raise outcome
+        return outcome
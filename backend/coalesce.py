@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The first caller for a key runs the call; callers arriving while it is
+    still running wait for it and receive the same result or exception.
+    Nothing is cached: once the call finishes the next caller starts afresh.
+    ``do`` serves threadpool callers and ``do_async`` coroutine callers; the
+    two never share flights with each other.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._tasks: Dict[Tuple[int, Hashable], "asyncio.Future[Any]"] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    def do(self, key: Hashable, call: Callable[[], T]) -> T:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = call()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.result
+
+    async def do_async(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(slot)
+            if task is None:
+                task = self._tasks[slot] = asyncio.ensure_future(call())
+                task.add_done_callback(lambda done: self._finish_task(slot, done))
+                self.leaders += 1
+            else:
+                self.collapsed += 1
+        # A caller that disconnects must not cancel the call for the others.
+        return await asyncio.shield(task)
+
+    def _finish_task(self, slot: Tuple[int, Hashable], task: "asyncio.Future[Any]") -> None:
+        with self._lock:
+            if self._tasks.get(slot) is task:
+                del self._tasks[slot]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every waiter went away
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.leaders + self.collapsed
+            return {
+                "leaders": self.leaders,
+                "collapsed": self.collapsed,
+                "collapse_ratio": self.collapsed / calls if calls else 0.0,
+                "in_flight": len(self._flights) + len(self._tasks),
+            }
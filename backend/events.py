@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+
+class StreamSlot:
+    """One open stream counted against :attr:`ResultBroker.max_streams`.
+
+    ``release`` is idempotent so it can be wired to every way a response
+    ends: finished, failed, or dropped without ever being sent.
+    """
+
+    __slots__ = ("_broker", "released", "__weakref__")
+
+    def __init__(self, broker: "ResultBroker") -> None:
+        self._broker = broker
+        self.released = False
+
+    def release(self) -> None:
+        self._broker._release(self)
+
+
+class ResultBroker:
+    """Wake async waiters when a verification session gets its result.
+
+    Waiters are plain ``asyncio`` futures registered from the event loop;
+    ``publish`` may be called from any thread (``submit_presentation`` runs in
+    the threadpool) and hands the payload over with ``call_soon_threadsafe``.
+    An idle waiter therefore costs one future, not a thread. Nothing is
+    retained after delivery: subscribers re-check the store themselves.
+    """
+
+    def __init__(self, max_streams: int = 10000) -> None:
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[Any]"]]] = {}
+        self.streams = 0
+        self.rejected = 0
+        self.published = 0
+        self.delivered = 0
+        self.subscriptions = 0
+
+    def try_open_stream(self) -> Optional["StreamSlot"]:
+        """Claim a stream slot, or count a rejection once ``max_streams`` are open."""
+
+        with self._lock:
+            if self.streams >= self.max_streams:
+                self.rejected += 1
+                return None
+            self.streams += 1
+        return StreamSlot(self)
+
+    def _release(self, slot: "StreamSlot") -> None:
+        with self._lock:
+            if slot.released:
+                return
+            slot.released = True
+            self.streams -= 1
+
+    def subscribe(self, session_id: str) -> "asyncio.Future[Any]":
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Any]" = loop.create_future()
+        with self._lock:
+            self._waiters.setdefault(session_id, set()).add((loop, future))
+            self.subscriptions += 1
+        return future
+
+    def unsubscribe(self, session_id: str, future: "asyncio.Future[Any]") -> None:
+        with self._lock:
+            waiters = self._waiters.get(session_id)
+            if not waiters:
+                return
+            waiters.discard((future.get_loop(), future))
+            if not waiters:
+                del self._waiters[session_id]
+
+    def publish(self, session_id: str, event: str, payload: Any) -> int:
+        """Resolve every waiter of ``session_id`` with ``(event, payload)``."""
+
+        with self._lock:
+            waiters = self._waiters.pop(session_id, set())
+            self.published += 1
+            self.delivered += len(waiters)
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, (event, payload))
+            except RuntimeError:  # loop already closed
+                continue
+        return len(waiters)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "max_streams": self.max_streams,
+                "rejected": self.rejected,
+                "sessions": len(self._waiters),
+                "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+                "subscriptions": self.subscriptions,
+                "published": self.published,
+                "delivered": self.delivered,
+            }
+
+
+def _resolve(future: "asyncio.Future[Any]", value: Any) -> None:
+    if not future.done():
+        future.set_result(value)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import heapq
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+def deadline_from(value: Optional[datetime]) -> Optional[float]:
+    """Convert a model timestamp into a comparable POSIX deadline.
+
+    Offers created locally carry naive UTC datetimes while offers imported
+    from the government sandbox may be timezone aware, so both are reduced to
+    seconds since the epoch before they are ordered.
+    """
+
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class ExpiryScheduler:
+    """Deadline-ordered min-heap of store entries awaiting housekeeping.
+
+    Each key has at most one live deadline. Rescheduling or cancelling a key
+    leaves the old heap entry behind; it is recognised as stale through its
+    sequence number and skipped when it reaches the top of the heap. The
+    scheduler has its own lock so store stripes never serialise on it for
+    longer than a heap operation.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._live: Dict[Hashable, Tuple[float, int]] = {}
+        self._sequence = 0
+        self.ticks = 0
+        self.last_processed = 0
+        self.total_processed = 0
+        self.stale_skipped = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def schedule(self, key: Hashable, when: Optional[datetime]) -> None:
+        deadline = deadline_from(when)
+        with self._lock:
+            if deadline is None:
+                self._live.pop(key, None)
+                return
+            current = self._live.get(key)
+            if current is not None and current[0] == deadline:
+                return
+            self._sequence += 1
+            self._live[key] = (deadline, self._sequence)
+            heapq.heappush(self._heap, (deadline, self._sequence, key))
+            self._compact_if_needed()
+
+    def cancel(self, key: Hashable) -> None:
+        with self._lock:
+            self._live.pop(key, None)
+
+    def pop_due(self, now: datetime) -> Optional[Hashable]:
+        """Pop the next key whose deadline has passed strictly before ``now``."""
+
+        reference = deadline_from(now)
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] < reference:
+                deadline, sequence, key = heapq.heappop(heap)
+                if self._live.get(key) != (deadline, sequence):
+                    self.stale_skipped += 1
+                    continue
+                del self._live[key]
+                return key
+            return None
+
+    def due_count(self, now: datetime) -> int:
+        """Count live entries already due, visiting only the due part of the heap."""
+
+        reference = deadline_from(now)
+        with self._lock:
+            heap = self._heap
+            count = 0
+            stack = [0] if heap else []
+            while stack:
+                index = stack.pop()
+                deadline, sequence, key = heap[index]
+                if deadline >= reference:
+                    continue
+                if self._live.get(key) == (deadline, sequence):
+                    count += 1
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(heap):
+                        stack.append(child)
+            return count
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            while self._heap:
+                deadline, sequence, key = self._heap[0]
+                if self._live.get(key) == (deadline, sequence):
+                    return deadline
+                heapq.heappop(self._heap)
+                self.stale_skipped += 1
+            return None
+
+    def record_tick(self, processed: int) -> None:
+        with self._lock:
+            self.ticks += 1
+            self.last_processed = processed
+            self.total_processed += processed
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "scheduled": len(self._live),
+                "heap_size": len(self._heap),
+                "ticks": self.ticks,
+                "last_processed": self.last_processed,
+                "total_processed": self.total_processed,
+                "stale_skipped": self.stale_skipped,
+            }
+
+    def _compact_if_needed(self) -> None:
+        # Caller holds the lock. Frequent reschedules (e.g. UPDATE actions)
+        # leave stale entries behind; rebuild once they dominate the heap.
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._live):
+            self._heap = [
+                (deadline, sequence, key) for key, (deadline, sequence) in self._live.items()
+            ]
+            heapq.heapify(self._heap)
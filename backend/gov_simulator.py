@@ -0,0 +1,341 @@
+"""Stand-in for the MODA issuer/verifier sandboxes, for offline load tests.
+
+Implements the upstream endpoints the ``/api/*`` proxy routes call:
+``/api/qrcode/data``, ``/api/qrcode/nodata``, both nonce paths,
+``PUT /api/credential/{id}/{action}``, ``/api/oidvp/qrcode`` and
+``/api/oidvp/result``, with the response shapes the frontend reads. Every
+request first draws from the configured latency distribution, error rate
+and timeout rate. One simulator can serve as both issuer and verifier base.
+
+Run it with::
+
+    python -m backend.gov_simulator --port 9000 --latency lognormal:80,600 --error-rate 0.01
+
+and point ``MEDSSI_GOV_ISSUER_BASE`` / ``MEDSSI_GOV_VERIFIER_BASE`` at it.
+``GET /_sim/stats`` reports per-route counts. ``PUT /_sim/config`` changes the
+behaviour while a load test runs; it accepts the same keys as
+``SimulatorConfig`` plus per-route overrides under ``routes``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import math
+import os
+import random
+import secrets
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import Body, FastAPI, Header, HTTPException, Query
+from pydantic import BaseModel, Field, validator
+
+
+# A 1x1 PNG: the proxy only passes the image through, so size is irrelevant.
+_PLACEHOLDER_PNG = "data:image/png;base64," + base64.b64encode(
+    bytes.fromhex(
+        "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+        "0000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+    )
+).decode("ascii")
+
+
+class LatencyModel:
+    """Per-request delay in milliseconds parsed from a short spec string.
+
+    ``fixed:MS``, ``uniform:LOW,HIGH``, ``normal:MEAN,SD`` or
+    ``lognormal:MEDIAN,P99``; the lognormal form is the usual way to get a
+    realistic long tail from two observed numbers.
+    """
+
+    def __init__(self, spec: str = "fixed:0") -> None:
+        kind, _, raw = spec.partition(":")
+        values = [float(part) for part in raw.split(",") if part.strip()] if raw else []
+        kind = kind.strip().lower()
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec {spec!r}")
+        if kind == "lognormal" and not 0 < values[0] <= values[1]:
+            raise ValueError("lognormal needs 0 < median <= p99")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.values[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.values)
+        if self.kind == "normal":
+            return max(rng.gauss(*self.values), 0.0)
+        median, p99 = self.values
+        sigma = math.log(p99 / median) / 2.326  # z-score of the 99th percentile
+        return rng.lognormvariate(math.log(median), sigma)
+
+
+class RouteBehaviour(BaseModel):
+    latency: Optional[str] = None
+    error_rate: Optional[float] = Field(None, ge=0, le=1)
+    timeout_rate: Optional[float] = Field(None, ge=0, le=1)
+
+    @validator("latency")
+    def _check_latency(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            LatencyModel(value)
+        return value
+
+
+class SimulatorConfig(BaseModel):
+    latency: str = "fixed:0"
+    error_rate: float = Field(0.0, ge=0, le=1)
+    error_status: int = 503
+    timeout_rate: float = Field(0.0, ge=0, le=1)
+    timeout_seconds: float = 30.0
+    result_delay_seconds: float = 0.0
+    nonce_paths: str = Field("both", regex="^(both|v1|v2)$")
+    routes: Dict[str, RouteBehaviour] = {}
+
+    @validator("latency")
+    def _check_latency(cls, value: str) -> str:
+        LatencyModel(value)
+        return value
+
+    @classmethod
+    def from_env(cls) -> "SimulatorConfig":
+        return cls(
+            latency=os.getenv("MEDSSI_SIM_LATENCY", "fixed:0"),
+            error_rate=float(os.getenv("MEDSSI_SIM_ERROR_RATE", "0")),
+            error_status=int(os.getenv("MEDSSI_SIM_ERROR_STATUS", "503")),
+            timeout_rate=float(os.getenv("MEDSSI_SIM_TIMEOUT_RATE", "0")),
+            timeout_seconds=float(os.getenv("MEDSSI_SIM_TIMEOUT_SECONDS", "30")),
+            result_delay_seconds=float(os.getenv("MEDSSI_SIM_RESULT_DELAY_SECONDS", "0")),
+            nonce_paths=os.getenv("MEDSSI_SIM_NONCE_PATHS", "both"),
+        )
+
+
+class GovSimulator:
+    """Simulated upstream state plus the fault model applied to each call."""
+
+    def __init__(self, config: SimulatorConfig, *, seed: Optional[int] = None, max_transactions: int = 100_000) -> None:
+        self.max_transactions = max_transactions
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._offers: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._verifications: "OrderedDict[str, float]" = OrderedDict()
+        self.stats: Counter = Counter()
+        self.configure(config)
+
+    def configure(self, config: SimulatorConfig) -> None:
+        self.config = config
+        self._latency = LatencyModel(config.latency)
+        self._route_latency = {
+            route: LatencyModel(behaviour.latency)
+            for route, behaviour in config.routes.items()
+            if behaviour.latency
+        }
+
+    def _remember(self, table: "OrderedDict[str, Any]", key: str, value: Any) -> None:
+        with self._lock:
+            table[key] = value
+            while len(table) > self.max_transactions:
+                table.popitem(last=False)
+
+    async def behave(self, route: str) -> None:
+        """Sleep, hang or fail according to the config for ``route``."""
+
+        override = self.config.routes.get(route) or RouteBehaviour()
+        error_rate = self.config.error_rate if override.error_rate is None else override.error_rate
+        timeout_rate = self.config.timeout_rate if override.timeout_rate is None else override.timeout_rate
+        with self._lock:
+            self.stats[f"{route}.requests"] += 1
+            roll = self._rng.random()
+            delay_ms = self._route_latency.get(route, self._latency).sample(self._rng)
+        if roll < timeout_rate:
+            self.stats[f"{route}.timeouts"] += 1
+            await asyncio.sleep(self.config.timeout_seconds)
+        await asyncio.sleep(delay_ms / 1000)
+        if roll >= 1 - error_rate:
+            self.stats[f"{route}.errors"] += 1
+            raise HTTPException(
+                status_code=self.config.error_status,
+                detail={"code": str(self.config.error_status), "message": "Simulated upstream failure"},
+            )
+
+    # Issuer ---------------------------------------------------------------
+    def create_offer(self, payload: Dict[str, Any], *, with_data: bool) -> Dict[str, Any]:
+        transaction_id = str(payload.get("transactionId") or uuid.uuid4())
+        nonce = secrets.token_urlsafe(16)
+        self._remember(
+            self._offers,
+            transaction_id,
+            {"nonce": nonce, "with_data": with_data, "vc_uid": payload.get("vcUid")},
+        )
+        return {
+            "transactionId": transaction_id,
+            "qrCode": _PLACEHOLDER_PNG,
+            "deepLink": f"modadigitalwallet://credential_offer?transactionId={transaction_id}",
+        }
+
+    def nonce(self, transaction_id: str) -> Dict[str, Any]:
+        offer = self._offers.get(transaction_id)
+        if offer is None:
+            raise HTTPException(
+                status_code=404, detail={"code": "404", "message": "Transaction not found"}
+            )
+        return {
+            "transactionId": transaction_id,
+            "nonce": offer["nonce"],
+            "credential": f"sim.{base64.urlsafe_b64encode(transaction_id.encode()).decode()}.sig",
+        }
+
+    # Verifier -------------------------------------------------------------
+    def create_verification(self, transaction_id: str, ref: str) -> Dict[str, Any]:
+        self._remember(self._verifications, transaction_id, time.monotonic())
+        return {
+            "transactionId": transaction_id,
+            "ref": ref,
+            "qrcodeImage": _PLACEHOLDER_PNG,
+            "authUri": f"modadigitalwallet://authorize?transactionId={transaction_id}&ref={ref}",
+            "expiresAt": (datetime.utcnow() + timedelta(minutes=5)).isoformat() + "Z",
+        }
+
+    def result(self, transaction_id: str) -> Dict[str, Any]:
+        created = self._verifications.get(transaction_id)
+        if created is None:
+            raise HTTPException(
+                status_code=400, detail={"code": "400", "message": "Unknown transactionId"}
+            )
+        if time.monotonic() - created < self.config.result_delay_seconds:
+            raise HTTPException(
+                status_code=400, detail={"code": "RESULT_PENDING", "message": "Presentation not uploaded yet"}
+            )
+        return {
+            "verifyResult": True,
+            "resultDescription": "success",
+            "transactionId": transaction_id,
+            "data": [
+                {
+                    "credentialType": "MedicalRecordCredential",
+                    "claims": [{"ename": "condition_code", "cname": "診斷代碼", "value": "K29.7"}],
+                }
+            ],
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "config": self.config.dict(),
+                "offers": len(self._offers),
+                "verifications": len(self._verifications),
+                "counters": dict(sorted(self.stats.items())),
+            }
+
+
+def create_app(config: Optional[SimulatorConfig] = None, *, seed: Optional[int] = None) -> FastAPI:
+    simulator = GovSimulator(config or SimulatorConfig.from_env(), seed=seed)
+    app = FastAPI(title="MODA sandbox simulator", version="0.1.0")
+    app.state.simulator = simulator
+
+    def require_token(access_token: Optional[str]) -> None:
+        if not access_token:
+            raise HTTPException(status_code=401, detail={"code": "401", "message": "Missing access-token"})
+
+    @app.post("/api/qrcode/data", status_code=201)
+    async def issue_with_data(
+        payload: Dict[str, Any] = Body(...), access_token: Optional[str] = Header(None, alias="access-token")
+    ) -> Dict[str, Any]:
+        require_token(access_token)
+        await simulator.behave("qrcode_data")
+        return simulator.create_offer(payload, with_data=True)
+
+    @app.post("/api/qrcode/nodata", status_code=201)
+    async def issue_without_data(
+        payload: Dict[str, Any] = Body(...), access_token: Optional[str] = Header(None, alias="access-token")
+    ) -> Dict[str, Any]:
+        require_token(access_token)
+        await simulator.behave("qrcode_nodata")
+        return simulator.create_offer(payload, with_data=False)
+
+    async def _nonce(variant: str, transaction_id: str, access_token: Optional[str]) -> Dict[str, Any]:
+        require_token(access_token)
+        if simulator.config.nonce_paths not in {"both", variant}:
+            raise HTTPException(status_code=404, detail={"code": "404", "message": "Not Found"})
+        await simulator.behave("nonce")
+        return simulator.nonce(transaction_id)
+
+    @app.get("/api/credential/nonce/{transaction_id}")
+    async def nonce_v1(
+        transaction_id: str, access_token: Optional[str] = Header(None, alias="access-token")
+    ) -> Dict[str, Any]:
+        return await _nonce("v1", transaction_id, access_token)
+
+    @app.get("/v2/api/credential/nonce/{transaction_id}")
+    async def nonce_v2(
+        transaction_id: str, access_token: Optional[str] = Header(None, alias="access-token")
+    ) -> Dict[str, Any]:
+        return await _nonce("v2", transaction_id, access_token)
+
+    @app.put("/api/credential/{credential_id}/{action}")
+    async def credential_action(
+        credential_id: str, action: str, access_token: Optional[str] = Header(None, alias="access-token")
+    ) -> Dict[str, Any]:
+        require_token(access_token)
+        await simulator.behave("credential_action")
+        return {"credentialId": credential_id, "action": action, "status": "SUCCESS"}
+
+    @app.get("/api/oidvp/qrcode")
+    async def oidvp_qrcode(
+        ref: str = Query("sim-ref"),
+        transaction_id: Optional[str] = Query(None, alias="transactionId"),
+        access_token: Optional[str] = Header(None, alias="access-token"),
+    ) -> Dict[str, Any]:
+        require_token(access_token)
+        await simulator.behave("oidvp_qrcode")
+        return simulator.create_verification(transaction_id or str(uuid.uuid4()), ref)
+
+    @app.post("/api/oidvp/result")
+    async def oidvp_result(
+        payload: Dict[str, Any] = Body(...), access_token: Optional[str] = Header(None, alias="access-token")
+    ) -> Dict[str, Any]:
+        require_token(access_token)
+        await simulator.behave("oidvp_result")
+        return simulator.result(str(payload.get("transactionId") or ""))
+
+    @app.get("/_sim/stats")
+    def simulator_stats() -> Dict[str, Any]:
+        return simulator.metrics()
+
+    @app.put("/_sim/config")
+    def update_config(config: SimulatorConfig) -> Dict[str, Any]:
+        simulator.configure(config)
+        return simulator.metrics()
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MODA sandbox simulator for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default=os.getenv("MEDSSI_SIM_LATENCY", "fixed:0"))
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("MEDSSI_SIM_ERROR_RATE", "0")))
+    parser.add_argument("--timeout-rate", type=float, default=float(os.getenv("MEDSSI_SIM_TIMEOUT_RATE", "0")))
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = SimulatorConfig.from_env().copy(
+        update={"latency": args.latency, "error_rate": args.error_rate, "timeout_rate": args.timeout_rate}
+    )
+    SimulatorConfig(**config.dict())  # validate the CLI overrides
+    uvicorn.run(create_app(config, seed=args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .models import (
+    CredentialOffer,
+    ForgetSummary,
+    Presentation,
+    VerificationResult,
+    VerificationSession,
+)
+from .records import CredentialRecord, RecordCodec
+from .store import InMemoryStore
+
+
+SEGMENT_PATTERN = re.compile(r"^journal-(\d{12})\.log$")
+SNAPSHOT_PATTERN = re.compile(r"^snapshot-(\d{12})\.jsonl$")
+
+
+def _record(op: str, data: str) -> str:
+    """Serialise one journal line; ``data`` is already valid JSON."""
+
+    return f'{{"op":"{op}","data":{data}}}\n'
+
+
+class StoreJournal:
+    """Append-only, segment-rotated log with group-commit fsync.
+
+    Callers enqueue fully serialised lines. A writer thread collects whatever
+    accumulated during ``commit_interval`` and writes it with a single
+    ``fsync``; in durable mode ``append`` waits until its lines are on disk.
+    ``rotate`` starts a new segment so a snapshot can be cut at that point.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        commit_interval: float = 0.002,
+        durable: bool = True,
+    ) -> None:
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.durable = durable
+        os.makedirs(directory, exist_ok=True)
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._pending: List[str] = []
+        self._appended = 0
+        self._flushed = 0
+        self._closed = False
+        self.segment = max(self.segments() or [0]) + 1
+        self._handle = open(self._segment_path(self.segment), "a", encoding="utf-8")
+        self.appends = 0
+        self.append_wait_seconds = 0.0
+        self.batches = 0
+        self.fsync_seconds = 0.0
+        self._writer = threading.Thread(target=self._run, name="store-journal", daemon=True)
+        self._writer.start()
+
+    # Paths ----------------------------------------------------------------
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"journal-{segment:012d}.log")
+
+    def _snapshot_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"snapshot-{segment:012d}.jsonl")
+
+    def _list(self, pattern: re.Pattern) -> List[int]:
+        found = []
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def segments(self) -> List[int]:
+        return self._list(SEGMENT_PATTERN)
+
+    def snapshots(self) -> List[int]:
+        return self._list(SNAPSHOT_PATTERN)
+
+    # Writing ----------------------------------------------------------------
+    def enqueue(self, lines: List[str]) -> int:
+        """Queue ``lines`` in order and return a ticket for :meth:`wait`."""
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Store journal is closed")
+            self._pending.extend(lines)
+            self._appended += 1
+            self._cond.notify_all()
+            return self._appended
+
+    def wait(self, ticket: int, started: float) -> None:
+        with self._cond:
+            if self.durable:
+                while self._flushed < ticket and not self._closed:
+                    self._cond.wait()
+            self.appends += 1
+            self.append_wait_seconds += time.perf_counter() - started
+
+    def append(self, line: str) -> None:
+        started = time.perf_counter()
+        self.wait(self.enqueue([line]), started)
+
+    def _write_pending(self) -> None:
+        # Caller holds _io_lock.
+        with self._cond:
+            batch, self._pending = self._pending, []
+            target = self._appended
+        if batch:
+            started = time.perf_counter()
+            self._handle.write("".join(batch))
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self.fsync_seconds += time.perf_counter() - started
+            self.batches += 1
+        with self._cond:
+            self._flushed = max(self._flushed, target)
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+            if self.commit_interval:
+                time.sleep(self.commit_interval)
+            with self._io_lock:
+                self._write_pending()
+
+    def rotate(self) -> int:
+        """Seal the current segment and return the number of the new one."""
+
+        with self._io_lock:
+            self._write_pending()
+            self._handle.close()
+            self.segment += 1
+            self._handle = open(self._segment_path(self.segment), "a", encoding="utf-8")
+            return self.segment
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join(timeout=5)
+        with self._io_lock:
+            self._write_pending()
+            self._handle.close()
+
+    def reopen(self) -> None:
+        """Accept appends again after :meth:`close`, in a fresh segment."""
+
+        with self._io_lock:
+            with self._cond:
+                if not self._closed:
+                    return
+            self.segment = max(self.segments() or [0]) + 1
+            self._handle = open(self._segment_path(self.segment), "a", encoding="utf-8")
+            self._writer = threading.Thread(target=self._run, name="store-journal", daemon=True)
+            with self._cond:
+                self._closed = False
+            self._writer.start()
+
+    # Snapshots --------------------------------------------------------------
+    def write_snapshot(self, segment: int, lines: Iterable[str]) -> None:
+        """Persist a snapshot taken at the start of ``segment`` and compact."""
+
+        path = self._snapshot_path(segment)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            for line in lines:
+                handle.write(line)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+        for older in self.snapshots():
+            if older < segment:
+                os.remove(self._snapshot_path(older))
+        for older in self.segments():
+            if older < segment:
+                os.remove(self._segment_path(older))
+
+    def recovery_plan(self) -> Tuple[Optional[str], List[str]]:
+        """Return the latest snapshot path and the log segments to replay after it."""
+
+        snapshots = self.snapshots()
+        base = snapshots[-1] if snapshots else 0
+        snapshot_path = self._snapshot_path(base) if snapshots else None
+        segments = [
+            self._segment_path(segment)
+            for segment in self.segments()
+            if base <= segment < self.segment
+        ]
+        return snapshot_path, segments
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            appends = self.appends
+            return {
+                "segment": self.segment,
+                "durable": self.durable,
+                "commitIntervalMs": self.commit_interval * 1000,
+                "appends": appends,
+                "pending": len(self._pending),
+                "batches": self.batches,
+                "avgBatchSize": appends / self.batches if self.batches else 0.0,
+                "avgAppendWaitMs": (self.append_wait_seconds / appends * 1000) if appends else 0.0,
+                "avgFsyncMs": (self.fsync_seconds / self.batches * 1000) if self.batches else 0.0,
+            }
+
+
+def _read_records(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave the final line half written.
+                return
+
+
+class JournaledStore(InMemoryStore):
+    """InMemoryStore that journals every mutation and snapshots periodically.
+
+    Only the outermost public mutation is logged, so composite operations
+    such as ``forget_holder`` replay as one record rather than as the
+    deletes they perform internally. On start the latest snapshot is loaded
+    and the log tail replayed before new appends are accepted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        commit_interval: float = 0.002,
+        durable: bool = True,
+        snapshot_interval: Optional[float] = 300.0,
+        codec: Optional[RecordCodec] = None,
+    ) -> None:
+        super().__init__(codec=codec)
+        self._local = threading.local()
+        self._replaying = False
+        self.recovery_seconds = 0.0
+        self.recovered_snapshot_records = 0
+        self.recovered_log_records = 0
+        self.snapshots_taken = 0
+        self.last_snapshot_seconds: Optional[float] = None
+        self.last_snapshot_records = 0
+        self._journal = StoreJournal(directory, commit_interval=commit_interval, durable=durable)
+        self._recover()
+        self._snapshot_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._snapshot_interval = snapshot_interval
+        self._snapshotter: Optional[threading.Thread] = None
+        self._start_snapshotter()
+
+    def _start_snapshotter(self) -> None:
+        if self._snapshot_interval:
+            self._snapshotter = threading.Thread(
+                target=self._snapshot_loop,
+                args=(self._snapshot_interval,),
+                name="store-snapshot",
+                daemon=True,
+            )
+            self._snapshotter.start()
+
+    # Journaling -------------------------------------------------------------
+    @contextmanager
+    def _mutation(self, guard: ContextManager[None]) -> Iterator[Callable[[str, str], None]]:
+        """Collect journal lines for one mutation made while holding ``guard``.
+
+        ``guard`` holds the same stripes the base class takes, so lines for a
+        key reach the log in the order the mutations were applied. The
+        fsync wait happens after ``guard`` is released, or, inside
+        :meth:`_deferred_waits`, once the enclosing block ends.
+        """
+
+        started = time.perf_counter()
+        ticket: Optional[int] = None
+        with guard:
+            depth = getattr(self._local, "depth", 0)
+            self._local.depth = depth + 1
+            lines: List[str] = []
+            try:
+                yield lambda op, data: lines.append(_record(op, data))
+            finally:
+                self._local.depth = depth
+            if depth == 0 and lines and not self._replaying:
+                ticket = self._journal.enqueue(lines)
+        if ticket is None:
+            return
+        deferred = getattr(self._local, "deferred", None)
+        if deferred is not None:
+            deferred.append((ticket, started))
+        else:
+            self._journal.wait(ticket, started)
+
+    @contextmanager
+    def _deferred_waits(self) -> Iterator[None]:
+        """Wait once, at the end of the block, for every mutation made in it.
+
+        For callers that hold a stripe of their own around journaled
+        mutations (the expiry path): without this each mutation would wait
+        for its fsync with that stripe still held.
+        """
+
+        if getattr(self._local, "deferred", None) is not None:
+            yield
+            return
+        self._local.deferred = deferred = []
+        try:
+            yield
+        finally:
+            self._local.deferred = None
+            for ticket, started in deferred:
+                self._journal.wait(ticket, started)
+
+    def _credential_guard(self, credential_id: str) -> ContextManager[None]:
+        return self._locks.hold(("credential", credential_id))
+
+    def _session_guard(self, session_id: Optional[str]) -> ContextManager[None]:
+        return self._locks.hold(("session", session_id) if session_id else None)
+
+    def persist_credential(self, credential: CredentialOffer) -> None:
+        with self._mutation(self._credential_guard(credential.credential_id)) as record:
+            super().persist_credential(credential)
+            record("credential", credential.json())
+
+    def persist_credentials(self, credentials: List[CredentialOffer]) -> None:
+        keys = [("credential", credential.credential_id) for credential in credentials]
+        with self._mutation(self._locks.hold(*keys)) as record:
+            super().persist_credentials(credentials)
+            for credential in credentials:
+                record("credential", credential.json())
+
+    def update_credential(self, credential: CredentialOffer) -> None:
+        with self._mutation(self._credential_guard(credential.credential_id)) as record:
+            super().update_credential(credential)
+            record("credential", credential.json())
+
+    def revoke_credential(self, credential_id: str) -> None:
+        with self._mutation(self._credential_guard(credential_id)) as record:
+            super().revoke_credential(credential_id)
+            record("credential", self._load_credential(credential_id).json())
+
+    def delete_credential(self, credential_id: str) -> None:
+        with self._mutation(self._credential_guard(credential_id)) as record:
+            super().delete_credential(credential_id)
+            record("delete_credential", json.dumps(credential_id))
+
+    def cleanup_expired(
+        self, now: Optional[datetime] = None, budget_seconds: Optional[float] = None
+    ) -> int:
+        # Expiry mutates under the item's own stripe; wait for the fsync once
+        # per tick instead of once per item with the stripe held.
+        with self._deferred_waits():
+            return super().cleanup_expired(now, budget_seconds)
+
+    def persist_verification_session(self, session: VerificationSession) -> None:
+        with self._mutation(self._session_guard(session.session_id)) as record:
+            super().persist_verification_session(session)
+            record("session", session.json())
+
+    def persist_presentation(self, presentation: Presentation) -> None:
+        with self._mutation(self._session_guard(presentation.session_id)) as record:
+            super().persist_presentation(presentation)
+            record("presentation", presentation.json())
+
+    def delete_presentation(self, presentation_id: str) -> None:
+        presentation = self._presentations.get(presentation_id)
+        if presentation is None:
+            return
+        with self._mutation(self._session_guard(presentation.session_id)) as record:
+            super().delete_presentation(presentation_id)
+            record("delete_presentation", json.dumps(presentation_id))
+
+    def persist_result(self, result: VerificationResult) -> None:
+        with self._mutation(self._session_guard(result.session_id)) as record:
+            super().persist_result(result)
+            record("result", result.json())
+
+    def forget_holder(self, holder_did: str) -> ForgetSummary:
+        with self._mutation(self._holding_holder(holder_did)) as record:
+            summary = self._forget_holder_locked(holder_did)
+            record("forget_holder", json.dumps(holder_did))
+        return summary
+
+    def purge_session(self, session_id: str) -> None:
+        with self._mutation(self._session_guard(session_id)) as record:
+            super().purge_session(session_id)
+            record("purge_session", json.dumps(session_id))
+
+    def reset(self) -> None:
+        with self._mutation(self._locks.hold_all()) as record:
+            super().reset()
+            record("reset", "null")
+
+    # Recovery ---------------------------------------------------------------
+    def _apply(self, op: str, data: Any) -> None:
+        if op == "credential":
+            self.persist_credential(CredentialOffer.parse_obj(data))
+        elif op == "delete_credential":
+            self.delete_credential(data)
+        elif op == "session":
+            self.persist_verification_session(VerificationSession.parse_obj(data))
+        elif op == "presentation":
+            self.persist_presentation(Presentation.parse_obj(data))
+        elif op == "delete_presentation":
+            self.delete_presentation(data)
+        elif op == "result":
+            self.persist_result(VerificationResult.parse_obj(data))
+        elif op == "forget_holder":
+            self.forget_holder(data)
+        elif op == "purge_session":
+            self.purge_session(data)
+        elif op == "reset":
+            self.reset()
+
+    def _recover(self) -> None:
+        started = time.perf_counter()
+        snapshot_path, segments = self._journal.recovery_plan()
+        self._replaying = True
+        try:
+            if snapshot_path:
+                for entry in _read_records(snapshot_path):
+                    self._apply(entry["op"], entry["data"])
+                    self.recovered_snapshot_records += 1
+            for path in segments:
+                for entry in _read_records(path):
+                    self._apply(entry["op"], entry["data"])
+                    self.recovered_log_records += 1
+        finally:
+            self._replaying = False
+        self.recovery_seconds = time.perf_counter() - started
+
+    # Snapshots --------------------------------------------------------------
+    def _snapshot_lines(
+        self,
+        credentials: List[Union[CredentialOffer, CredentialRecord]],
+        sessions: List[VerificationSession],
+        presentations: List[Presentation],
+        results: List[VerificationResult],
+    ) -> Iterator[str]:
+        for credential in credentials:
+            yield _record("credential", self._decode_credential(credential).json())
+        for session in sessions:
+            yield _record("session", session.json())
+        for presentation in presentations:
+            yield _record("presentation", presentation.json())
+        for result in results:
+            yield _record("result", result.json())
+
+    def snapshot(self) -> int:
+        """Cut a compacted snapshot; returns the number of records written.
+
+        Only the segment rotation and shallow copies of the top-level dicts
+        happen up front; serialisation and fsync run on the calling
+        (snapshot) thread. Mutations racing with the copy are also present
+        in the new segment, and replaying them is idempotent.
+        """
+
+        with self._snapshot_lock:
+            started = time.perf_counter()
+            segment = self._journal.rotate()
+            credentials = list(self._credentials.values())
+            sessions = list(self._verification_sessions.values())
+            presentations = list(self._presentations.values())
+            results = [
+                result
+                for session_results in list(self._session_results.values())
+                for result in list(session_results.values())
+            ]
+            lines = list(self._snapshot_lines(credentials, sessions, presentations, results))
+            self._journal.write_snapshot(segment, lines)
+            self.snapshots_taken += 1
+            self.last_snapshot_seconds = time.perf_counter() - started
+            self.last_snapshot_records = len(lines)
+            return len(lines)
+
+    def _snapshot_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.snapshot()
+            except Exception:  # pragma: no cover - retry on the next interval
+                continue
+
+    def start(self) -> None:
+        """Resume journaling and snapshots after :meth:`close`; no-op if running."""
+
+        if not self._stop.is_set():
+            return
+        self._journal.reopen()
+        self._stop.clear()
+        self._start_snapshotter()
+
+    def close(self) -> None:
+        """Stop snapshots and flush the last commit window to disk."""
+
+        self._stop.set()
+        if self._snapshotter is not None:
+            self._snapshotter.join(timeout=5)
+        self._journal.close()
+
+    def journal_metrics(self) -> Dict[str, Any]:
+        metrics = self._journal.metrics()
+        metrics.update(
+            {
+                "recoverySeconds": self.recovery_seconds,
+                "recoveredSnapshotRecords": self.recovered_snapshot_records,
+                "recoveredLogRecords": self.recovered_log_records,
+                "snapshotsTaken": self.snapshots_taken,
+                "lastSnapshotSeconds": self.last_snapshot_seconds,
+                "lastSnapshotRecords": self.last_snapshot_records,
+            }
+        )
+        return metrics
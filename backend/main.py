@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import base64
-import io
+import copy
 import json
 import os
 import re
 import secrets
-import urllib.error
+import threading
+import time
 import urllib.parse
-import urllib.request
 import uuid
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, AsyncIterator, Awaitable, Deque, Dict, Iterator, List, Optional, Tuple, Union
 
 from fastapi import (
     APIRouter,
@@ -22,13 +27,19 @@ from fastapi import (
     HTTPException,
     Query,
     Request,
+    Response,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field, ValidationError
 from urllib.parse import urlencode
 
+from . import qr as qr_images
 from .analytics import get_risk_engine
+from .cache import TTLCache
+from .cassette import AsyncCassetteClient, Cassette, CassetteClient
+from .coalesce import SingleFlight
 from .models import (
     CredentialAction,
     CredentialActionRequest,
@@ -49,15 +60,60 @@ from .models import (
     VerificationResult,
     VerificationSession,
 )
+from .events import ResultBroker, StreamSlot
+from .offer_pool import OfferPool, PrefabOffer
+from .reaper import ExpiryReaper
+from .resilience import CircuitOpenError, UpstreamGuards
 from .store import store
+from .telemetry import UpstreamTelemetry
+from .templates import TemplateRegistry, TemplateSet, VCTemplate
+from .upstream import (
+    AsyncUpstreamClient,
+    UpstreamClient,
+    UpstreamError,
+    UpstreamResponse,
+)
+from .webhooks import WebhookDispatcher, callback_block_reason, callback_peer_block_reason
+
+
+REAPER_MODE = os.getenv("MEDSSI_REAPER_MODE", "background").strip().lower()
+REAPER_INTERVAL_SECONDS = float(os.getenv("MEDSSI_REAPER_INTERVAL_SECONDS", "5"))
+REAPER_BUDGET_MS = float(os.getenv("MEDSSI_REAPER_BUDGET_MS", "50"))
 
+reaper = ExpiryReaper(
+    store,
+    mode=REAPER_MODE,
+    interval_seconds=REAPER_INTERVAL_SECONDS,
+    budget_seconds=REAPER_BUDGET_MS / 1000 if REAPER_BUDGET_MS > 0 else None,
+)
 
-try:  # pragma: no cover - optional dependency for nicer QR codes
-    import qrcode
-except Exception:  # pragma: no cover - fallback to text payloads
-    qrcode = None
 
-app = FastAPI(title="MedSSI Sandbox APIs", version="0.6.0")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    start_store = getattr(store, "start", None)
+    if start_store is not None:
+        start_store()
+    if reaper.mode == "background":
+        reaper.start()
+    issuance_templates.current()
+    offer_pool.start()
+    try:
+        yield
+    finally:
+        await reaper.stop()
+        await asyncio.to_thread(offer_pool.close)
+        # Flushes the journaled store's last commit window to disk.
+        close_store = getattr(store, "close", None)
+        if close_store is not None:
+            await asyncio.to_thread(close_store)
+        await asyncio.to_thread(qr_renderer.close)
+        await async_upstream_client.aclose()
+        upstream_client.close()
+        await asyncio.to_thread(webhook_dispatcher.close)
+        webhook_client.close()
+
+
+app = FastAPI(title="MedSSI Sandbox APIs", version="0.6.0", lifespan=lifespan)
 allowed_origins_env = os.getenv(
     "MEDSSI_ALLOWED_ORIGINS",
     (
@@ -136,6 +192,116 @@ GOV_VERIFIER_BASE = os.getenv(
 print(f"🌐 Gov issuer base: {GOV_ISSUER_BASE}")
 print(f"🌐 Gov verifier base: {GOV_VERIFIER_BASE}")
 
+upstream_client = UpstreamClient(
+    max_size=int(os.getenv("MEDSSI_UPSTREAM_POOL_SIZE", "10")),
+    connect_timeout=float(os.getenv("MEDSSI_UPSTREAM_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("MEDSSI_UPSTREAM_READ_TIMEOUT", "15")),
+    idle_seconds=float(os.getenv("MEDSSI_UPSTREAM_IDLE_SECONDS", "30")),
+    pool_timeout=float(os.getenv("MEDSSI_UPSTREAM_POOL_TIMEOUT", "10")),
+)
+# Coroutines are cheap, so the async routes get their own, much larger
+# connection limit instead of sharing the threadpool-sized sync pool.
+async_upstream_client = AsyncUpstreamClient(
+    upstream_client,
+    max_connections=int(os.getenv("MEDSSI_UPSTREAM_ASYNC_MAX_CONNECTIONS", "1000")),
+)
+
+# Record/replay of sandbox traffic for repeatable benchmarks of the proxy
+# paths; unset (the default) talks to the sandbox directly.
+UPSTREAM_CASSETTE_PATH = os.getenv("MEDSSI_UPSTREAM_CASSETTE")
+upstream_cassette: Optional[Cassette] = None
+upstream_transport: Union[UpstreamClient, CassetteClient] = upstream_client
+async_upstream_transport: Union[AsyncUpstreamClient, AsyncCassetteClient] = async_upstream_client
+if UPSTREAM_CASSETTE_PATH:
+    upstream_cassette = Cassette(
+        UPSTREAM_CASSETTE_PATH,
+        mode=os.getenv("MEDSSI_UPSTREAM_CASSETTE_MODE", "replay").strip().lower(),
+        latency=os.getenv("MEDSSI_UPSTREAM_REPLAY_LATENCY", "recorded").strip().lower(),
+    )
+    upstream_transport = CassetteClient(upstream_cassette, upstream_client)
+    async_upstream_transport = AsyncCassetteClient(upstream_cassette, async_upstream_client)
+    print(f"📼 Upstream cassette: {UPSTREAM_CASSETTE_PATH} ({upstream_cassette.mode})")
+upstream_guards = UpstreamGuards(
+    failure_threshold=int(os.getenv("MEDSSI_BREAKER_FAILURES", "5")),
+    open_seconds=float(os.getenv("MEDSSI_BREAKER_OPEN_SECONDS", "30")),
+    half_open_probes=int(os.getenv("MEDSSI_BREAKER_HALF_OPEN_PROBES", "1")),
+    retry_ratio=float(os.getenv("MEDSSI_RETRY_BUDGET_RATIO", "0.1")),
+    retry_min_per_second=float(os.getenv("MEDSSI_RETRY_MIN_PER_SECOND", "1")),
+    max_retries=int(os.getenv("MEDSSI_UPSTREAM_MAX_RETRIES", "1")),
+    hedge_percentile=float(os.getenv("MEDSSI_HEDGE_PERCENTILE", "0")),
+    hedge_min_seconds=float(os.getenv("MEDSSI_HEDGE_MIN_MS", "50")) / 1000,
+)
+UPSTREAM_COALESCE = os.getenv("MEDSSI_UPSTREAM_COALESCE", "1").strip().lower() not in {"0", "false", "no", "off"}
+upstream_flights = SingleFlight()
+upstream_telemetry = UpstreamTelemetry(
+    enabled=os.getenv("MEDSSI_UPSTREAM_METRICS", "1").strip().lower() not in {"0", "false", "no", "off"},
+)
+
+SSE_KEEPALIVE_SECONDS = float(os.getenv("MEDSSI_SSE_KEEPALIVE_SECONDS", "15"))
+result_broker = ResultBroker(max_streams=int(os.getenv("MEDSSI_SSE_MAX_STREAMS", "10000")))
+
+# Callback hosts that may resolve to internal addresses (e.g. a pharmacy
+# system on the hospital LAN); every other callbackUrl must be public.
+WEBHOOK_ALLOWED_HOSTS = frozenset(
+    host.strip().lower() for host in os.getenv("MEDSSI_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+)
+
+
+def _callback_block_reason(url: str) -> Optional[str]:
+    return callback_block_reason(url, WEBHOOK_ALLOWED_HOSTS)
+
+
+def _callback_peer_block_reason(host: str, address: str) -> Optional[str]:
+    return callback_peer_block_reason(host, address, WEBHOOK_ALLOWED_HOSTS)
+
+
+webhook_client = UpstreamClient(
+    max_size=int(os.getenv("MEDSSI_WEBHOOK_POOL_SIZE", "4")),
+    connect_timeout=float(os.getenv("MEDSSI_WEBHOOK_CONNECT_TIMEOUT", "2")),
+    read_timeout=float(os.getenv("MEDSSI_WEBHOOK_READ_TIMEOUT", "5")),
+    peer_check=_callback_peer_block_reason,
+)
+webhook_dispatcher = WebhookDispatcher(
+    webhook_client,
+    queue_size=int(os.getenv("MEDSSI_WEBHOOK_QUEUE_SIZE", "1000")),
+    batch_size=int(os.getenv("MEDSSI_WEBHOOK_BATCH_SIZE", "20")),
+    batch_wait=float(os.getenv("MEDSSI_WEBHOOK_BATCH_MS", "200")) / 1000,
+    max_attempts=int(os.getenv("MEDSSI_WEBHOOK_MAX_ATTEMPTS", "6")),
+    backoff_seconds=float(os.getenv("MEDSSI_WEBHOOK_BACKOFF_SECONDS", "1")),
+    backoff_max_seconds=float(os.getenv("MEDSSI_WEBHOOK_BACKOFF_MAX_SECONDS", "60")),
+    dead_letter_size=int(os.getenv("MEDSSI_WEBHOOK_DEAD_LETTERS", "500")),
+    secret=os.getenv("MEDSSI_WEBHOOK_SECRET") or None,
+    guard=_callback_block_reason,
+)
+
+# "inline" keeps the base64 PNG in issuance responses; "url" returns an
+# absolute {MEDSSI_PUBLIC_BASE_URL}/api/qrcode/{transactionId}/{handle}.{png,svg}
+# link rendered on first fetch.
+PUBLIC_BASE_URL = os.getenv("MEDSSI_PUBLIC_BASE_URL", "http://localhost:8000").strip().rstrip("/")
+QR_IMAGE_MODE = os.getenv("MEDSSI_QR_IMAGE_MODE", "inline").strip().lower()
+QR_IMAGE_FORMAT = os.getenv("MEDSSI_QR_IMAGE_FORMAT", "png").strip().lower()
+if QR_IMAGE_MODE not in {"inline", "url"}:
+    raise ValueError(f"Unknown MEDSSI_QR_IMAGE_MODE {QR_IMAGE_MODE!r}")
+# Defaults for every rendered QR code; the image endpoint can override them.
+QR_RENDER_DEFAULTS = qr_images.RenderOptions(
+    image_format=QR_IMAGE_FORMAT,
+    error_correction=os.getenv("MEDSSI_QR_ERROR_CORRECTION", "M").strip().upper(),
+    box_size=int(os.getenv("MEDSSI_QR_BOX_SIZE", "10")),
+    border=int(os.getenv("MEDSSI_QR_BORDER", "4")),
+).validate()
+qr_image_cache = qr_images.QRImageCache(maxsize=int(os.getenv("MEDSSI_QR_IMAGE_CACHE_SIZE", "2048")))
+qr_renderer = qr_images.QRRenderPool(
+    int(os.getenv("MEDSSI_QR_RENDER_WORKERS", "0")),
+    max_pending=int(os.environ["MEDSSI_QR_RENDER_MAX_PENDING"])
+    if os.getenv("MEDSSI_QR_RENDER_MAX_PENDING")
+    else None,
+)
+# Largest POST /v2/api/qrcode/batch accepted; results stream back as NDJSON.
+ISSUE_BATCH_MAX_ITEMS = int(os.getenv("MEDSSI_ISSUE_BATCH_MAX_ITEMS", "10000"))
+# Threads rendering a batch's QR codes; 0 (the default) uses one per CPU, and
+# never fewer than MEDSSI_QR_RENDER_WORKERS.
+ISSUE_BATCH_THREADS = int(os.getenv("MEDSSI_ISSUE_BATCH_THREADS", "0"))
+
 def _normalize_identifier_slug(value: str) -> str:
     slug = (value or "").strip().lower()
     if "_" in slug:
@@ -282,15 +448,37 @@ def _extract_token_from_request(request: Request) -> str:
     return token.strip()
 
 
-def _call_remote_api(
+def _validate_callback_url(callback_url: Optional[str]) -> Optional[str]:
+    if not callback_url:
+        return None
+    callback_url = callback_url.strip()
+    parsed = urllib.parse.urlsplit(callback_url)
+    if parsed.scheme not in {"http", "https"} or not parsed.hostname:
+        _raise_problem(
+            status=400,
+            type_="https://medssi.dev/errors/invalid-callback-url",
+            title="Invalid callback URL",
+            detail="callbackUrl must be an absolute http(s) URL.",
+        )
+    blocked = _callback_block_reason(callback_url)
+    if blocked is not None:
+        _raise_problem(
+            status=400,
+            type_="https://medssi.dev/errors/callback-url-forbidden",
+            title="Callback URL not allowed",
+            detail=f"{blocked}; list internal receivers in MEDSSI_WEBHOOK_ALLOWED_HOSTS.",
+        )
+    return callback_url
+
+
+def _remote_request(
     *,
-    method: str,
     base_url: str,
     path: str,
     token: str,
     payload: Optional[Dict[str, Any]] = None,
     params: Optional[Dict[str, Any]] = None,
-) -> Dict[str, Any]:
+) -> Tuple[str, Optional[bytes], Dict[str, str]]:
     url = base_url.rstrip("/") + path
     if params:
         encoded = urllib.parse.urlencode(
@@ -303,59 +491,199 @@ def _call_remote_api(
     if payload is not None:
         data = json.dumps(payload).encode("utf-8")
 
-    request = urllib.request.Request(url, data=data, method=method.upper())
-    request.add_header("Content-Type", "application/json")
-    request.add_header("access-token", token)
+    headers = {"Content-Type": "application/json", "access-token": token}
+    return url, data, headers
 
-    try:
-        with urllib.request.urlopen(request, timeout=15) as response:
-            body = response.read()
-            if not body:
-                return {}
-            encoding = response.headers.get_content_charset() or "utf-8"
-            text = body.decode(encoding)
-            if not text:
-                return {}
-            try:
-                return json.loads(text)
-            except json.JSONDecodeError:
-                return {"raw": text}
-    except urllib.error.HTTPError as exc:
+
+def _raise_remote_unavailable(exc: UpstreamError) -> None:
+    if isinstance(exc, CircuitOpenError):
+        _raise_problem(
+            status=503,
+            type_="https://medssi.dev/errors/remote-circuit-open",
+            title="Remote service unavailable",
+            detail=exc.reason,
+        )
+    _raise_problem(
+        status=502,
+        type_="https://medssi.dev/errors/remote-unavailable",
+        title="Remote service unavailable",
+        detail=exc.reason or "Unable to reach sandbox APIs.",
+    )
+
+
+def _decode_remote_response(response: UpstreamResponse) -> Dict[str, Any]:
+    if response.status >= 400:
         detail: Any = {
-            "code": str(exc.code),
-            "message": exc.reason or "Remote service error",
+            "code": str(response.status),
+            "message": response.reason or "Remote service error",
         }
         try:
-            payload_text = exc.read().decode("utf-8")
+            payload_text = response.body.decode("utf-8")
             if payload_text:
                 detail = json.loads(payload_text)
         except (ValueError, json.JSONDecodeError, UnicodeDecodeError):
             detail = {
-                "code": str(exc.code),
-                "message": exc.reason or "Remote service error",
+                "code": str(response.status),
+                "message": response.reason or "Remote service error",
             }
-        raise HTTPException(status_code=exc.code or 502, detail=detail) from None
-    except urllib.error.URLError as exc:
-        _raise_problem(
-            status=502,
-            type_="https://medssi.dev/errors/remote-unavailable",
-            title="Remote service unavailable",
-            detail=str(exc.reason) if exc.reason else "Unable to reach sandbox APIs.",
+        raise HTTPException(status_code=response.status or 502, detail=detail)
+
+    body = response.body
+    if not body:
+        return {}
+    encoding = response.charset or "utf-8"
+    text = body.decode(encoding)
+    if not text:
+        return {}
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return {"raw": text}
+
+
+def _remote_flight_key(
+    method: str, url: str, data: Optional[bytes], headers: Dict[str, str]
+) -> Optional[Tuple[Any, ...]]:
+    """Key under which identical concurrent upstream calls share one flight.
+
+    The access token is part of the headers, so callers holding different
+    tokens never see each other's responses.
+    """
+
+    if not UPSTREAM_COALESCE:
+        return None
+    return (method.upper(), url, data, tuple(sorted(headers.items())))
+
+
+def _remote_operation(path: str) -> str:
+    """Logical operation label for an upstream path, used in latency metrics."""
+
+    if path.startswith("/api/qrcode/"):
+        return "issue"
+    if "/credential/nonce/" in path:
+        return "nonce"
+    if path.startswith("/api/credential/"):
+        return "credential-action"
+    if path.startswith("/api/oidvp/qrcode"):
+        return "oidvp-qrcode"
+    if path.startswith("/api/oidvp/result"):
+        return "oidvp-result"
+    return "other"
+
+
+def _call_remote_api(
+    *,
+    method: str,
+    base_url: str,
+    path: str,
+    token: str,
+    payload: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    url, data, headers = _remote_request(
+        base_url=base_url, path=path, token=token, payload=payload, params=params
+    )
+    guard = upstream_guards.for_url(url)
+    key = _remote_flight_key(method, url, data, headers)
+
+    def send() -> UpstreamResponse:
+        return guard.call(
+            lambda: upstream_transport.request(method, url, body=data, headers=headers),
+            idempotent=method.upper() == "GET",
         )
 
+    operation = _remote_operation(path)
+    started = time.perf_counter()
+    try:
+        response = send() if key is None else upstream_flights.do(key, send)
+    except UpstreamError as exc:
+        upstream_telemetry.observe(base_url, operation, time.perf_counter() - started, error=exc.kind)
+        _raise_remote_unavailable(exc)
+    upstream_telemetry.observe(base_url, operation, time.perf_counter() - started, status=response.status)
+    return _decode_remote_response(response)
+
+
+async def _call_remote_api_async(
+    *,
+    method: str,
+    base_url: str,
+    path: str,
+    token: str,
+    payload: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Awaitable ``_call_remote_api`` for async routes; same errors and decoding."""
+
+    url, data, headers = _remote_request(
+        base_url=base_url, path=path, token=token, payload=payload, params=params
+    )
+    guard = upstream_guards.for_url(url)
+    key = _remote_flight_key(method, url, data, headers)
+
+    def send() -> Awaitable[UpstreamResponse]:
+        return guard.call_async(
+            lambda: async_upstream_transport.request(method, url, body=data, headers=headers),
+            idempotent=method.upper() == "GET",
+        )
+
+    operation = _remote_operation(path)
+    started = time.perf_counter()
+    try:
+        response = await (send() if key is None else upstream_flights.do_async(key, send))
+    except UpstreamError as exc:
+        upstream_telemetry.observe(base_url, operation, time.perf_counter() - started, error=exc.kind)
+        _raise_remote_unavailable(exc)
+    upstream_telemetry.observe(base_url, operation, time.perf_counter() - started, status=response.status)
+    return _decode_remote_response(response)
+
+
+REMOTE_NONCE_PATHS = (
+    "/v2/api/credential/nonce/{transaction_id}",
+    "/api/credential/nonce/{transaction_id}",
+)
+NONCE_CACHE_TTL_SECONDS = float(os.getenv("MEDSSI_NONCE_CACHE_TTL", "5"))
+NONCE_NEGATIVE_TTL_SECONDS = float(os.getenv("MEDSSI_NONCE_NEGATIVE_TTL", "2"))
+NONCE_CACHE_SIZE = int(os.getenv("MEDSSI_NONCE_CACHE_SIZE", "1024"))
+
+# (issuer base, transactionId, token) -> (status, body). 404s are cached for
+# a shorter time so a freshly created upstream offer shows up quickly.
+remote_nonce_cache: TTLCache[Tuple[int, Any]] = TTLCache(
+    NONCE_CACHE_SIZE, NONCE_CACHE_TTL_SECONDS
+)
+# Issuer base -> index into REMOTE_NONCE_PATHS of the variant that answered.
+remote_nonce_paths: TTLCache[int] = TTLCache(64, 3600)
+remote_nonce_stats = {"negative_hits": 0, "upstream_calls": 0}
+# Nonce routes run on the threadpool, so the counters need their own lock.
+remote_nonce_stats_lock = threading.Lock()
+
+
+def _count_remote_nonce(stat: str) -> None:
+    with remote_nonce_stats_lock:
+        remote_nonce_stats[stat] += 1
+
 
 def _fetch_remote_nonce(transaction_id: str, token: str) -> Dict[str, Any]:
-    paths = [
-        f"/v2/api/credential/nonce/{transaction_id}",
-        f"/api/credential/nonce/{transaction_id}",
-    ]
+    cache_key = (GOV_ISSUER_BASE, transaction_id, token)
+    cached = remote_nonce_cache.get(cache_key)
+    if cached is not None:
+        status, body = cached
+        if status == 404:
+            _count_remote_nonce("negative_hits")
+            raise HTTPException(status_code=404, detail=copy.deepcopy(body))
+        return copy.deepcopy(body)
+
+    # Once a path variant has answered for this base, a 404 from it means the
+    # transaction is unknown rather than the route missing, so skip the other.
+    preferred = remote_nonce_paths.get(GOV_ISSUER_BASE)
+    candidates = [preferred] if preferred is not None else range(len(REMOTE_NONCE_PATHS))
     last_exc: Optional[HTTPException] = None
-    for path in paths:
+    for index in candidates:
+        _count_remote_nonce("upstream_calls")
         try:
-            return _call_remote_api(
+            payload = _call_remote_api(
                 method="GET",
                 base_url=GOV_ISSUER_BASE,
-                path=path,
+                path=REMOTE_NONCE_PATHS[index].format(transaction_id=transaction_id),
                 token=token,
             )
         except HTTPException as exc:
@@ -363,11 +691,28 @@ def _fetch_remote_nonce(transaction_id: str, token: str) -> Dict[str, Any]:
                 last_exc = exc
                 continue
             raise
+        remote_nonce_paths.put(GOV_ISSUER_BASE, index)
+        remote_nonce_cache.put(cache_key, (200, payload))
+        return copy.deepcopy(payload)
     if last_exc:
+        remote_nonce_cache.put(cache_key, (404, last_exc.detail), NONCE_NEGATIVE_TTL_SECONDS)
         raise last_exc
     return {}
 
 
+def _remote_nonce_metrics() -> Dict[str, Any]:
+    preferred = remote_nonce_paths.peek(GOV_ISSUER_BASE)
+    with remote_nonce_stats_lock:
+        stats = dict(remote_nonce_stats)
+    return {
+        **remote_nonce_cache.metrics(),
+        **stats,
+        "negative_ttl_seconds": NONCE_NEGATIVE_TTL_SECONDS,
+        "discovered_path": REMOTE_NONCE_PATHS[preferred] if preferred is not None else None,
+        "path_cache": remote_nonce_paths.metrics(),
+    }
+
+
 def _resolve_verifier_ref(
     scope: Optional[DisclosureScope], ref: Optional[str]
 ) -> str:
@@ -424,12 +769,11 @@ def _build_moda_field_entries(request: MODAIssuanceRequest) -> List[Dict[str, st
             continue
         provided[canonical] = field.content or ""
 
-    sample_values = MODA_SAMPLE_FIELD_VALUES.get(vc_slug, {})
+    template = issuance_templates.current().get(vc_slug)
+    sample_values = template.sample_values
     merged = {**sample_values, **provided}
 
-    required_order = MODA_VC_FIELD_KEYS.get(vc_slug)
-    if not required_order:
-        required_order = list(sample_values.keys()) or list(merged.keys())
+    required_order = template.field_order or list(merged.keys())
 
     ordered_keys: List[str] = []
     for key in required_order:
@@ -502,7 +846,7 @@ def _prepare_moda_remote_payload(raw_payload: Dict[str, Any]) -> Dict[str, Any]:
     cleaned: Dict[str, Any] = {}
     field_slug = _normalize_vc_uid(payload.get("vcUid"))
     required_fields = MODA_VC_FIELD_KEYS.get(field_slug, []) or []
-    sample_values = MODA_SAMPLE_FIELD_VALUES.get(field_slug, {})
+    sample_values = issuance_templates.current().get(field_slug).sample_values
 
     for key, value in payload.items():
         if value is None:
@@ -675,7 +1019,10 @@ def require_any_sandbox_token(
 
 @app.middleware("http")
 async def cleanup_expired_middleware(request, call_next):
-    store.cleanup_expired()
+    # Expiry normally runs in the lifespan-managed reaper task; inline mode
+    # keeps per-request cleanup for test clients that never start the lifespan.
+    if reaper.mode == "inline":
+        reaper.run_once()
     response = await call_next(request)
     return response
 
@@ -813,6 +1160,7 @@ class OIDVPSessionRequest(BaseModel):
     valid_minutes: int = Field(5, ge=1, le=10, alias="validMinutes")
     transaction_id: Optional[str] = Field(None, alias="transactionId")
     ref: Optional[str] = Field(None, alias="ref")
+    callback_url: Optional[str] = Field(None, alias="callbackUrl")
 
     class Config:
         allow_population_by_field_name = True
@@ -898,14 +1246,47 @@ def _build_qr_payload(
 
 
 def _make_qr_data_uri(payload: str) -> str:
-    if qrcode is not None:
-        buffer = io.BytesIO()
-        image = qrcode.make(payload)
-        image.save(buffer, format="PNG")
-        encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
-        return f"data:image/png;base64,{encoded}"
-    encoded = base64.b64encode(payload.encode("utf-8")).decode("ascii")
-    return f"data:text/plain;base64,{encoded}"
+    return qr_images.data_uri(payload, QR_RENDER_DEFAULTS._replace(image_format="png"), qr_renderer.render)
+
+
+def _qr_image_url(offer: CredentialOffer, image_format: str) -> str:
+    transaction_id = urllib.parse.quote(offer.transaction_id, safe="")
+    handle = qr_images.link_handle(offer.qr_token)
+    return f"{PUBLIC_BASE_URL}/api/qrcode/{transaction_id}/{handle}.{image_format}"
+
+
+def _issue_qr_code(offer: CredentialOffer, qr_payload: str) -> str:
+    if QR_IMAGE_MODE == "url":
+        return _qr_image_url(offer, QR_IMAGE_FORMAT)
+    prerendered = qr_image_cache.peek(offer.transaction_id, QR_RENDER_DEFAULTS._replace(image_format="png"))
+    if prerendered is not None:
+        return f"data:image/png;base64,{base64.b64encode(prerendered).decode('ascii')}"
+    return _make_qr_data_uri(qr_payload)
+
+
+def _build_prefab_offer() -> PrefabOffer:
+    transaction_id = str(uuid.uuid4())
+    qr_token = secrets.token_urlsafe(24)
+    qr_payload = _build_qr_payload(qr_token, "credential", transaction_id=transaction_id)
+    options = QR_RENDER_DEFAULTS if QR_IMAGE_MODE == "url" else QR_RENDER_DEFAULTS._replace(image_format="png")
+    image = qr_renderer.render(qr_payload, options) if qr_images.can_render(options.image_format) else None
+    return PrefabOffer(
+        transaction_id=transaction_id,
+        qr_token=qr_token,
+        nonce=secrets.token_urlsafe(16),
+        qr_payload=qr_payload,
+        image_options=options,
+        image=image,
+    )
+
+
+# Pre-built credential offer identifiers and QR images for issuance bursts;
+# size 0 (the default) builds everything on the request thread.
+offer_pool = OfferPool(
+    _build_prefab_offer,
+    size=int(os.getenv("MEDSSI_OFFER_POOL_SIZE", "0")),
+    refill_per_second=float(os.getenv("MEDSSI_OFFER_POOL_REFILL_PER_SECOND", "50")),
+)
 
 
 def _normalize_vc_uid(vc_uid: str) -> str:
@@ -1041,39 +1422,40 @@ MODA_FIELD_LOWER_ALIASES = {
 }
 
 
-MODA_SAMPLE_FIELD_VALUES = {
-    "vc_cons": {
-        "cons_scope": "MEDSSI01",
-        "cons_purpose": "MEDDATARESEARCH",
-        "cons_end": (date.today() + timedelta(days=180)).isoformat(),
-        "cons_path": "IRB2025001",
-    },
-    "vc_cond": {
-        "cond_code": "K2970",
-        "cond_display": "CHRONICGASTRITIS",
-        "cond_onset": "2025-02-12",
-    },
-    "vc_algy": {
-        "algy_code": "ALG001",
-        "algy_name": "PENICILLIN",
-        "algy_severity": "2",
-    },
-    "vc_rx": {
-        "med_code": "A02BC05",
-        "med_name": "OMEPRAZOLE",
-        "does_text": "BID 10ML",
-        "qty_value": "30",
-        "qty_unit": "TABLET",
-    },
-    "vc_pid": {
-        "pid_hash": "12345678",
-        "pid_type": "01",
-        "pid_ver": "01",
-        "pid_issuer": "886",
-        "pid_valid_to": (date.today() + timedelta(days=3650)).isoformat(),
-        "wallet_id": "10000001",
-    },
-}
+def _moda_sample_field_values(today: date) -> Dict[str, Dict[str, str]]:
+    return {
+        "vc_cons": {
+            "cons_scope": "MEDSSI01",
+            "cons_purpose": "MEDDATARESEARCH",
+            "cons_end": (today + timedelta(days=180)).isoformat(),
+            "cons_path": "IRB2025001",
+        },
+        "vc_cond": {
+            "cond_code": "K2970",
+            "cond_display": "CHRONICGASTRITIS",
+            "cond_onset": "2025-02-12",
+        },
+        "vc_algy": {
+            "algy_code": "ALG001",
+            "algy_name": "PENICILLIN",
+            "algy_severity": "2",
+        },
+        "vc_rx": {
+            "med_code": "A02BC05",
+            "med_name": "OMEPRAZOLE",
+            "does_text": "BID 10ML",
+            "qty_value": "30",
+            "qty_unit": "TABLET",
+        },
+        "vc_pid": {
+            "pid_hash": "12345678",
+            "pid_type": "01",
+            "pid_ver": "01",
+            "pid_issuer": "886",
+            "pid_valid_to": (today + timedelta(days=3650)).isoformat(),
+            "wallet_id": "10000001",
+        },
+    }
 
 
 CAMEL_TO_SNAKE = re.compile(r"(?<!^)(?=[A-Z])")
@@ -1201,13 +1583,11 @@ def _resolve_policies(
     if policies:
         _ensure_valid_policies(policies)
         return policies
-    defaults = _default_disclosure_policies()
-    _ensure_valid_policies(defaults)
-    return defaults
+    return issuance_templates.current().default_policies
 
 
-def _sample_payload() -> CredentialPayload:
-    today = date.today()
+def _sample_payload(today: Optional[date] = None) -> CredentialPayload:
+    today = today or date.today()
     sample_dict: Dict[str, Any] = {
         "fhir_profile": "https://profiles.iisigroup.com.tw/StructureDefinition/medssi-bundle",
         "condition": {
@@ -1502,25 +1882,96 @@ def _expand_aliases(alias_map: Dict[str, str]) -> Dict[str, str]:
     return expanded
 
 
+def _apply_payload_overrides(
+    sample: CredentialPayload, sample_fields: Dict[str, Any], overrides: Optional[Dict[str, Any]]
+) -> CredentialPayload:
+    """Deep-merge ``overrides`` into the sample payload, copy-on-write.
+
+    Same result as validating ``_deep_merge(sample.dict(), overrides)`` (and
+    falling back to the sample when that fails), but only the top-level
+    fields named in ``overrides`` are copied and re-validated; the others
+    stay shared with ``sample``.
+    """
+
+    if not overrides:
+        return sample
+    merged = _deep_merge(dict(sample_fields), overrides)
+    updates: Dict[str, Any] = {}
+    for name, value in overrides.items():
+        field = CredentialPayload.__fields__.get(name)
+        if field is None or value is None:
+            continue
+        validated, errors = field.validate(merged[name], {}, loc=name, cls=CredentialPayload)
+        if errors:
+            return sample
+        updates[name] = validated
+    return sample.copy(update=updates)
+
+
 def _coerce_payload(
     payload: Optional[Union[CredentialPayload, Dict[str, Any]]]
 ) -> CredentialPayload:
     if isinstance(payload, CredentialPayload):
         return payload
-    sample = _sample_payload()
-    if payload is None:
-        return sample
-    if isinstance(payload, dict):
-        base = sample.dict()
-        merged = _deep_merge(base, payload)
-        try:
-            return CredentialPayload.parse_obj(merged)
-        except ValidationError:
-            return sample
+    templates = issuance_templates.current()
+    if payload is None or isinstance(payload, dict):
+        return _apply_payload_overrides(templates.sample, templates.sample_fields, payload)
     try:
         return CredentialPayload.parse_obj(payload)
     except ValidationError:
-        return sample
+        return templates.sample
+
+
+def _moda_disclosure_policies(scope: DisclosureScope, fields: List[str]) -> List[DisclosurePolicy]:
+    return [
+        DisclosurePolicy(
+            scope=scope,
+            fields=fields,
+            description="MODA 沙盒欄位設定",
+        )
+    ]
+
+
+def _build_issuance_templates(today: date) -> TemplateSet:
+    sample = _sample_payload(today)
+    sample_fields = sample.dict()
+    default_policies = _default_disclosure_policies()
+    _ensure_valid_policies(default_policies)
+    samples = _moda_sample_field_values(today)
+
+    def build(slug: str) -> VCTemplate:
+        scope = MODA_VC_SCOPE_MAP.get(slug, DisclosureScope.MEDICAL_RECORD)
+        sample_values = samples.get(slug, {})
+        policy_fields = (
+            list(sample_values)
+            or MODA_VC_FIELD_KEYS.get(slug)
+            or MODA_SCOPE_DEFAULT_FIELDS.get(scope, ["cond_code"])
+        )
+        return VCTemplate(
+            slug=slug,
+            scope=scope,
+            sample_values=sample_values,
+            field_order=MODA_VC_FIELD_KEYS.get(slug) or list(sample_values),
+            policy_fields=policy_fields,
+            policies=_moda_disclosure_policies(scope, policy_fields),
+            payload=_apply_payload_overrides(
+                sample, sample_fields, _payload_overrides_from_alias(sample_values)
+            ),
+        )
+
+    return TemplateSet(
+        day=today,
+        sample=sample,
+        sample_fields=sample_fields,
+        default_policies=default_policies,
+        templates={slug: build(slug) for slug in MODA_VC_SCOPE_MAP},
+        fallback=build(""),
+    )
+
+
+# Validated sample payload, default policies and per-VC defaults, built once
+# per day instead of on every issuance.
+issuance_templates = TemplateRegistry(_build_issuance_templates)
 
 
 def _issue_offer(
@@ -1538,7 +1989,11 @@ def _issue_offer(
     transaction_id: Optional[str] = None,
     selected_disclosures: Optional[Dict[str, str]] = None,
     external_fields: Optional[Dict[str, str]] = None,
+    persist: bool = True,
 ) -> Tuple[CredentialOffer, str]:
+    # A caller-chosen transactionId is part of the deep link, so only offers
+    # with a generated one can use pre-built identifiers.
+    prefab = offer_pool.take() if transaction_id is None else None
     offer = _create_offer(
         issuer_id=issuer_id,
         primary_scope=primary_scope,
@@ -1550,14 +2005,28 @@ def _issue_offer(
         holder_hint=holder_hint,
         payload=payload,
         payload_template=payload_template,
-        transaction_id=transaction_id,
+        transaction_id=prefab.transaction_id if prefab else transaction_id,
         selected_disclosures=selected_disclosures,
         external_fields=external_fields,
+        qr_token=prefab.qr_token if prefab else None,
+        nonce=prefab.nonce if prefab else None,
+        persist=persist,
     )
-    qr_payload = _build_qr_payload(
-        offer.qr_token, "credential", transaction_id=offer.transaction_id
-    )
-    return offer, qr_payload
+    if prefab is None:
+        qr_payload = _build_qr_payload(
+            offer.qr_token, "credential", transaction_id=offer.transaction_id
+        )
+        return offer, qr_payload
+
+    if prefab.image is not None:
+        qr_image_cache.put(
+            offer.transaction_id,
+            prefab.image_options,
+            prefab.qr_payload,
+            prefab.image,
+            (offer.expires_at - offer.created_at).total_seconds(),
+        )
+    return offer, prefab.qr_payload
 
 
 def _create_offer(
@@ -1575,12 +2044,15 @@ def _create_offer(
     transaction_id: Optional[str] = None,
     selected_disclosures: Optional[Dict[str, str]] = None,
     external_fields: Optional[Dict[str, str]] = None,
+    qr_token: Optional[str] = None,
+    nonce: Optional[str] = None,
+    persist: bool = True,
 ) -> CredentialOffer:
     now = datetime.utcnow()
     credential_id = f"cred-{uuid.uuid4().hex}"
     transaction_id = transaction_id or str(uuid.uuid4())
-    nonce = secrets.token_urlsafe(16)
-    qr_token = secrets.token_urlsafe(24)
+    nonce = nonce or secrets.token_urlsafe(16)
+    qr_token = qr_token or secrets.token_urlsafe(24)
 
     offer = CredentialOffer(
         credential_id=credential_id,
@@ -1603,7 +2075,8 @@ def _create_offer(
         selected_disclosures=selected_disclosures or {},
         external_fields=external_fields or {},
     )
-    store.persist_credential(offer)
+    if persist:
+        store.persist_credential(offer)
     return offer
 
 
@@ -1706,7 +2179,7 @@ def _touch_retention(offer: CredentialOffer) -> None:
 
 
 def _issue_from_data_request(
-    request: IssuanceWithDataRequest,
+    request: IssuanceWithDataRequest, *, persist: bool = True
 ) -> Tuple[CredentialOffer, str]:
     policies = _resolve_policies(request.disclosure_policies)
     payload = _coerce_payload(request.payload)
@@ -1722,6 +2195,7 @@ def _issue_from_data_request(
         holder_hint=request.holder_hint,
         payload=payload,
         transaction_id=request.transaction_id,
+        persist=persist,
     )
 
 
@@ -1749,14 +2223,13 @@ def _issue_from_template_request(
     )
 
 
-def _scope_for_moda_vc(vc_uid: str) -> DisclosureScope:
-    slug = _normalize_vc_uid(vc_uid)
-    return MODA_VC_SCOPE_MAP.get(slug, DisclosureScope.MEDICAL_RECORD)
-
-
-def _issue_from_moda_request(request: MODAIssuanceRequest) -> Tuple[CredentialOffer, str]:
-    scope = _scope_for_moda_vc(request.vc_uid)
+def _issue_from_moda_request(
+    request: MODAIssuanceRequest, *, persist: bool = True
+) -> Tuple[CredentialOffer, str]:
     vc_slug = _normalize_vc_uid(request.vc_uid)
+    templates = issuance_templates.current()
+    template = templates.get(vc_slug)
+    scope = template.scope
     ial = request.ial or IdentityAssuranceLevel.NHI_CARD_PIN
     holder_did = request.holder_did or "did:example:patient-demo"
     issuer_id = request.issuer_id or DEFAULT_ISSUER_ID
@@ -1773,30 +2246,28 @@ def _issue_from_moda_request(request: MODAIssuanceRequest) -> Tuple[CredentialOf
         if not key:
             continue
         canonical_fields[key] = field.content or ""
-    alias_map = _expand_aliases(canonical_fields)
 
-    sample_values = MODA_SAMPLE_FIELD_VALUES.get(vc_slug, {})
-    alias_map = {**sample_values, **alias_map}
-    raw_fields = {**sample_values, **raw_fields}
-
-    policy_fields = list(
-        dict.fromkeys(list(raw_fields.keys()) + list(alias_map.keys()))
-    )
-    if not policy_fields:
-        policy_fields = MODA_VC_FIELD_KEYS.get(vc_slug) or MODA_SCOPE_DEFAULT_FIELDS.get(
-            scope, ["cond_code"]
+    sample_values = template.sample_values
+    if raw_fields:
+        alias_map = {**sample_values, **_expand_aliases(canonical_fields)}
+        raw_fields = {**sample_values, **raw_fields}
+        policy_fields = (
+            list(dict.fromkeys(list(raw_fields.keys()) + list(alias_map.keys())))
+            or template.policy_fields
         )
-
-    payload_overrides = _payload_overrides_from_alias(alias_map)
-    payload = _coerce_payload(payload_overrides)
-
-    policies = [
-        DisclosurePolicy(
-            scope=scope,
-            fields=policy_fields,
-            description="MODA 沙盒欄位設定",
+        policies = (
+            template.policies
+            if policy_fields == template.policy_fields
+            else _moda_disclosure_policies(scope, policy_fields)
         )
-    ]
+        payload = _apply_payload_overrides(
+            templates.sample, templates.sample_fields, _payload_overrides_from_alias(alias_map)
+        )
+    else:
+        # Nothing to override: the template already holds the result.
+        alias_map = dict(sample_values)
+        policies = template.policies
+        payload = template.payload
 
     return _issue_offer(
         issuer_id=issuer_id,
@@ -1811,6 +2282,7 @@ def _issue_from_moda_request(request: MODAIssuanceRequest) -> Tuple[CredentialOf
         transaction_id=request.transaction_id,
         selected_disclosures=alias_map,
         external_fields={**sample_values, **raw_fields, **alias_map},
+        persist=persist,
     )
 
 
@@ -1827,15 +2299,27 @@ def _normalize_scope_entries(raw_policies: Any) -> Any:
     return raw_policies
 
 
+def _parse_issue_with_data(
+    payload: Dict[str, Any]
+) -> Union[IssuanceWithDataRequest, MODAIssuanceRequest]:
+    if "disclosurePolicies" in payload:
+        payload["disclosurePolicies"] = _normalize_scope_entries(payload["disclosurePolicies"])
+    if "vcUid" in payload:
+        return MODAIssuanceRequest.parse_obj(payload)
+    return IssuanceWithDataRequest.parse_obj(payload)
+
+
+def _issue_parsed(
+    request: Union[IssuanceWithDataRequest, MODAIssuanceRequest], *, persist: bool = True
+) -> Tuple[CredentialOffer, str]:
+    if isinstance(request, MODAIssuanceRequest):
+        return _issue_from_moda_request(request, persist=persist)
+    return _issue_from_data_request(request, persist=persist)
+
+
 def _issue_with_data_from_payload(payload: Dict[str, Any]) -> Tuple[CredentialOffer, str]:
     try:
-        if "disclosurePolicies" in payload:
-            payload["disclosurePolicies"] = _normalize_scope_entries(payload["disclosurePolicies"])
-        if "vcUid" in payload:
-            moda_request = MODAIssuanceRequest.parse_obj(payload)
-            return _issue_from_moda_request(moda_request)
-        request = IssuanceWithDataRequest.parse_obj(payload)
-        return _issue_from_data_request(request)
+        return _issue_parsed(_parse_issue_with_data(payload))
     except ValidationError as exc:
         raise HTTPException(status_code=400, detail=json.loads(exc.json())) from exc
 
@@ -1856,7 +2340,7 @@ def _issue_template_from_payload(payload: Dict[str, Any]) -> Tuple[CredentialOff
 def _build_issue_response(offer: CredentialOffer, qr_payload: str) -> GovIssueResponse:
     return GovIssueResponse(
         transaction_id=offer.transaction_id,
-        qr_code=_make_qr_data_uri(qr_payload),
+        qr_code=_issue_qr_code(offer, qr_payload),
         qr_payload=qr_payload,
         deep_link=qr_payload,
         credential_id=offer.credential_id,
@@ -1905,6 +2389,97 @@ def create_qr_without_data(request: IssuanceWithoutDataRequest) -> QRCodeRespons
     return QRCodeResponse(credential=offer, qr_payload=qr_payload)
 
 
+BatchEntry = Union[Dict[str, Any], Tuple[CredentialOffer, str]]
+
+
+def _prepare_issue_batch(items: List[Dict[str, Any]]) -> List[BatchEntry]:
+    """Validate and build every offer of a batch, then persist them together.
+
+    Each entry is either ``(offer, qr_payload)`` or the ``status``/``error``
+    an item failed with; one bad item does not fail the batch.
+    """
+
+    entries: List[Any] = []
+    for item in items:
+        try:
+            entries.append(_parse_issue_with_data(item))
+        except ValidationError as exc:
+            entries.append({"status": 400, "error": json.loads(exc.json())})
+
+    offers: List[CredentialOffer] = []
+    for position, entry in enumerate(entries):
+        if isinstance(entry, dict):
+            continue
+        try:
+            offer, qr_payload = _issue_parsed(entry, persist=False)
+        except HTTPException as exc:
+            entries[position] = {"status": exc.status_code, "error": exc.detail}
+            continue
+        entries[position] = (offer, qr_payload)
+        offers.append(offer)
+    if offers:
+        with store.batch():
+            store.persist_credentials(offers)
+    return entries
+
+
+def _batch_line(index: int, entry: Union[Dict[str, Any], "Future[GovIssueResponse]"]) -> str:
+    if isinstance(entry, dict):
+        return json.dumps({"index": index, **entry}) + "\n"
+    return f'{{"index": {index}, "status": 201, "result": {entry.result().json(by_alias=True)}}}\n'
+
+
+def _batch_issue_lines(entries: List[BatchEntry]) -> Iterator[str]:
+    """Yield one NDJSON line per batch item in request order, then a summary.
+
+    QR codes render in parallel on ``ISSUE_BATCH_THREADS`` threads (which
+    hand them to ``qr_renderer`` worker processes when those are enabled),
+    at most a small window ahead of the line being written, so a large
+    batch never sits in memory as rendered responses.
+    """
+
+    failed = sum(1 for entry in entries if isinstance(entry, dict))
+    configured = ISSUE_BATCH_THREADS or os.cpu_count() or 1
+    threads = max(min(len(entries), max(configured, qr_renderer.workers)), 1)
+    window: Deque[Tuple[int, Any]] = deque()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="qr-batch") as executor:
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                entry = executor.submit(_build_issue_response, *entry)
+            window.append((index, entry))
+            if len(window) > threads * 4:
+                yield _batch_line(*window.popleft())
+        while window:
+            yield _batch_line(*window.popleft())
+    summary = {"items": len(entries), "issued": len(entries) - failed, "failed": failed}
+    yield json.dumps({"summary": summary}) + "\n"
+
+
+@api_v2.post(
+    "/api/qrcode/batch",
+    response_class=StreamingResponse,
+    dependencies=[Depends(require_issuer_token)],
+)
+def create_qr_batch(items: List[Dict[str, Any]] = Body(..., embed=True)) -> StreamingResponse:
+    """Issue many ``/api/qrcode/data`` bodies (plain or MODA ``vcUid``) at once.
+
+    Streams ``application/x-ndjson``: one line per item with its index and
+    either the issuance result (as ``POST /api/qrcode/data`` on the
+    sandbox returns it) or the problem that item failed with, followed by
+    a ``summary`` line.
+    """
+
+    if len(items) > ISSUE_BATCH_MAX_ITEMS:
+        _raise_problem(
+            status=413,
+            type_="https://medssi.dev/errors/batch-too-large",
+            title="Issuance batch too large",
+            detail=f"A batch holds at most {ISSUE_BATCH_MAX_ITEMS} items; got {len(items)}.",
+        )
+    entries = _prepare_issue_batch(items)
+    return StreamingResponse(_batch_issue_lines(entries), media_type="application/x-ndjson")
+
+
 api_public = APIRouter(prefix="/api", tags=["MODA Sandbox compatibility"])
 
 
@@ -1914,12 +2489,12 @@ api_public = APIRouter(prefix="/api", tags=["MODA Sandbox compatibility"])
     status_code=201,
     dependencies=[Depends(require_issuer_token)],
 )
-def gov_issue_with_data(
+async def gov_issue_with_data(
     request: Request, payload: Dict[str, Any] = Body(...)
 ) -> Dict[str, Any]:
     token = _extract_token_from_request(request)
     normalized = _prepare_moda_remote_payload(payload)
-    return _call_remote_api(
+    return await _call_remote_api_async(
         method="POST",
         base_url=GOV_ISSUER_BASE,
         path="/api/qrcode/data",
@@ -1934,12 +2509,12 @@ def gov_issue_with_data(
     status_code=201,
     dependencies=[Depends(require_issuer_token)],
 )
-def gov_issue_medical_card(
+async def gov_issue_medical_card(
     request: Request, payload: Dict[str, Any] = Body(...)
 ) -> Dict[str, Any]:
     token = _extract_token_from_request(request)
     normalized = _prepare_moda_remote_payload(payload)
-    return _call_remote_api(
+    return await _call_remote_api_async(
         method="POST",
         base_url=GOV_ISSUER_BASE,
         path="/api/qrcode/data",
@@ -1954,12 +2529,12 @@ def gov_issue_medical_card(
     status_code=201,
     dependencies=[Depends(require_issuer_token)],
 )
-def gov_issue_without_data(
+async def gov_issue_without_data(
     request: Request, payload: Dict[str, Any] = Body(...)
 ) -> Dict[str, Any]:
     token = _extract_token_from_request(request)
     normalized = _prepare_moda_remote_payload(payload)
-    return _call_remote_api(
+    return await _call_remote_api_async(
         method="POST",
         base_url=GOV_ISSUER_BASE,
         path="/api/qrcode/nodata",
@@ -1968,14 +2543,96 @@ def gov_issue_without_data(
     )
 
 
+@api_public.get(
+    "/qrcode/{transaction_id}/{handle}.{image_format}",
+    response_class=Response,
+    responses={200: {"content": {media_type: {} for media_type in qr_images.MEDIA_TYPES.values()}}},
+)
+def get_issue_qr_image(
+    transaction_id: str,
+    handle: str,
+    image_format: str,
+    error_correction: Optional[str] = Query(None, alias="ec"),
+    box_size: Optional[int] = Query(None, alias="box"),
+    border: Optional[int] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """QR image for a local offer, rendered on first fetch and cached until it expires.
+
+    ``.json`` returns the raw module matrix. ``ec`` (L/M/Q/H), ``box`` and
+    ``border`` override the configured rendering defaults. Image tags
+    cannot send a Bearer token, so ``handle`` (derived from the offer's
+    secret ``qr_token``, see ``qr.link_handle``) is what authorizes the
+    fetch; transaction IDs alone are not secret. A wrong handle answers
+    the same 404 as an unknown offer.
+    """
+
+    if image_format not in qr_images.MEDIA_TYPES:
+        _raise_problem(
+            status=404,
+            type_="https://medssi.dev/errors/qr-format-unsupported",
+            title="QR image format not supported",
+            detail="Request a .png, .svg or .json QR image.",
+        )
+    try:
+        options = QR_RENDER_DEFAULTS._replace(
+            image_format=image_format,
+            error_correction=(error_correction or QR_RENDER_DEFAULTS.error_correction).upper(),
+            box_size=QR_RENDER_DEFAULTS.box_size if box_size is None else box_size,
+            border=QR_RENDER_DEFAULTS.border if border is None else border,
+        ).validate()
+    except ValueError as exc:
+        _raise_problem(
+            status=400,
+            type_="https://medssi.dev/errors/qr-options-invalid",
+            title="Invalid QR rendering options",
+            detail=str(exc),
+        )
+    now = datetime.utcnow()
+    offer = store.get_credential_by_transaction(transaction_id)
+    if offer is not None and offer.is_active(now):
+        authorized = secrets.compare_digest(handle, qr_images.link_handle(offer.qr_token))
+    else:
+        qr_image_cache.evict(transaction_id)
+        authorized = False
+    if not authorized:
+        _raise_problem(
+            status=404,
+            type_="https://medssi.dev/errors/qr-offer-not-found",
+            title="Credential offer not found",
+            detail="The offer for this QR code does not exist or has expired.",
+        )
+
+    payload = _build_qr_payload(offer.qr_token, "credential", transaction_id=offer.transaction_id)
+    remaining = max((offer.expires_at - now).total_seconds(), 0.0)
+    etag = qr_images.QRImageCache.etag(payload, options)
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(remaining)}"}
+    if if_none_match and (
+        if_none_match.strip() == "*" or etag in {tag.strip() for tag in if_none_match.split(",")}
+    ):
+        return Response(status_code=304, headers=headers)
+    try:
+        etag, body = qr_image_cache.get_or_render(
+            transaction_id, payload, options, remaining, renderer=qr_renderer.render
+        )
+    except qr_images.QRUnavailable as exc:
+        _raise_problem(
+            status=501,
+            type_="https://medssi.dev/errors/qr-renderer-unavailable",
+            title="QR renderer unavailable",
+            detail=str(exc),
+        )
+    return Response(body, media_type=qr_images.MEDIA_TYPES[image_format], headers=headers)
+
+
 @api_public.get(
     "/credential/nonce/{transaction_id}",
     response_model=Dict[str, Any],
     dependencies=[Depends(require_issuer_token)],
 )
-def gov_get_nonce(transaction_id: str, request: Request) -> Dict[str, Any]:
+async def gov_get_nonce(transaction_id: str, request: Request) -> Dict[str, Any]:
     token = _extract_token_from_request(request)
-    return _call_remote_api(
+    return await _call_remote_api_async(
         method="GET",
         base_url=GOV_ISSUER_BASE,
         path=f"/api/credential/nonce/{transaction_id}",
@@ -1988,10 +2645,10 @@ def gov_get_nonce(transaction_id: str, request: Request) -> Dict[str, Any]:
     response_model=Dict[str, Any],
     dependencies=[Depends(require_issuer_token)],
 )
-def gov_get_nonce_query(
+async def gov_get_nonce_query(
     request: Request, transactionId: str = Query(..., alias="transactionId")
 ) -> Dict[str, Any]:
-    return gov_get_nonce(transactionId, request)
+    return await gov_get_nonce(transactionId, request)
 
 
 @api_public.put(
@@ -1999,11 +2656,11 @@ def gov_get_nonce_query(
     response_model=Dict[str, Any],
     dependencies=[Depends(require_issuer_token)],
 )
-def gov_update_credential(
+async def gov_update_credential(
     credential_id: str, action: str, request: Request
 ) -> Dict[str, Any]:
     token = _extract_token_from_request(request)
-    return _call_remote_api(
+    return await _call_remote_api_async(
         method="PUT",
         base_url=GOV_ISSUER_BASE,
         path=f"/api/credential/{credential_id}/{action}",
@@ -2012,13 +2669,14 @@ def gov_update_credential(
     )
 
 
-def _forward_oidvp_qrcode(
+async def _forward_oidvp_qrcode(
     *,
     request: Request,
     ref: Optional[str],
     transaction_id: Optional[str],
     scope: Optional[DisclosureScope] = None,
     payload: Optional[OIDVPSessionRequest] = None,
+    callback_url: Optional[str] = None,
 ) -> Dict[str, Any]:
     token = _extract_token_from_request(request)
     tx_id = transaction_id
@@ -2027,6 +2685,8 @@ def _forward_oidvp_qrcode(
         tx_id = payload.transaction_id or tx_id
         ref = payload.ref or ref
         resolved_scope = payload.scope or resolved_scope
+        callback_url = payload.callback_url or callback_url
+    callback_url = await run_in_threadpool(_validate_callback_url, callback_url)
     tx_id = tx_id or str(uuid.uuid4())
     resolved_scope = resolved_scope or DisclosureScope.MEDICAL_RECORD
     resolved_ref = _resolve_verifier_ref(resolved_scope, ref)
@@ -2045,7 +2705,7 @@ def _forward_oidvp_qrcode(
         )
     if allowed_fields:
         params["allowed_fields"] = allowed_fields
-    response = _call_remote_api(
+    response = await _call_remote_api_async(
         method="GET",
         base_url=GOV_VERIFIER_BASE,
         path="/api/oidvp/qrcode",
@@ -2076,8 +2736,9 @@ def _forward_oidvp_qrcode(
             expires_at=expires_at,
             last_polled_at=datetime.utcnow(),
             template_ref=resolved_ref,
+            callback_url=callback_url,
         )
-        store.persist_verification_session(session)
+        await run_in_threadpool(store.persist_verification_session, session)
     return response
 
 
@@ -2087,10 +2748,10 @@ def _forward_oidvp_qrcode(
     status_code=200,
     dependencies=[Depends(require_verifier_token)],
 )
-def gov_create_oidvp_qrcode(
+async def gov_create_oidvp_qrcode(
     payload: OIDVPSessionRequest, request: Request
 ) -> Dict[str, Any]:
-    return _forward_oidvp_qrcode(
+    return await _forward_oidvp_qrcode(
         request=request,
         ref=None,
         transaction_id=None,
@@ -2104,16 +2765,22 @@ def gov_create_oidvp_qrcode(
     response_model=Dict[str, Any],
     dependencies=[Depends(require_verifier_token)],
 )
-def gov_create_oidvp_qrcode_get(
+async def gov_create_oidvp_qrcode_get(
     request: Request,
     ref: Optional[str] = Query(None),
     transaction_id: Optional[str] = Query(None, alias="transactionId"),
     transaction_id_snake: Optional[str] = Query(None, alias="transaction_id"),
     scope: Optional[DisclosureScope] = Query(None, alias="scope"),
+    callback_url: Optional[str] = Query(None, alias="callbackUrl"),
 ) -> Dict[str, Any]:
     tx_id = transaction_id or transaction_id_snake
-    return _forward_oidvp_qrcode(
-        request=request, ref=ref, transaction_id=tx_id, scope=scope, payload=None
+    return await _forward_oidvp_qrcode(
+        request=request,
+        ref=ref,
+        transaction_id=tx_id,
+        scope=scope,
+        payload=None,
+        callback_url=callback_url,
     )
 
 
@@ -2122,7 +2789,7 @@ def gov_create_oidvp_qrcode_get(
     response_model=Dict[str, Any],
     dependencies=[Depends(require_verifier_token)],
 )
-def gov_get_medical_verification_code(
+async def gov_get_medical_verification_code(
     request: Request,
     ref: Optional[str] = Query(None),
     transaction_id: Optional[str] = Query(None, alias="transactionId"),
@@ -2135,6 +2802,7 @@ def gov_get_medical_verification_code(
     allowed_fields: Optional[List[str]] = Query(None, alias="allowed_fields"),
     scope: Optional[DisclosureScope] = Query(None, alias="scope"),
     valid_for_minutes: int = Query(5, alias="valid_for_minutes", ge=1, le=10),
+    callback_url: Optional[str] = Query(None, alias="callbackUrl"),
 ) -> Dict[str, Any]:
     # Government API currently accepts only ref/transactionId; additional
     # parameters are preserved locally when we fall back to the internal
@@ -2144,12 +2812,13 @@ def gov_get_medical_verification_code(
     resolved_ref = _resolve_verifier_ref(scope, ref)
     resolved_scope = scope or DisclosureScope.MEDICAL_RECORD
     fields = _resolve_allowed_fields(resolved_scope, allowed_fields)
+    callback = await run_in_threadpool(_validate_callback_url, callback_url)
     params = {
         "ref": resolved_ref,
         "transactionId": transaction,
     }
     token = _extract_token_from_request(request)
-    response = _call_remote_api(
+    response = await _call_remote_api_async(
         method="GET",
         base_url=GOV_VERIFIER_BASE,
         path="/api/oidvp/qrcode",
@@ -2177,8 +2846,9 @@ def gov_get_medical_verification_code(
             expires_at=expires_at,
             last_polled_at=datetime.utcnow(),
             template_ref=resolved_ref,
+            callback_url=callback,
         )
-        store.persist_verification_session(session)
+        await run_in_threadpool(store.persist_verification_session, session)
     return response
 
 
@@ -2187,13 +2857,13 @@ def gov_get_medical_verification_code(
     response_model=Dict[str, Any],
     dependencies=[Depends(require_verifier_token)],
 )
-def gov_fetch_oidvp_result(
+async def gov_fetch_oidvp_result(
     payload: OIDVPResultRequest, request: Request
 ) -> Dict[str, Any]:
     token = _extract_token_from_request(request)
     body = payload.dict(by_alias=True)
     try:
-        return _call_remote_api(
+        return await _call_remote_api_async(
             method="POST",
             base_url=GOV_VERIFIER_BASE,
             path="/api/oidvp/result",
@@ -2207,11 +2877,13 @@ def gov_fetch_oidvp_result(
         if exc.status_code not in {400, 404}:
             raise
 
-        session = store.get_verification_session_by_transaction(payload.transaction_id)
+        session = await run_in_threadpool(
+            store.get_verification_session_by_transaction, payload.transaction_id
+        )
         if not session:
             raise
 
-        cached_result = store.latest_result_for_session(session.session_id)
+        cached_result = await run_in_threadpool(store.latest_result_for_session, session.session_id)
         if not cached_result:
             raise HTTPException(
                 status_code=400,
@@ -2240,10 +2912,10 @@ def gov_fetch_oidvp_result(
     response_model=Dict[str, Any],
     dependencies=[Depends(require_verifier_token)],
 )
-def gov_medical_verification_result(
+async def gov_medical_verification_result(
     payload: OIDVPResultRequest, request: Request
 ) -> Dict[str, Any]:
-    return gov_fetch_oidvp_result(payload, request)
+    return await gov_fetch_oidvp_result(payload, request)
 
 @api_public.get(
     "/medical/verification/session/{session_id}",
@@ -2789,6 +3461,9 @@ def get_verification_code(
         ..., description="List of fields requested for selective disclosure"
     ),
     validMinutes: int = Query(5, ge=1, le=5, alias="validMinutes"),
+    callbackUrl: Optional[str] = Query(
+        None, alias="callbackUrl", description="URL that receives the result by webhook"
+    ),
 ) -> VerificationCodeResponse:
     if len(fields) == 1 and "," in fields[0]:
         fields = [segment.strip() for segment in fields[0].split(",") if segment.strip()]
@@ -2818,6 +3493,7 @@ def get_verification_code(
         expires_at=now + timedelta(minutes=validMinutes),
         last_polled_at=now,
         template_ref=_resolve_verifier_ref(scope, None),
+        callback_url=_validate_callback_url(callbackUrl),
     )
     store.persist_verification_session(session)
     qr_payload = _build_qr_payload(
@@ -2926,7 +3602,128 @@ def submit_presentation(payload: VerificationSubmission) -> RiskInsightResponse:
     store.persist_result(result)
 
     insight = get_risk_engine().evaluate(presentation)
-    return RiskInsightResponse(result=result, insight=insight)
+    response = RiskInsightResponse(result=result, insight=insight)
+    result_broker.publish(session.session_id, "result", response)
+    if session.callback_url:
+        webhook_dispatcher.enqueue(
+            session.callback_url,
+            {
+                "type": "verification.result",
+                "session_id": session.session_id,
+                "transaction_id": session.transaction_id,
+                "occurred_at": presentation.issued_at.isoformat(),
+                "result": json.loads(response.json()),
+            },
+        )
+    return response
+
+
+def _sse_event(event: str, payload: Any) -> str:
+    data = payload.json() if isinstance(payload, BaseModel) else json.dumps(payload)
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _verification_event_stream(session_id: str) -> AsyncIterator[str]:
+    """Yield one terminal SSE event for a session, with keepalive comments.
+
+    The stream ends with ``result`` (the same body as ``POST /api/did/vp/result``),
+    ``expired`` or ``purged``. Results submitted in this process wake the
+    stream immediately through ``result_broker``; the store is re-checked on
+    every keepalive so results written by another worker still arrive.
+    """
+
+    yield "retry: 3000\n\n"
+    while True:
+        waiter = result_broker.subscribe(session_id)
+        try:
+            result = await run_in_threadpool(store.latest_result_for_session, session_id)
+            if result is not None:
+                insight = get_risk_engine().evaluate(result.presentation)
+                yield _sse_event("result", RiskInsightResponse(result=result, insight=insight))
+                return
+            session = await run_in_threadpool(store.get_verification_session, session_id)
+            if session is None:
+                yield _sse_event("purged", {"session_id": session_id})
+                return
+            remaining = (session.expires_at - datetime.utcnow()).total_seconds()
+            if remaining <= 0:
+                yield _sse_event(
+                    "expired", {"session_id": session_id, "expires_at": session.expires_at.isoformat()}
+                )
+                return
+            try:
+                event, payload = await asyncio.wait_for(
+                    waiter, timeout=min(SSE_KEEPALIVE_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse_event(event, payload)
+            return
+        finally:
+            result_broker.unsubscribe(session_id, waiter)
+
+
+class _EventStreamResponse(StreamingResponse):
+    """SSE response holding one ``result_broker`` stream slot until it ends.
+
+    The slot is released when sending finishes or fails, including before
+    the body generator ever started, and if the response is dropped without
+    being sent at all.
+    """
+
+    def __init__(self, content: AsyncIterator[str], slot: StreamSlot, **kwargs: Any) -> None:
+        super().__init__(content, **kwargs)
+        self.slot = slot
+        weakref.finalize(self, slot.release)
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
+
+
+def _verification_event_response(session: Optional[VerificationSession], reference: str) -> StreamingResponse:
+    if not session:
+        _raise_problem(
+            status=404,
+            type_="https://medssi.dev/errors/session-not-found",
+            title="Verification session not found",
+            detail=f"Verification session {reference} does not exist.",
+        )
+    slot = result_broker.try_open_stream()
+    if slot is None:
+        _raise_problem(
+            status=503,
+            type_="https://medssi.dev/errors/too-many-streams",
+            title="Too many open event streams",
+            detail="Retry later or poll the verification result endpoint.",
+        )
+    return _EventStreamResponse(
+        _verification_event_stream(session.session_id),
+        slot,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_v2.get(
+    "/api/did/vp/session/{session_id}/events",
+    dependencies=[Depends(require_verifier_token)],
+)
+async def stream_session_result(session_id: str) -> StreamingResponse:
+    session = await run_in_threadpool(store.get_verification_session, session_id)
+    return _verification_event_response(session, session_id)
+
+
+@api_v2.get(
+    "/api/did/vp/transaction/{transaction_id}/events",
+    dependencies=[Depends(require_verifier_token)],
+)
+async def stream_transaction_result(transaction_id: str) -> StreamingResponse:
+    session = await run_in_threadpool(store.get_verification_session_by_transaction, transaction_id)
+    return _verification_event_response(session, transaction_id)
 
 
 @api_v2.delete(
@@ -2935,6 +3732,7 @@ def submit_presentation(payload: VerificationSubmission) -> RiskInsightResponse:
 )
 def purge_session(session_id: str):
     store.purge_session(session_id)
+    result_broker.publish(session_id, "purged", {"session_id": session_id})
     return {"session_id": session_id, "status": "PURGED"}
 
 
@@ -2955,9 +3753,128 @@ def options_reset_sandbox_state():
 )
 def reset_sandbox_state() -> ResetResponse:
     store.reset()
+    remote_nonce_cache.clear()
+    qr_image_cache.clear()
     return ResetResponse(message="MedSSI in-memory store reset", timestamp=datetime.utcnow())
 
 
+@api_v2.get(
+    "/api/system/reaper",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_reaper_status() -> Dict[str, Any]:
+    return reaper.status()
+
+
+@api_v2.get(
+    "/api/system/webhooks",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_webhook_status() -> Dict[str, Any]:
+    return {
+        "metrics": webhook_dispatcher.metrics(),
+        "deadLetters": webhook_dispatcher.dead_letters(),
+    }
+
+
+@api_v2.post(
+    "/api/system/webhooks/redeliver",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def redeliver_webhooks() -> Dict[str, Any]:
+    return {"requeued": webhook_dispatcher.redeliver_dead_letters()}
+
+
+@api_v2.get(
+    "/api/system/streams",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_stream_status() -> Dict[str, Any]:
+    return result_broker.metrics()
+
+
+@api_v2.get(
+    "/api/system/upstream",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_upstream_status() -> Dict[str, Any]:
+    return {
+        "pools": upstream_client.metrics(),
+        "async": async_upstream_client.metrics(),
+        "resilience": upstream_guards.metrics(),
+        "coalescing": upstream_flights.metrics(),
+        "cassette": upstream_cassette.metrics() if upstream_cassette else None,
+        "nonceCache": _remote_nonce_metrics(),
+    }
+
+
+@api_v2.get(
+    "/api/system/qr-images",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_qr_image_status() -> Dict[str, Any]:
+    return {
+        "mode": QR_IMAGE_MODE,
+        "format": QR_IMAGE_FORMAT,
+        "defaults": QR_RENDER_DEFAULTS._asdict(),
+        "cache": qr_image_cache.metrics(),
+        "renderer": qr_renderer.metrics(),
+        "offerPool": offer_pool.metrics(),
+    }
+
+
+@api_v2.get(
+    "/api/system/templates",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_template_status() -> Dict[str, Any]:
+    return issuance_templates.metrics()
+
+
+@api_v2.get(
+    "/api/system/upstream/latency",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_upstream_latency() -> Dict[str, Any]:
+    return upstream_telemetry.metrics()
+
+
+@api_v2.get(
+    "/api/system/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        upstream_telemetry.prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@api_v2.get(
+    "/api/system/journal",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_any_sandbox_token)],
+)
+def get_journal_status() -> Dict[str, Any]:
+    journal_metrics = getattr(store, "journal_metrics", None)
+    if journal_metrics is None:
+        _raise_problem(
+            status=404,
+            type_="https://medssi.dev/errors/journal-disabled",
+            title="Store journal disabled",
+            detail="Set MEDSSI_STORE_JOURNAL_DIR to journal the in-memory store.",
+        )
+    return journal_metrics()
+
+
 app.include_router(api_public)
 app.include_router(api_v2)
 
@@ -39,6 +39,18 @@ def describe_ial(ial: IdentityAssuranceLevel) -> str:
     return IAL_DESCRIPTIONS[ial]
 
 
+def normalize_credential_id(credential_id: str) -> str:
+    """Reduce URI / DID style credential references to their trailing ID."""
+
+    value = (credential_id or "").strip()
+    if not value:
+        return ""
+    candidate = value.split("/")[-1]
+    if ":" in candidate:
+        candidate = candidate.split(":")[-1]
+    return candidate
+
+
 class FHIRCoding(BaseModel):
     system: str = Field(..., description="FHIR coding system URI")
     code: str = Field(..., description="Code value (e.g. ICD-10, ATC)")
@@ -298,6 +310,7 @@ class VerificationSession(BaseModel):
     expires_at: datetime
     last_polled_at: datetime
     template_ref: Optional[str] = None
+    callback_url: Optional[str] = None
 
     @root_validator(pre=True)
     def _ensure_session_ial(cls, values: Dict[str, Any]) -> Dict[str, Any]:
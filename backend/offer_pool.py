@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional
+
+
+class PrefabOffer(NamedTuple):
+    """Identifiers and QR rendering for a credential offer not yet issued."""
+
+    transaction_id: str
+    qr_token: str
+    nonce: str
+    qr_payload: str
+    image_options: Any
+    image: Optional[bytes]
+
+
+class OfferPool:
+    """Background-filled stock of :class:`PrefabOffer` for issuance bursts.
+
+    A credential offer's deep link depends only on random identifiers, so
+    it and its QR image can be built before any patient data arrives. A
+    worker thread keeps up to ``size`` prefabs ready, building at most
+    ``refill_per_second`` so refilling does not starve request threads of
+    the GIL during a burst. ``take`` never blocks: an empty pool returns
+    ``None`` and the caller builds inline as before. ``size`` 0 disables
+    the pool.
+    """
+
+    def __init__(self, build: Callable[[], PrefabOffer], *, size: int = 0, refill_per_second: float = 50.0) -> None:
+        self.build = build
+        self.size = max(size, 0)
+        self.refill_per_second = refill_per_second
+        self._cond = threading.Condition()
+        self._ready: Deque[PrefabOffer] = deque()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self.built = 0
+        self.taken = 0
+        self.misses = 0
+        self.build_errors = 0
+        self.build_ms_total = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def start(self) -> None:
+        # Called from the app lifespan so a prefork parent never owns the thread.
+        if not self.enabled:
+            return
+        with self._cond:
+            self._closed = False
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="offer-pool", daemon=True)
+                self._worker.start()
+
+    def take(self) -> Optional[PrefabOffer]:
+        if not self.enabled:
+            return None
+        with self._cond:
+            if not self._ready:
+                self.misses += 1
+                return None
+            prefab = self._ready.popleft()
+            self.taken += 1
+            self._cond.notify()
+            return prefab
+
+    def fill(self, count: Optional[int] = None) -> int:
+        """Build up to ``count`` prefabs (default: to capacity) on this thread."""
+
+        added = 0
+        while count is None or added < count:
+            with self._cond:
+                if len(self._ready) >= self.size:
+                    break
+            if not self._build_one():
+                break
+            added += 1
+        return added
+
+    def _build_one(self) -> bool:
+        started = time.perf_counter()
+        try:
+            prefab = self.build()
+        except Exception:
+            with self._cond:
+                self.build_errors += 1
+            return False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._cond:
+            self.built += 1
+            self.build_ms_total += elapsed_ms
+            if len(self._ready) >= self.size:
+                return False
+            self._ready.append(prefab)
+        return True
+
+    def _run(self) -> None:
+        interval = 1.0 / self.refill_per_second if self.refill_per_second > 0 else 0.0
+        while True:
+            with self._cond:
+                while len(self._ready) >= self.size and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            started = time.monotonic()
+            if not self._build_one():
+                # Build failures back off instead of spinning.
+                time.sleep(max(interval, 1.0))
+                continue
+            pause = interval - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout=timeout)
+
+    def clear(self) -> None:
+        with self._cond:
+            self._ready.clear()
+            self._cond.notify()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            requests = self.taken + self.misses
+            return {
+                "size": self.size,
+                "available": len(self._ready),
+                "refill_per_second": self.refill_per_second,
+                "taken": self.taken,
+                "misses": self.misses,
+                "hit_ratio": self.taken / requests if requests else 0.0,
+                "built": self.built,
+                "build_errors": self.build_errors,
+                "build_ms_mean": self.build_ms_total / self.built if self.built else 0.0,
+            }
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import json
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from .cache import TTLCache
+
+try:  # pragma: no cover - optional dependency for nicer QR codes
+    import qrcode
+    from qrcode.image.svg import SvgPathImage
+except Exception:  # pragma: no cover - fallback to text payloads
+    qrcode = None
+    SvgPathImage = None
+
+_PNG_FACTORY: Any = None
+if qrcode is not None:
+    try:  # Pillow gives qrcode its default PNG image factory
+        import PIL  # noqa: F401
+
+        _PNG_FACTORY = "pil"
+    except Exception:  # pragma: no cover - pure-python PNG writer instead
+        try:
+            import png  # noqa: F401
+            from qrcode.image.pure import PyPNGImage
+
+            _PNG_FACTORY = PyPNGImage
+        except Exception:
+            _PNG_FACTORY = None
+
+
+# "json" is the raw module matrix, for clients that draw the code themselves.
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml", "json": "application/json"}
+ERROR_CORRECTION_LEVELS = ("L", "M", "Q", "H")
+MAX_BOX_SIZE = 40
+MAX_BORDER = 16
+
+
+class QRUnavailable(Exception):
+    """Raised when no renderer for the requested image format is installed."""
+
+
+class RenderOptions(NamedTuple):
+    """How to draw a QR code.
+
+    Lower error correction fits the long ``modadigitalwallet://`` deep links
+    into a lower QR version (fewer, larger modules); ``box_size`` is pixels
+    per module for PNG and ``border`` the quiet zone in modules.
+    """
+
+    image_format: str = "png"
+    error_correction: str = "M"
+    box_size: int = 10
+    border: int = 4
+
+    def validate(self) -> "RenderOptions":
+        if self.image_format not in MEDIA_TYPES:
+            raise ValueError(f"Unknown QR image format {self.image_format!r}")
+        if self.error_correction not in ERROR_CORRECTION_LEVELS:
+            raise ValueError("Error correction must be one of L, M, Q, H")
+        if not 1 <= self.box_size <= MAX_BOX_SIZE:
+            raise ValueError(f"Box size must be between 1 and {MAX_BOX_SIZE}")
+        if not 0 <= self.border <= MAX_BORDER:
+            raise ValueError(f"Border must be between 0 and {MAX_BORDER}")
+        return self
+
+    @property
+    def tag(self) -> str:
+        return f"{self.image_format}:{self.error_correction}:{self.box_size}:{self.border}"
+
+
+def can_render(image_format: str) -> bool:
+    if image_format == "png":
+        return _PNG_FACTORY is not None
+    return image_format in MEDIA_TYPES and qrcode is not None
+
+
+def render(payload: str, options: RenderOptions) -> bytes:
+    """Render on the calling thread."""
+
+    if not can_render(options.image_format):
+        raise QRUnavailable(f"No {options.image_format.upper()} QR renderer installed")
+    code = qrcode.QRCode(
+        error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{options.error_correction}"),
+        box_size=options.box_size,
+        border=options.border,
+    )
+    code.add_data(payload)
+    code.make(fit=True)
+    if options.image_format == "json":
+        matrix = {
+            "version": code.version,
+            "errorCorrection": options.error_correction,
+            "border": options.border,
+            "size": code.modules_count + 2 * options.border,
+            "rows": ["".join("1" if cell else "0" for cell in row) for row in code.get_matrix()],
+        }
+        return json.dumps(matrix, separators=(",", ":")).encode("utf-8")
+    if options.image_format == "svg":
+        image = code.make_image(image_factory=SvgPathImage)
+    elif _PNG_FACTORY == "pil":
+        image = code.make_image()
+    else:
+        image = code.make_image(image_factory=_PNG_FACTORY)
+    buffer = io.BytesIO()
+    image.save(buffer)
+    return buffer.getvalue()
+
+
+def link_handle(qr_token: str) -> str:
+    """Path segment that makes an offer's image URL unguessable.
+
+    Derived from the offer's secret ``qr_token`` (which the image encodes),
+    so the URL grants no more than the QR code itself and stops working
+    when the token changes, without a shared key across workers. The
+    token itself never appears in the URL.
+    """
+
+    return hashlib.sha256(f"medssi-qr-image\n{qr_token}".encode("utf-8")).hexdigest()[:32]
+
+
+def data_uri(
+    payload: str,
+    options: RenderOptions = RenderOptions("png"),
+    renderer: Callable[[str, RenderOptions], bytes] = render,
+) -> str:
+    """Inline PNG ``data:`` URI, falling back to the raw payload as text."""
+
+    if can_render("png"):
+        encoded = base64.b64encode(renderer(payload, options._replace(image_format="png"))).decode("ascii")
+        return f"data:image/png;base64,{encoded}"
+    encoded = base64.b64encode(payload.encode("utf-8")).decode("ascii")
+    return f"data:text/plain;base64,{encoded}"
+
+
+class QRRenderPool:
+    """Renders QR codes in worker processes.
+
+    Encoding a QR code is pure-Python CPU work that holds the GIL, so
+    concurrent renders on request threads run one at a time. With
+    ``workers`` > 0 they go to a process pool (spawned lazily, so each
+    prefork worker gets its own). At most ``max_pending`` renders wait on
+    the pool; beyond that, and when a worker process dies, the caller
+    renders on its own thread instead of queueing. ``workers`` 0 always
+    renders inline.
+    """
+
+    def __init__(self, workers: int = 0, *, max_pending: Optional[int] = None) -> None:
+        self.workers = max(workers, 0)
+        self.max_pending = max_pending if max_pending is not None else self.workers * 4
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.pooled = 0
+        self.inline = 0
+        self.saturated = 0
+        self.broken = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Caller holds the lock. "spawn" because the API process has threads.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def render(self, payload: str, options: RenderOptions) -> bytes:
+        if not can_render(options.image_format):
+            raise QRUnavailable(f"No {options.image_format.upper()} QR renderer installed")
+        with self._lock:
+            use_pool = self.workers > 0 and self._pending < self.max_pending
+            if use_pool:
+                self._pending += 1
+                executor = self._pool()
+            else:
+                self.inline += 1
+                if self.workers > 0:
+                    self.saturated += 1
+        if not use_pool:
+            return render(payload, options)
+        try:
+            result = executor.submit(render, payload, options).result()
+        except BrokenProcessPool:
+            with self._lock:
+                self.broken += 1
+                self.inline += 1
+                if self._executor is executor:
+                    self._executor = None
+            return render(payload, options)
+        finally:
+            with self._lock:
+                self._pending -= 1
+        with self._lock:
+            self.pooled += 1
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "pooled": self.pooled,
+                "inline": self.inline,
+                "saturated": self.saturated,
+                "broken": self.broken,
+            }
+
+
+class QRImageCache:
+    """Rendered QR images per offer, one entry per set of render options.
+
+    Images are rendered on first fetch and kept until their offer expires
+    (the caller passes the remaining lifetime as TTL), bounded by an LRU of
+    ``maxsize`` offers with at most ``variants`` option sets each. The ETag
+    is a digest of the encoded payload and options, so it stays stable
+    across workers and restarts without storing anything.
+    """
+
+    def __init__(self, maxsize: int = 2048, *, variants: int = 8) -> None:
+        self._images: TTLCache["OrderedDict[RenderOptions, Tuple[str, bytes]]"] = TTLCache(maxsize, 0)
+        self.variants = max(variants, 1)
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    @staticmethod
+    def etag(payload: str, options: RenderOptions) -> str:
+        digest = hashlib.sha256(f"{options.tag}\n{payload}".encode("utf-8")).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def get_or_render(
+        self,
+        transaction_id: str,
+        payload: str,
+        options: RenderOptions,
+        ttl_seconds: float,
+        renderer: Callable[[str, RenderOptions], bytes] = render,
+    ) -> Tuple[str, bytes]:
+        etag = self.etag(payload, options)
+        cached = self._images.get(transaction_id)
+        if cached is not None:
+            with self._lock:
+                entry = cached.get(options)
+            if entry is not None and entry[0] == etag:
+                return entry
+        body = renderer(payload, options)
+        with self._lock:
+            self.renders += 1
+        self.put(transaction_id, options, payload, body, ttl_seconds)
+        return etag, body
+
+    def put(
+        self, transaction_id: str, options: RenderOptions, payload: str, body: bytes, ttl_seconds: float
+    ) -> None:
+        """Store an image, e.g. one rendered ahead of time by ``offer_pool``."""
+
+        with self._lock:
+            variants = self._images.peek(transaction_id)
+            if variants is None:
+                variants = OrderedDict()
+            variants[options] = (self.etag(payload, options), body)
+            variants.move_to_end(options)
+            while len(variants) > self.variants:
+                variants.popitem(last=False)
+        self._images.put(transaction_id, variants, ttl_seconds=ttl_seconds)
+
+    def peek(self, transaction_id: str, options: RenderOptions) -> Optional[bytes]:
+        variants = self._images.peek(transaction_id)
+        if variants is None:
+            return None
+        with self._lock:
+            entry = variants.get(options)
+        return entry[1] if entry is not None else None
+
+    def evict(self, transaction_id: str) -> None:
+        self._images.discard(transaction_id)
+
+    def clear(self) -> None:
+        self._images.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        metrics = self._images.metrics()
+        metrics.pop("ttl_seconds", None)
+        with self._lock:
+            metrics["renders"] = self.renders
+        metrics["formats"] = [name for name in MEDIA_TYPES if can_render(name)]
+        return metrics
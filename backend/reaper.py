@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .store import StoreBackend
+
+
+class ExpiryReaper:
+    """Runs store expiry and retention sealing off the request path.
+
+    In ``background`` mode an asyncio task started from the application
+    lifespan ticks every ``interval_seconds``; each tick runs in a worker
+    thread (store calls may block on fsync or SQLite) and stops after
+    ``budget_seconds``, and when due entries remain the next tick follows
+    immediately instead of waiting a full interval. ``inline`` mode keeps the
+    historical behaviour of cleaning up before every request, which suits
+    single-threaded test clients that never start the lifespan.
+    """
+
+    def __init__(
+        self,
+        store: StoreBackend,
+        *,
+        mode: str = "background",
+        interval_seconds: float = 5.0,
+        budget_seconds: Optional[float] = 0.05,
+    ) -> None:
+        self.store = store
+        self.mode = mode
+        self.interval_seconds = max(interval_seconds, 0.01)
+        self.budget_seconds = budget_seconds
+        self.ticks = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_processed = 0
+        self.backlog = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        reference = now or datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            processed = self.store.cleanup_expired(reference, budget_seconds=self.budget_seconds)
+            backlog = self.store.expiry_backlog(reference) if self.budget_seconds else 0
+        finally:
+            self.ticks += 1
+            self.last_run_at = reference
+            self.last_duration_ms = (time.perf_counter() - started) * 1000
+        self.last_processed = processed
+        self.backlog = backlog
+        return processed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as exc:  # pragma: no cover - keep the reaper alive
+                self.errors += 1
+                self.last_error = repr(exc)
+                self.backlog = 0
+            await asyncio.sleep(0 if self.backlog else self.interval_seconds)
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "intervalSeconds": self.interval_seconds,
+            "budgetMs": self.budget_seconds * 1000 if self.budget_seconds is not None else None,
+            "ticks": self.ticks,
+            "lastRunAt": self.last_run_at.isoformat() if self.last_run_at else None,
+            "lastDurationMs": self.last_duration_ms,
+            "lastProcessed": self.last_processed,
+            "backlog": self.backlog,
+            "errors": self.errors,
+            "lastError": self.last_error,
+            "scheduler": self.store.expiry_metrics(),
+        }
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+from .models import (
+    CredentialOffer,
+    CredentialPayload,
+    CredentialStatus,
+    DisclosurePolicy,
+    DisclosureScope,
+    IdentityAssuranceLevel,
+    IssuanceMode,
+    describe_ial,
+)
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_SCOPES: List[DisclosureScope] = list(DisclosureScope)
+_IALS: List[IdentityAssuranceLevel] = list(IdentityAssuranceLevel)
+_MODES: List[IssuanceMode] = list(IssuanceMode)
+_STATUSES: List[CredentialStatus] = list(CredentialStatus)
+_SCOPE_CODES = {value: code for code, value in enumerate(_SCOPES)}
+_IAL_CODES = {value: code for code, value in enumerate(_IALS)}
+_MODE_CODES = {value: code for code, value in enumerate(_MODES)}
+_STATUS_CODES = {value: code for code, value in enumerate(_STATUSES)}
+
+Timestamp = Union[int, datetime, None]
+PolicyKey = Tuple[Tuple[int, Tuple[str, ...], Optional[str]], ...]
+FieldPairs = Optional[Tuple[Tuple[str, str], ...]]
+
+
+def pack_timestamp(value: Optional[datetime]) -> Timestamp:
+    """Store naive UTC datetimes as integer microseconds since the epoch.
+
+    Timezone-aware values only arrive from imported government offers; they
+    are kept as-is so their offset survives the round trip.
+    """
+
+    if value is None or value.tzinfo is not None:
+        return value
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def unpack_timestamp(value: Timestamp) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class CredentialRecord:
+    """Slot-based storage form of :class:`CredentialOffer`.
+
+    The four enums share one packed int, timestamps are ints, payloads are
+    their JSON bytes, disclosure policies are interned tuples shared by every
+    offer built from the same template, and the two alias maps are tuples of
+    interned pairs (shared when identical). Only ``credential_id`` and
+    ``transaction_id`` are read directly by the store.
+    """
+
+    __slots__ = (
+        "credential_id",
+        "transaction_id",
+        "issuer_id",
+        "holder_did",
+        "holder_hint",
+        "qr_token",
+        "nonce",
+        "codes",
+        "ial_description",
+        "created_at",
+        "expires_at",
+        "last_action_at",
+        "issued_at",
+        "retention_expires_at",
+        "sealed_at",
+        "policies",
+        "payload",
+        "payload_template",
+        "selected_disclosures",
+        "external_fields",
+    )
+
+
+class RecordCodec:
+    """Converts credentials between API models and :class:`CredentialRecord`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._policies: Dict[PolicyKey, PolicyKey] = {}
+
+    def _intern_policies(self, policies: List[DisclosurePolicy]) -> PolicyKey:
+        key = tuple(
+            (
+                _SCOPE_CODES[policy.scope],
+                tuple(sys.intern(field) for field in policy.fields),
+                policy.description,
+            )
+            for policy in policies
+        )
+        with self._lock:
+            return self._policies.setdefault(key, key)
+
+    @staticmethod
+    def _pack_fields(values: Dict[str, str]) -> FieldPairs:
+        if not values:
+            return None
+        return tuple((sys.intern(key), value) for key, value in values.items())
+
+    def encode_credential(self, credential: CredentialOffer) -> CredentialRecord:
+        record = CredentialRecord()
+        record.credential_id = credential.credential_id
+        record.transaction_id = credential.transaction_id
+        record.issuer_id = sys.intern(credential.issuer_id)
+        record.holder_did = sys.intern(credential.holder_did) if credential.holder_did else None
+        record.holder_hint = credential.holder_hint
+        record.qr_token = credential.qr_token
+        record.nonce = credential.nonce
+        record.codes = (
+            _SCOPE_CODES[credential.primary_scope]
+            | _IAL_CODES[credential.ial] << 4
+            | _MODE_CODES[credential.mode] << 8
+            | _STATUS_CODES[credential.status] << 12
+        )
+        record.ial_description = (
+            None
+            if credential.ial_description == describe_ial(credential.ial)
+            else credential.ial_description
+        )
+        record.created_at = pack_timestamp(credential.created_at)
+        record.expires_at = pack_timestamp(credential.expires_at)
+        record.last_action_at = pack_timestamp(credential.last_action_at)
+        record.issued_at = pack_timestamp(credential.issued_at)
+        record.retention_expires_at = pack_timestamp(credential.retention_expires_at)
+        record.sealed_at = pack_timestamp(credential.sealed_at)
+        record.policies = self._intern_policies(credential.disclosure_policies)
+        payload = credential.payload.json().encode("utf-8") if credential.payload else None
+        template = (
+            credential.payload_template.json().encode("utf-8")
+            if credential.payload_template
+            else None
+        )
+        record.payload = payload
+        record.payload_template = payload if template is not None and template == payload else template
+        selected = self._pack_fields(credential.selected_disclosures)
+        external = self._pack_fields(credential.external_fields)
+        record.selected_disclosures = selected
+        record.external_fields = selected if external is not None and external == selected else external
+        return record
+
+    @staticmethod
+    def _payload(raw: Optional[bytes]) -> Optional[CredentialPayload]:
+        return CredentialPayload.parse_raw(raw) if raw is not None else None
+
+    def decode_credential(self, record: CredentialRecord) -> CredentialOffer:
+        codes = record.codes
+        ial = _IALS[codes >> 4 & 0xF]
+        return CredentialOffer.construct(
+            credential_id=record.credential_id,
+            transaction_id=record.transaction_id,
+            issuer_id=record.issuer_id,
+            primary_scope=_SCOPES[codes & 0xF],
+            ial=ial,
+            ial_description=record.ial_description or describe_ial(ial),
+            mode=_MODES[codes >> 8 & 0xF],
+            qr_token=record.qr_token,
+            nonce=record.nonce,
+            status=_STATUSES[codes >> 12 & 0xF],
+            created_at=unpack_timestamp(record.created_at),
+            expires_at=unpack_timestamp(record.expires_at),
+            last_action_at=unpack_timestamp(record.last_action_at),
+            disclosure_policies=[
+                DisclosurePolicy.construct(
+                    scope=_SCOPES[scope], fields=list(fields), description=description
+                )
+                for scope, fields, description in record.policies
+            ],
+            holder_did=record.holder_did,
+            holder_hint=record.holder_hint,
+            payload=self._payload(record.payload),
+            payload_template=self._payload(record.payload_template),
+            selected_disclosures=dict(record.selected_disclosures or ()),
+            external_fields=dict(record.external_fields or ()),
+            issued_at=unpack_timestamp(record.issued_at),
+            retention_expires_at=unpack_timestamp(record.retention_expires_at),
+            sealed_at=unpack_timestamp(record.sealed_at),
+        )
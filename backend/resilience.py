@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+import urllib.parse
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, Union
+
+from .upstream import UpstreamError, UpstreamResponse
+
+
+# Upstream answers that say "unhealthy" rather than "bad request".
+FAILURE_STATUSES = frozenset({502, 503, 504})
+
+Outcome = Union[UpstreamResponse, UpstreamError]
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without contacting the upstream while its breaker is open."""
+
+    def __init__(self, origin: str, retry_after: float) -> None:
+        super().__init__(f"Circuit open for {origin}; retry in {math.ceil(retry_after)}s", "circuit_open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with timed half-open probing.
+
+    ``failure_threshold`` consecutive failures open the circuit; after
+    ``open_seconds`` up to ``half_open_probes`` calls are let through. A
+    successful probe closes the circuit, a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, *, failure_threshold: int = 5, open_seconds: float = 30.0, half_open_probes: int = 1
+    ) -> None:
+        self.failure_threshold = max(failure_threshold, 1)
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(half_open_probes, 1)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def _refresh(self, now: float) -> str:
+        # Caller holds the lock.
+        if self._state == self.OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _trip(self, now: float) -> None:
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probes = 0
+        self.trips += 1
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._refresh(time.monotonic())
+
+    def try_acquire(self) -> Optional[bool]:
+        """Return ``None`` if rejected, otherwise whether the call is a probe."""
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._refresh(now)
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return None
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return max(self.open_seconds - (time.monotonic() - self._opened_at), 0.0)
+
+    def on_success(self, probe: bool) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if probe and self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._probes = 0
+
+    def on_failure(self, probe: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if probe and self._state == self.HALF_OPEN:
+                self._trip(now)
+            elif self._state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._trip(now)
+
+    def on_cancel(self, probe: bool) -> None:
+        with self._lock:
+            if probe and self._state == self.HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._refresh(time.monotonic())
+            return {
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "trips": self.trips,
+            }
+
+
+class RetryBudget:
+    """Token bucket limiting retries and hedges to a share of live traffic.
+
+    Every call deposits ``ratio`` tokens and every retry or hedge withdraws
+    one; ``min_per_second`` tokens accrue with time so low-traffic upstreams
+    can still retry. The balance is capped, so an outage cannot be met
+    with a retry storm funded by earlier healthy traffic.
+    """
+
+    def __init__(self, *, ratio: float = 0.1, min_per_second: float = 1.0, cap: float = 10.0) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.cap = cap
+        self._lock = threading.Lock()
+        self._balance = cap
+        self._refilled_at = time.monotonic()
+        self.granted = 0
+        self.denied = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._balance = min(self.cap, self._balance + elapsed * self.min_per_second)
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._balance = min(self.cap, self._balance + self.ratio)
+
+    def refund(self) -> None:
+        """Return a withdrawal that ended up unused."""
+
+        with self._lock:
+            self._balance = min(self.cap, self._balance + 1.0)
+            self.granted -= 1
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._balance >= 1.0:
+                self._balance -= 1.0
+                self.granted += 1
+                return True
+            self.denied += 1
+            return False
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {"balance": round(self._balance, 3), "granted": self.granted, "denied": self.denied}
+
+
+class LatencyWindow:
+    """Recent successful call latencies for percentile-based hedging."""
+
+    def __init__(self, size: int = 256, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(int(len(ordered) * pct / 100.0), len(ordered) - 1)
+        return ordered[index]
+
+
+class UpstreamGuard:
+    """Breaker, retry budget and hedging policy for one upstream origin."""
+
+    def __init__(
+        self,
+        origin: str,
+        *,
+        breaker: CircuitBreaker,
+        budget: RetryBudget,
+        max_retries: int = 1,
+        hedge_percentile: float = 0.0,
+        hedge_min_seconds: float = 0.05,
+    ) -> None:
+        self.origin = origin
+        self.breaker = breaker
+        self.budget = budget
+        self.max_retries = max_retries
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_seconds = hedge_min_seconds
+        self.latency = LatencyWindow()
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            setattr(self, key, getattr(self, key) + 1)
+
+    def _admit(self) -> bool:
+        probe = self.breaker.try_acquire()
+        if probe is None:
+            raise CircuitOpenError(self.origin, self.breaker.retry_after())
+        return probe
+
+    def _record(self, outcome: Outcome, probe: bool, started: float) -> bool:
+        """Feed the breaker; return True when the outcome counts as a failure."""
+
+        if isinstance(outcome, UpstreamError) or outcome.status in FAILURE_STATUSES:
+            self.breaker.on_failure(probe)
+            return True
+        self.breaker.on_success(probe)
+        self.latency.observe(time.perf_counter() - started)
+        return False
+
+    def _should_retry(self, idempotent: bool, attempt: int) -> bool:
+        # A retry the breaker would reject is not worth spending budget on;
+        # the caller then sees the real failure rather than "circuit open".
+        if not idempotent or attempt >= self.max_retries:
+            return False
+        if self.breaker.state == CircuitBreaker.OPEN or not self.budget.try_withdraw():
+            return False
+        self._count("retries")
+        return True
+
+    @staticmethod
+    def _finish(outcome: Outcome) -> UpstreamResponse:
+        if isinstance(outcome, UpstreamError):
+            raise outcome
+        return outcome
+
+    def call(self, send: Callable[[], UpstreamResponse], *, idempotent: bool) -> UpstreamResponse:
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            probe = self._admit()
+            started = time.perf_counter()
+            try:
+                outcome: Outcome = send()
+            except UpstreamError as exc:
+                outcome = exc
+            except BaseException:
+                self.breaker.on_cancel(probe)
+                raise
+            if not self._record(outcome, probe, started) or not self._should_retry(idempotent, attempt):
+                return self._finish(outcome)
+            attempt += 1
+
+    async def call_async(
+        self, send: Callable[[], Awaitable[UpstreamResponse]], *, idempotent: bool
+    ) -> UpstreamResponse:
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            outcome, failed = await self._attempt_async(send, hedge=idempotent)
+            if not failed or not self._should_retry(idempotent, attempt):
+                return self._finish(outcome)
+            attempt += 1
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_percentile:
+            return None
+        threshold = self.latency.percentile(self.hedge_percentile)
+        if threshold is None:
+            return None
+        return max(threshold, self.hedge_min_seconds)
+
+    async def _attempt_async(
+        self, send: Callable[[], Awaitable[UpstreamResponse]], *, hedge: bool
+    ) -> Tuple[Outcome, bool]:
+        """One logical attempt, optionally hedged by a second request.
+
+        The hedge starts once the primary has run longer than the configured
+        latency percentile; the first non-failing answer wins and the other
+        request is cancelled. Hedges draw on the same retry budget.
+        """
+
+        tasks: Dict["asyncio.Task[UpstreamResponse]", Tuple[bool, float, bool]] = {}
+
+        def launch(is_hedge: bool) -> None:
+            probe = self._admit()
+            task = asyncio.ensure_future(send())
+            tasks[task] = (probe, time.perf_counter(), is_hedge)
+
+        launch(False)
+        try:
+            delay = self._hedge_delay() if hedge else None
+            if delay is not None:
+                done, _ = await asyncio.wait(set(tasks), timeout=delay)
+                if not done and self.breaker.state == CircuitBreaker.CLOSED and self.budget.try_withdraw():
+                    try:
+                        launch(True)
+                    except CircuitOpenError:
+                        # The breaker opened since the check; keep waiting
+                        # on the primary rather than failing the call.
+                        self.budget.refund()
+                    else:
+                        self._count("hedges")
+
+            last: Tuple[Outcome, bool] = (UpstreamError("no attempt"), True)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    probe, started, is_hedge = tasks.pop(task)
+                    exc = task.exception()
+                    if exc is not None and not isinstance(exc, UpstreamError):
+                        self.breaker.on_cancel(probe)
+                        raise exc
+                    outcome: Outcome = exc if exc is not None else task.result()
+                    failed = self._record(outcome, probe, started)
+                    last = (outcome, failed)
+                    if not failed:
+                        if is_hedge:
+                            self._count("hedge_wins")
+                        return last
+            return last
+        finally:
+            for task, (probe, _started, _is_hedge) in tasks.items():
+                task.cancel()
+                self.breaker.on_cancel(probe)
+
+    def metrics(self) -> Dict[str, Any]:
+        threshold = self._hedge_delay()
+        with self._lock:
+            counters = {"retries": self.retries, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+        return {
+            "breaker": self.breaker.metrics(),
+            "retry_budget": self.budget.metrics(),
+            "hedge_percentile": self.hedge_percentile or None,
+            "hedge_after_ms": threshold * 1000 if threshold is not None else None,
+            **counters,
+        }
+
+
+class UpstreamGuards:
+    """Lazily creates one :class:`UpstreamGuard` per upstream origin."""
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        retry_ratio: float = 0.1,
+        retry_min_per_second: float = 1.0,
+        max_retries: int = 1,
+        hedge_percentile: float = 0.0,
+        hedge_min_seconds: float = 0.05,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.retry_ratio = retry_ratio
+        self.retry_min_per_second = retry_min_per_second
+        self.max_retries = max_retries
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_seconds = hedge_min_seconds
+        self._lock = threading.Lock()
+        self._guards: Dict[str, UpstreamGuard] = {}
+
+    def for_url(self, url: str) -> UpstreamGuard:
+        parts = urllib.parse.urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            guard = self._guards.get(origin)
+            if guard is None:
+                guard = self._guards[origin] = UpstreamGuard(
+                    origin,
+                    breaker=CircuitBreaker(
+                        failure_threshold=self.failure_threshold,
+                        open_seconds=self.open_seconds,
+                        half_open_probes=self.half_open_probes,
+                    ),
+                    budget=RetryBudget(
+                        ratio=self.retry_ratio, min_per_second=self.retry_min_per_second
+                    ),
+                    max_retries=self.max_retries,
+                    hedge_percentile=self.hedge_percentile,
+                    hedge_min_seconds=self.hedge_min_seconds,
+                )
+            return guard
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            guards = dict(self._guards)
+        return {origin: guard.metrics() for origin, guard in guards.items()}
@@ -0,0 +1,153 @@
+"""Prefork entry point for running the MedSSI API on every core of one host.
+
+Usage:
+    python -m backend.serve [--host 0.0.0.0] [--port 8000] [--workers N]
+
+The parent process imports ``backend.main`` once and builds today's
+issuance templates, so templates, sample values and environment
+configuration are loaded before forking (a worker rebuilds only after the
+date rolls over). It then
+binds the listening socket and forks ``--workers`` children (default
+``MEDSSI_WORKERS`` or the CPU count), each serving the shared socket with
+its own uvicorn event loop. Dead workers are restarted; SIGINT/SIGTERM are
+forwarded to the children.
+
+Workers never share Python memory, so with more than one worker the store
+is switched to the SQLite backend (``MEDSSI_STORE_BACKEND=sqlite``) and every
+worker reads and writes the same database file. Only the first worker runs
+the background expiry reaper and fills the prefab offer pool.
+
+Everything else held in memory stays per-worker, and a startup warning
+says so: the remote nonce cache and upstream request coalescing only help
+requests that land on the same worker (``/v2/api/system/reset`` clears the
+caches of the worker that answers it), and an SSE stream is woken at once
+only by results submitted to its own worker; results from other workers
+arrive on the next keepalive (``MEDSSI_SSE_KEEPALIVE_SECONDS``). POSIX only
+(requires ``os.fork``).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import socket
+import sys
+from typing import Dict
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(sock: socket.socket, slot: int, log_level: str) -> None:
+    import uvicorn
+
+    from .main import app, offer_pool, reaper
+
+    if slot > 0:
+        # Housekeeping on the shared database only needs one process, and one
+        # refilling offer pool is enough background rendering for the host.
+        reaper.mode = "off"
+        offer_pool.size = 0
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the MedSSI API with prefork workers.")
+    parser.add_argument("--host", default=os.getenv("MEDSSI_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MEDSSI_PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("MEDSSI_WORKERS", str(os.cpu_count() or 1)))
+    )
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    workers = max(args.workers, 1)
+
+    if workers > 1:
+        backend = os.getenv("MEDSSI_STORE_BACKEND", "memory").strip().lower()
+        if backend != "sqlite":
+            print(
+                f"MEDSSI_STORE_BACKEND={backend} is per-process; using sqlite "
+                f"so {workers} workers share one store.",
+                file=sys.stderr,
+            )
+            os.environ["MEDSSI_STORE_BACKEND"] = "sqlite"
+        print(
+            f"With {workers} workers the nonce cache, upstream coalescing, QR image cache and SSE "
+            "wake-ups are per-worker: cache hits drop, /v2/api/system/reset clears one worker, and "
+            "SSE results from another worker arrive on the next keepalive. The reaper and the offer "
+            "pool run in worker 0 only.",
+            file=sys.stderr,
+        )
+
+    # Import once in the parent so every worker starts from the loaded app,
+    # and build today's issuance templates here so workers inherit them
+    # instead of each building its own in the lifespan.
+    from .main import issuance_templates, store
+
+    issuance_templates.current()
+
+    sock = _bind(args.host, args.port, args.backlog)
+    if workers == 1:
+        _serve(sock, 0, args.log_level)
+        return 0
+
+    close_store = getattr(store, "close", None)
+    if close_store is not None:
+        close_store()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                _serve(sock, slot, args.log_level)
+            finally:
+                os._exit(0)
+        children[pid] = slot
+
+    def shutdown(signum: int, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    for slot in range(workers):
+        spawn(slot)
+    print(f"MedSSI API listening on {args.host}:{args.port} with {workers} workers", file=sys.stderr)
+
+    while children:
+        try:
+            pid, _status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            print(f"Worker {pid} exited; restarting slot {slot}", file=sys.stderr)
+            spawn(slot)
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
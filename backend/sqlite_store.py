@@ -0,0 +1,483 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from .expiry import deadline_from
+from .models import (
+    CredentialOffer,
+    CredentialStatus,
+    DisclosureScope,
+    ForgetSummary,
+    Presentation,
+    VerificationResult,
+    VerificationSession,
+    normalize_credential_id,
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS credentials (
+    credential_id TEXT PRIMARY KEY,
+    normalized_id TEXT NOT NULL,
+    transaction_id TEXT NOT NULL,
+    holder_did TEXT,
+    status TEXT NOT NULL,
+    primary_scope TEXT NOT NULL,
+    has_payload INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    retention_expires_at REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_credentials_transaction ON credentials (transaction_id);
+CREATE INDEX IF NOT EXISTS idx_credentials_normalized ON credentials (normalized_id);
+CREATE INDEX IF NOT EXISTS idx_credentials_holder ON credentials (holder_did);
+CREATE INDEX IF NOT EXISTS idx_credentials_offer_expiry ON credentials (status, expires_at);
+CREATE INDEX IF NOT EXISTS idx_credentials_retention
+    ON credentials (status, retention_expires_at);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    transaction_id TEXT,
+    verifier_id TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_transaction ON sessions (transaction_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_expiry ON sessions (expires_at);
+
+CREATE TABLE IF NOT EXISTS presentations (
+    presentation_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    holder_did TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_presentations_session ON presentations (session_id);
+CREATE INDEX IF NOT EXISTS idx_presentations_holder ON presentations (holder_did);
+
+CREATE TABLE IF NOT EXISTS results (
+    session_id TEXT NOT NULL,
+    presentation_id TEXT NOT NULL,
+    holder_did TEXT NOT NULL,
+    issued_at REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, presentation_id)
+);
+CREATE INDEX IF NOT EXISTS idx_results_latest ON results (session_id, issued_at);
+CREATE INDEX IF NOT EXISTS idx_results_presentation ON results (presentation_id);
+CREATE INDEX IF NOT EXISTS idx_results_holder ON results (holder_did);
+"""
+
+UPSERT_CREDENTIAL = """
+INSERT INTO credentials (
+    credential_id, normalized_id, transaction_id, holder_did, status, primary_scope,
+    has_payload, expires_at, retention_expires_at, data
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (credential_id) DO UPDATE SET
+    normalized_id = excluded.normalized_id,
+    transaction_id = excluded.transaction_id,
+    holder_did = excluded.holder_did,
+    status = excluded.status,
+    primary_scope = excluded.primary_scope,
+    has_payload = excluded.has_payload,
+    expires_at = excluded.expires_at,
+    retention_expires_at = excluded.retention_expires_at,
+    data = excluded.data
+"""
+
+UPSERT_SESSION = """
+INSERT INTO sessions (session_id, transaction_id, verifier_id, expires_at, data)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (session_id) DO UPDATE SET
+    transaction_id = excluded.transaction_id,
+    verifier_id = excluded.verifier_id,
+    expires_at = excluded.expires_at,
+    data = excluded.data
+"""
+
+# Housekeeping statements operate on at most ``?`` rows per statement so a
+# tick can stop between batches once its time budget is spent.
+EXPIRE_OFFERS = """
+DELETE FROM credentials WHERE credential_id IN (
+    SELECT credential_id FROM credentials
+    WHERE status = 'OFFERED' AND expires_at < ? LIMIT ?
+)
+"""
+EXPIRE_PICKUP_RETENTION = """
+DELETE FROM credentials WHERE credential_id IN (
+    SELECT credential_id FROM credentials
+    WHERE status = 'ISSUED' AND retention_expires_at < ? AND primary_scope = ? LIMIT ?
+)
+"""
+SEAL_RETENTION = """
+UPDATE credentials SET
+    has_payload = 0,
+    data = json_set(
+        data,
+        '$.payload', json('null'),
+        '$.selected_disclosures', json('{}'),
+        '$.sealed_at', ?,
+        '$.last_action_at', ?
+    )
+WHERE credential_id IN (
+    SELECT credential_id FROM credentials
+    WHERE status = 'ISSUED' AND retention_expires_at < ? AND primary_scope != ?
+        AND has_payload = 1
+    LIMIT ?
+)
+"""
+EXPIRED_SESSIONS = "SELECT session_id FROM sessions WHERE expires_at < ? LIMIT ?"
+
+
+class SQLiteStore:
+    """Durable store backed by SQLite in WAL mode.
+
+    Mirrors the public surface of :class:`backend.store.InMemoryStore`.
+    Records are stored as their pydantic JSON next to the indexed columns
+    used for lookups and housekeeping, so expiry, retention sealing and
+    right-to-be-forgotten run as set-based statements instead of Python
+    loops. Every thread gets its own connection; sqlite3 keeps a per
+    connection cache of prepared statements for the fixed SQL above.
+    Because all state lives in the database file, several worker processes
+    (see ``backend/serve.py``) can share one store.
+    """
+
+    def __init__(self, path: str, *, housekeeping_batch: int = 500) -> None:
+        self.path = path
+        self.housekeeping_batch = housekeeping_batch
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.ticks = 0
+        self.last_processed = 0
+        self.total_processed = 0
+        self._connection().executescript(SCHEMA)
+
+    # Connection handling --------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid != os.getpid():
+            # Connections must not cross fork(); a prefork worker inherits the
+            # parent's thread-local slot, so drop it without closing.
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=256,
+                timeout=30,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group every store call made inside the block into one transaction."""
+
+        with self._transaction():
+            yield
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Credential lifecycle -------------------------------------------------
+    def _credential_row(self, credential: CredentialOffer) -> tuple:
+        return (
+            credential.credential_id,
+            normalize_credential_id(credential.credential_id),
+            credential.transaction_id,
+            credential.holder_did or None,
+            credential.status.value,
+            credential.primary_scope.value,
+            1 if credential.payload is not None else 0,
+            deadline_from(credential.expires_at),
+            deadline_from(credential.retention_expires_at),
+            credential.json(),
+        )
+
+    def persist_credential(self, credential: CredentialOffer) -> None:
+        with self._transaction() as conn:
+            conn.execute(UPSERT_CREDENTIAL, self._credential_row(credential))
+
+    def persist_credentials(self, credentials: List[CredentialOffer]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(UPSERT_CREDENTIAL, [self._credential_row(c) for c in credentials])
+
+    def update_credential(self, credential: CredentialOffer) -> None:
+        self.persist_credential(credential)
+
+    def _load_credential(self, sql: str, *params: object) -> Optional[CredentialOffer]:
+        row = self._connection().execute(sql, params).fetchone()
+        return CredentialOffer.parse_raw(row[0]) if row else None
+
+    def get_credential(self, credential_id: str) -> Optional[CredentialOffer]:
+        direct = self._load_credential(
+            "SELECT data FROM credentials WHERE credential_id = ?", credential_id
+        )
+        if direct:
+            return direct
+        normalized = normalize_credential_id(credential_id)
+        if not normalized:
+            return None
+        return self._load_credential(
+            "SELECT data FROM credentials WHERE normalized_id = ? ORDER BY rowid DESC LIMIT 1",
+            normalized,
+        )
+
+    def get_credential_by_transaction(self, transaction_id: str) -> Optional[CredentialOffer]:
+        return self._load_credential(
+            "SELECT data FROM credentials WHERE transaction_id = ? ORDER BY rowid DESC LIMIT 1",
+            transaction_id,
+        )
+
+    def list_credentials_for_holder(self, holder_did: str) -> List[CredentialOffer]:
+        rows = self._connection().execute(
+            "SELECT data FROM credentials WHERE holder_did = ?", (holder_did,)
+        )
+        return [CredentialOffer.parse_raw(row[0]) for row in rows]
+
+    def revoke_credential(self, credential_id: str) -> None:
+        with self._transaction():
+            credential = self._load_credential(
+                "SELECT data FROM credentials WHERE credential_id = ?", credential_id
+            )
+            if not credential:
+                raise KeyError(f"Unknown credential {credential_id}")
+            credential.status = CredentialStatus.REVOKED
+            credential.last_action_at = datetime.utcnow()
+            credential.retention_expires_at = credential.last_action_at
+            self.update_credential(credential)
+
+    def delete_credential(self, credential_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM credentials WHERE credential_id = ?", (credential_id,))
+
+    # Verification session lifecycle --------------------------------------
+    def persist_verification_session(self, session: VerificationSession) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                UPSERT_SESSION,
+                (
+                    session.session_id,
+                    session.transaction_id,
+                    session.verifier_id,
+                    deadline_from(session.expires_at),
+                    session.json(),
+                ),
+            )
+
+    def _load_session(self, sql: str, *params: object) -> Optional[VerificationSession]:
+        row = self._connection().execute(sql, params).fetchone()
+        return VerificationSession.parse_raw(row[0]) if row else None
+
+    def get_verification_session(self, session_id: str) -> Optional[VerificationSession]:
+        return self._load_session("SELECT data FROM sessions WHERE session_id = ?", session_id)
+
+    def get_verification_session_by_transaction(
+        self, transaction_id: str
+    ) -> Optional[VerificationSession]:
+        return self._load_session(
+            "SELECT data FROM sessions WHERE transaction_id = ? ORDER BY rowid DESC LIMIT 1",
+            transaction_id,
+        )
+
+    def list_active_sessions(self, verifier_id: Optional[str] = None) -> List[VerificationSession]:
+        rows = self._connection().execute(
+            "SELECT data FROM sessions WHERE expires_at >= ? AND (? IS NULL OR verifier_id = ?)",
+            (deadline_from(datetime.utcnow()), verifier_id, verifier_id),
+        )
+        return [VerificationSession.parse_raw(row[0]) for row in rows]
+
+    # Presentation lifecycle ----------------------------------------------
+    def persist_presentation(self, presentation: Presentation) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO presentations "
+                "(presentation_id, session_id, holder_did, data) VALUES (?, ?, ?, ?)",
+                (
+                    presentation.presentation_id,
+                    presentation.session_id,
+                    presentation.holder_did,
+                    presentation.json(),
+                ),
+            )
+
+    def get_presentation(self, presentation_id: str) -> Optional[Presentation]:
+        row = self._connection().execute(
+            "SELECT data FROM presentations WHERE presentation_id = ?", (presentation_id,)
+        ).fetchone()
+        return Presentation.parse_raw(row[0]) if row else None
+
+    def list_presentations_for_session(self, session_id: str) -> List[Presentation]:
+        rows = self._connection().execute(
+            "SELECT data FROM presentations WHERE session_id = ? ORDER BY rowid", (session_id,)
+        )
+        return [Presentation.parse_raw(row[0]) for row in rows]
+
+    def delete_presentation(self, presentation_id: str) -> None:
+        with self._transaction() as conn:
+            deleted = conn.execute(
+                "DELETE FROM presentations WHERE presentation_id = ?", (presentation_id,)
+            ).rowcount
+            if deleted:
+                conn.execute("DELETE FROM results WHERE presentation_id = ?", (presentation_id,))
+
+    # Verification result cache -------------------------------------------
+    def persist_result(self, result: VerificationResult) -> None:
+        presentation = result.presentation
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO results "
+                "(session_id, presentation_id, holder_did, issued_at, data) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (session_id, presentation_id) DO UPDATE SET "
+                "holder_did = excluded.holder_did, issued_at = excluded.issued_at, "
+                "data = excluded.data",
+                (
+                    result.session_id,
+                    presentation.presentation_id,
+                    presentation.holder_did,
+                    deadline_from(presentation.issued_at),
+                    result.json(),
+                ),
+            )
+
+    def get_result(self, session_id: str, presentation_id: str) -> Optional[VerificationResult]:
+        row = self._connection().execute(
+            "SELECT data FROM results WHERE session_id = ? AND presentation_id = ?",
+            (session_id, presentation_id),
+        ).fetchone()
+        return VerificationResult.parse_raw(row[0]) if row else None
+
+    def latest_result_for_session(self, session_id: str) -> Optional[VerificationResult]:
+        row = self._connection().execute(
+            "SELECT data FROM results WHERE session_id = ? "
+            "ORDER BY issued_at DESC, rowid ASC LIMIT 1",
+            (session_id,),
+        ).fetchone()
+        return VerificationResult.parse_raw(row[0]) if row else None
+
+    # Forget / right-to-be-forgotten --------------------------------------
+    def forget_holder(self, holder_did: str) -> ForgetSummary:
+        with self._transaction() as conn:
+            credentials_removed = conn.execute(
+                "DELETE FROM credentials WHERE holder_did = ?", (holder_did,)
+            ).rowcount
+            presentations_removed = conn.execute(
+                "DELETE FROM presentations WHERE holder_did = ?", (holder_did,)
+            ).rowcount
+            results_removed = conn.execute(
+                "DELETE FROM results WHERE holder_did = ?", (holder_did,)
+            ).rowcount
+        return ForgetSummary(
+            holder_did=holder_did,
+            credentials_removed=credentials_removed,
+            presentations_removed=presentations_removed,
+            verification_results_removed=results_removed,
+        )
+
+    def _purge_sessions(self, conn: sqlite3.Connection, session_ids: List[str]) -> None:
+        rows = [(session_id,) for session_id in session_ids]
+        conn.executemany("DELETE FROM results WHERE session_id = ?", rows)
+        conn.executemany("DELETE FROM presentations WHERE session_id = ?", rows)
+        conn.executemany("DELETE FROM sessions WHERE session_id = ?", rows)
+
+    def purge_session(self, session_id: str) -> None:
+        with self._transaction() as conn:
+            self._purge_sessions(conn, [session_id])
+
+    # Housekeeping ---------------------------------------------------------
+    def _housekeeping_batch(self, conn: sqlite3.Connection, reference: datetime) -> int:
+        now = deadline_from(reference)
+        limit = self.housekeeping_batch
+        pickup = DisclosureScope.MEDICATION_PICKUP.value
+        processed = conn.execute(EXPIRE_OFFERS, (now, limit)).rowcount
+        processed += conn.execute(EXPIRE_PICKUP_RETENTION, (now, pickup, limit)).rowcount
+        stamp = reference.isoformat()
+        processed += conn.execute(SEAL_RETENTION, (stamp, stamp, now, pickup, limit)).rowcount
+        session_ids = [row[0] for row in conn.execute(EXPIRED_SESSIONS, (now, limit))]
+        if session_ids:
+            self._purge_sessions(conn, session_ids)
+            processed += len(session_ids)
+        return processed
+
+    def cleanup_expired(
+        self, now: Optional[datetime] = None, budget_seconds: Optional[float] = None
+    ) -> int:
+        """Expire, delete and seal due rows in batches; return the row count."""
+
+        reference = now or datetime.utcnow()
+        stop_at = time.monotonic() + budget_seconds if budget_seconds is not None else None
+        processed = 0
+        while True:
+            with self._transaction() as conn:
+                handled = self._housekeeping_batch(conn, reference)
+            processed += handled
+            if handled == 0 or (stop_at is not None and time.monotonic() >= stop_at):
+                break
+        with self._stats_lock:
+            self.ticks += 1
+            self.last_processed = processed
+            self.total_processed += processed
+        return processed
+
+    def expiry_backlog(self, now: Optional[datetime] = None) -> int:
+        reference = deadline_from(now or datetime.utcnow())
+        pickup = DisclosureScope.MEDICATION_PICKUP.value
+        row = self._connection().execute(
+            "SELECT "
+            "(SELECT COUNT(*) FROM credentials WHERE status = 'OFFERED' AND expires_at < ?) + "
+            "(SELECT COUNT(*) FROM credentials WHERE status = 'ISSUED' "
+            " AND retention_expires_at < ? AND (primary_scope = ? OR has_payload = 1)) + "
+            "(SELECT COUNT(*) FROM sessions WHERE expires_at < ?)",
+            (reference, reference, pickup, reference),
+        ).fetchone()
+        return int(row[0])
+
+    def expiry_metrics(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {
+                "ticks": self.ticks,
+                "last_processed": self.last_processed,
+                "total_processed": self.total_processed,
+            }
+
+    def reset(self) -> None:
+        with self._transaction() as conn:
+            for table in ("results", "presentations", "sessions", "credentials"):
+                conn.execute(f"DELETE FROM {table}")
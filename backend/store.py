@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import os
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, Hashable, Iterator, List, Optional, Set, Tuple, Union
 
+from .expiry import ExpiryScheduler, deadline_from
+from .locks import StripedLock
+from .records import CredentialRecord, RecordCodec
 from .models import (
     CredentialOffer,
     CredentialStatus,
@@ -11,101 +17,225 @@ from .models import (
     Presentation,
     VerificationResult,
     VerificationSession,
+    normalize_credential_id,
 )
 
+if TYPE_CHECKING:  # pragma: no cover - sqlite_store is imported lazily
+    from .sqlite_store import SQLiteStore
+
+
+ResultKey = Tuple[str, str]
+"""(session_id, presentation_id) pair identifying a cached verification result."""
 
-class InMemoryStore:
-    """A tiny in-memory store for demo purposes."""
 
-    def __init__(self) -> None:
-        self._credentials: Dict[str, CredentialOffer] = {}
+class InMemoryStore:
+    """A tiny in-memory store for demo purposes.
+
+    FastAPI runs the sync routes in a threadpool, so mutations are guarded by
+    striped locks: a credential is guarded by its ``("credential", id)``
+    stripe, a session together with its presentations and results by its
+    ``("session", id)`` stripe. Holder indexes use a separate pool of leaf
+    locks that are never held while acquiring entity stripes. Single-key
+    reads (nonce and transaction lookups, polling) take no lock at all.
+
+    With a :class:`RecordCodec` credentials are kept as compact
+    :class:`CredentialRecord` slots and decoded into fresh API models on
+    every read, so callers must persist changes through
+    ``update_credential`` (as every route already does).
+    """
+
+    def __init__(self, *, lock_stripes: int = 64, codec: Optional[RecordCodec] = None) -> None:
+        self._locks = StripedLock(lock_stripes)
+        self._index_locks = StripedLock(lock_stripes)
+        self._codec = codec
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._credentials: Dict[str, Union[CredentialOffer, CredentialRecord]] = {}
         self._transaction_index: Dict[str, str] = {}
-        self._credential_aliases: Dict[str, str] = {}
+        # Normalized ID -> canonical IDs in insertion order. Lookups by URI
+        # or DID form resolve to the most recently inserted credential; when
+        # it is deleted the previous one takes over.
+        self._normalized_ids: Dict[str, Dict[str, None]] = {}
         self._verification_sessions: Dict[str, VerificationSession] = {}
         self._session_index: Dict[str, str] = {}
         self._presentations: Dict[str, Presentation] = {}
-        self._results: Dict[str, VerificationResult] = {}
+        # Per-session structures: presentation IDs and results in insertion
+        # order, plus a cached pointer to the newest result so verifier polls
+        # never scan other sessions.
+        self._session_presentations: Dict[str, Dict[str, None]] = {}
+        self._session_results: Dict[str, Dict[str, VerificationResult]] = {}
+        self._latest_results: Dict[str, VerificationResult] = {}
+        # Secondary indexes keyed by holder DID so wallet listings and
+        # right-to-be-forgotten requests only touch that holder's records.
+        self._holder_credentials: Dict[str, Set[str]] = {}
+        self._holder_presentations: Dict[str, Set[str]] = {}
+        self._holder_results: Dict[str, Set[ResultKey]] = {}
+        self._credential_holders: Dict[str, str] = {}
+        # Offer expiry, retention and session deadlines ordered by time so
+        # cleanup only visits entries that are actually due.
+        self._expiry = ExpiryScheduler()
+
+    # Holder indexes -------------------------------------------------------
+    def _index_add(
+        self, index: Dict[str, Set[Hashable]], holder_did: Optional[str], key: Hashable
+    ) -> None:
+        if holder_did:
+            with self._index_locks.hold(holder_did):
+                index.setdefault(holder_did, set()).add(key)
+
+    def _index_discard(
+        self, index: Dict[str, Set[Hashable]], holder_did: Optional[str], key: Hashable
+    ) -> None:
+        if not holder_did:
+            return
+        with self._index_locks.hold(holder_did):
+            keys = index.get(holder_did)
+            if keys is None:
+                return
+            keys.discard(key)
+            if not keys:
+                index.pop(holder_did, None)
+
+    def _index_members(self, index: Dict[str, Set[Hashable]], holder_did: str) -> List[Hashable]:
+        with self._index_locks.hold(holder_did):
+            return list(index.get(holder_did, ()))
+
+    def _reindex_credential_holder(self, credential: CredentialOffer) -> None:
+        # Credentials are mutated in place before update_credential is called,
+        # so the previously indexed holder is tracked separately.
+        credential_id = credential.credential_id
+        previous = self._credential_holders.get(credential_id)
+        current = credential.holder_did or None
+        if previous == current:
+            return
+        self._index_discard(self._holder_credentials, previous, credential_id)
+        self._index_add(self._holder_credentials, current, credential_id)
+        if current:
+            self._credential_holders[credential_id] = current
+        else:
+            self._credential_holders.pop(credential_id, None)
 
     # Credential lifecycle -------------------------------------------------
     def _normalize_credential_id(self, credential_id: str) -> str:
-        value = (credential_id or "").strip()
-        if not value:
-            return ""
-        candidate = value.split("/")[-1]
-        if ":" in candidate:
-            candidate = candidate.split(":")[-1]
-        return candidate
+        return normalize_credential_id(credential_id)
+
+    def _decode_credential(
+        self, stored: Union[CredentialOffer, CredentialRecord, None]
+    ) -> Optional[CredentialOffer]:
+        if stored is None or self._codec is None:
+            return stored
+        return self._codec.decode_credential(stored)
+
+    def _load_credential(self, credential_id: str) -> Optional[CredentialOffer]:
+        return self._decode_credential(self._credentials.get(credential_id))
 
     def _index_credential(self, credential: CredentialOffer) -> None:
-        self._credentials[credential.credential_id] = credential
+        self._credentials[credential.credential_id] = (
+            self._codec.encode_credential(credential) if self._codec else credential
+        )
         self._transaction_index[credential.transaction_id] = credential.credential_id
         normalized = self._normalize_credential_id(credential.credential_id)
-        self._credential_aliases[credential.credential_id] = credential.credential_id
         if normalized:
-            self._credential_aliases[normalized] = credential.credential_id
+            with self._index_locks.hold(normalized):
+                self._normalized_ids.setdefault(normalized, {})[credential.credential_id] = None
+        self._reindex_credential_holder(credential)
+        self._schedule_credential(credential)
 
     def persist_credential(self, credential: CredentialOffer) -> None:
-        self._index_credential(credential)
+        with self._locks.hold(("credential", credential.credential_id)):
+            self._index_credential(credential)
+
+    def persist_credentials(self, credentials: List[CredentialOffer]) -> None:
+        keys = [("credential", credential.credential_id) for credential in credentials]
+        with self._locks.hold(*keys):
+            for credential in credentials:
+                self._index_credential(credential)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group several store calls; a no-op for the in-memory backend."""
+
+        yield
 
     def get_credential(self, credential_id: str) -> Optional[CredentialOffer]:
-        direct = self._credentials.get(credential_id)
+        """Resolve an exact, URI or DID style credential reference in O(1).
+
+        Exact IDs win; otherwise the reference is normalized and the most
+        recently inserted credential with the same trailing ID is returned.
+        """
+
+        direct = self._load_credential(credential_id)
         if direct:
             return direct
 
         normalized = self._normalize_credential_id(credential_id)
-        if credential_id in self._credential_aliases:
-            mapped = self._credential_aliases[credential_id]
-            found = self._credentials.get(mapped)
-            if found:
-                return found
-        if normalized and normalized in self._credential_aliases:
-            mapped = self._credential_aliases[normalized]
-            found = self._credentials.get(mapped)
-            if found:
-                return found
-
-        if normalized and normalized != credential_id:
-            for stored_id, credential in self._credentials.items():
-                if self._normalize_credential_id(stored_id) == normalized:
-                    self._credential_aliases[normalized] = stored_id
-                    return credential
-        return None
+        if not normalized:
+            return None
+        with self._index_locks.hold(normalized):
+            candidates = self._normalized_ids.get(normalized)
+            canonical = next(reversed(candidates)) if candidates else None
+        if canonical is None:
+            return None
+        return self._load_credential(canonical)
 
     def get_credential_by_transaction(self, transaction_id: str) -> Optional[CredentialOffer]:
         credential_id = self._transaction_index.get(transaction_id)
         if not credential_id:
             return None
-        return self._credentials.get(credential_id)
+        return self._load_credential(credential_id)
 
     def update_credential(self, credential: CredentialOffer) -> None:
-        self._index_credential(credential)
+        with self._locks.hold(("credential", credential.credential_id)):
+            self._index_credential(credential)
 
     def list_credentials_for_holder(self, holder_did: str) -> List[CredentialOffer]:
-        return [c for c in self._credentials.values() if c.holder_did == holder_did]
+        credential_ids = self._index_members(self._holder_credentials, holder_did)
+        credentials = []
+        for credential_id in credential_ids:
+            credential = self._load_credential(credential_id)
+            if credential is not None:
+                credentials.append(credential)
+        return credentials
 
     def revoke_credential(self, credential_id: str) -> None:
-        credential = self._credentials.get(credential_id)
-        if not credential:
-            raise KeyError(f"Unknown credential {credential_id}")
-        credential.status = CredentialStatus.REVOKED
-        credential.last_action_at = datetime.utcnow()
-        credential.retention_expires_at = credential.last_action_at
-        self.update_credential(credential)
+        with self._locks.hold(("credential", credential_id)):
+            credential = self._load_credential(credential_id)
+            if not credential:
+                raise KeyError(f"Unknown credential {credential_id}")
+            credential.status = CredentialStatus.REVOKED
+            credential.last_action_at = datetime.utcnow()
+            credential.retention_expires_at = credential.last_action_at
+            self._index_credential(credential)
 
     def delete_credential(self, credential_id: str) -> None:
+        with self._locks.hold(("credential", credential_id)):
+            self._delete_credential_locked(credential_id)
+
+    def _delete_credential_locked(self, credential_id: str) -> None:
         credential = self._credentials.pop(credential_id, None)
         if credential:
-            self._transaction_index.pop(credential.transaction_id, None)
-            normalized = self._normalize_credential_id(credential.credential_id)
-            self._credential_aliases.pop(credential.credential_id, None)
+            if self._transaction_index.get(credential.transaction_id) == credential_id:
+                self._transaction_index.pop(credential.transaction_id, None)
+            normalized = self._normalize_credential_id(credential_id)
             if normalized:
-                self._credential_aliases.pop(normalized, None)
+                with self._index_locks.hold(normalized):
+                    candidates = self._normalized_ids.get(normalized)
+                    if candidates is not None:
+                        candidates.pop(credential_id, None)
+                        if not candidates:
+                            self._normalized_ids.pop(normalized, None)
+            holder_did = self._credential_holders.pop(credential_id, None)
+            self._index_discard(self._holder_credentials, holder_did, credential_id)
+            self._expiry.cancel(("credential", credential_id))
 
     # Verification session lifecycle --------------------------------------
     def persist_verification_session(self, session: VerificationSession) -> None:
-        self._verification_sessions[session.session_id] = session
-        if session.transaction_id:
-            self._session_index[session.transaction_id] = session.session_id
+        with self._locks.hold(("session", session.session_id)):
+            self._verification_sessions[session.session_id] = session
+            if session.transaction_id:
+                self._session_index[session.transaction_id] = session.session_id
+            self._expiry.schedule(("session", session.session_id), session.expires_at)
 
     def get_verification_session(self, session_id: str) -> Optional[VerificationSession]:
         return self._verification_sessions.get(session_id)
@@ -122,143 +252,299 @@ class InMemoryStore:
         now = datetime.utcnow()
         return [
             s
-            for s in self._verification_sessions.values()
+            for s in list(self._verification_sessions.values())
             if s.is_active(now) and (verifier_id is None or s.verifier_id == verifier_id)
         ]
 
     # Presentation lifecycle ----------------------------------------------
     def persist_presentation(self, presentation: Presentation) -> None:
-        self._presentations[presentation.presentation_id] = presentation
+        with self._locks.hold(("session", presentation.session_id)):
+            self._presentations[presentation.presentation_id] = presentation
+            self._session_presentations.setdefault(presentation.session_id, {})[
+                presentation.presentation_id
+            ] = None
+            self._index_add(
+                self._holder_presentations, presentation.holder_did, presentation.presentation_id
+            )
 
     def get_presentation(self, presentation_id: str) -> Optional[Presentation]:
         return self._presentations.get(presentation_id)
 
     def list_presentations_for_session(self, session_id: str) -> List[Presentation]:
-        return [p for p in self._presentations.values() if p.session_id == session_id]
+        presentation_ids = list(self._session_presentations.get(session_id, ()))
+        presentations = []
+        for pid in presentation_ids:
+            presentation = self._presentations.get(pid)
+            if presentation is not None:
+                presentations.append(presentation)
+        return presentations
 
     def delete_presentation(self, presentation_id: str) -> None:
+        presentation = self._presentations.get(presentation_id)
+        if presentation is None:
+            return
+        with self._locks.hold(("session", presentation.session_id)):
+            self._delete_presentation_locked(presentation_id)
+
+    def _delete_presentation_locked(self, presentation_id: str) -> None:
         presentation = self._presentations.pop(presentation_id, None)
         if presentation:
-            keys_to_remove = [
-                key for key in self._results if key.endswith(f":{presentation.presentation_id}")
-            ]
-            for key in keys_to_remove:
-                self._results.pop(key, None)
+            session_presentations = self._session_presentations.get(presentation.session_id)
+            if session_presentations is not None:
+                session_presentations.pop(presentation_id, None)
+                if not session_presentations:
+                    self._session_presentations.pop(presentation.session_id, None)
+            self._index_discard(
+                self._holder_presentations, presentation.holder_did, presentation_id
+            )
+            self._pop_result(presentation.session_id, presentation_id)
 
     # Verification result cache -------------------------------------------
     def persist_result(self, result: VerificationResult) -> None:
-        key = f"{result.session_id}:{result.presentation.presentation_id}"
-        self._results[key] = result
+        with self._locks.hold(("session", result.session_id)):
+            self._persist_result_locked(result)
+
+    def _persist_result_locked(self, result: VerificationResult) -> None:
+        session_id = result.session_id
+        presentation_id = result.presentation.presentation_id
+        results = self._session_results.setdefault(session_id, {})
+        previous = results.get(presentation_id)
+        if previous is not None:
+            self._index_discard(
+                self._holder_results, previous.presentation.holder_did, (session_id, presentation_id)
+            )
+        results[presentation_id] = result
+        self._index_add(
+            self._holder_results, result.presentation.holder_did, (session_id, presentation_id)
+        )
+        latest = self._latest_results.get(session_id)
+        if latest is not None and latest is previous:
+            self._refresh_latest_result(session_id)
+        elif latest is None or result.presentation.issued_at > latest.presentation.issued_at:
+            self._latest_results[session_id] = result
+
+    def _refresh_latest_result(self, session_id: str) -> None:
+        results = self._session_results.get(session_id)
+        if not results:
+            self._latest_results.pop(session_id, None)
+            return
+        self._latest_results[session_id] = max(
+            results.values(), key=lambda res: res.presentation.issued_at
+        )
+
+    def _pop_result(self, session_id: str, presentation_id: str) -> Optional[VerificationResult]:
+        # Caller holds the session stripe.
+        results = self._session_results.get(session_id)
+        if not results:
+            return None
+        result = results.pop(presentation_id, None)
+        if result is None:
+            return None
+        if not results:
+            self._session_results.pop(session_id, None)
+        self._index_discard(
+            self._holder_results, result.presentation.holder_did, (session_id, presentation_id)
+        )
+        if self._latest_results.get(session_id) is result:
+            self._refresh_latest_result(session_id)
+        return result
 
     def get_result(self, session_id: str, presentation_id: str) -> Optional[VerificationResult]:
-        key = f"{session_id}:{presentation_id}"
-        return self._results.get(key)
+        return self._session_results.get(session_id, {}).get(presentation_id)
 
     def latest_result_for_session(self, session_id: str) -> Optional[VerificationResult]:
-        candidates = [
-            result
-            for key, result in self._results.items()
-            if key.startswith(f"{session_id}:")
-        ]
-        if not candidates:
-            return None
-        candidates.sort(key=lambda res: res.presentation.issued_at, reverse=True)
-        return candidates[0]
+        return self._latest_results.get(session_id)
 
     # Forget / right-to-be-forgotten --------------------------------------
+    def _holder_lock_keys(self, holder_did: str) -> Set[Tuple[str, str]]:
+        keys = {
+            ("credential", credential_id)
+            for credential_id in self._index_members(self._holder_credentials, holder_did)
+        }
+        for presentation_id in self._index_members(self._holder_presentations, holder_did):
+            presentation = self._presentations.get(presentation_id)
+            if presentation is not None:
+                keys.add(("session", presentation.session_id))
+        for session_id, _ in self._index_members(self._holder_results, holder_did):
+            keys.add(("session", session_id))
+        return keys
+
+    @contextmanager
+    def _holding_holder(self, holder_did: str) -> Iterator[None]:
+        """Hold every stripe covering the holder's records.
+
+        Records added for the holder between collecting the keys and taking
+        the locks may need extra stripes, so the set is re-checked under the
+        locks and the acquisition retried until it is stable.
+        """
+
+        while True:
+            keys = self._holder_lock_keys(holder_did)
+            with self._locks.hold(*keys):
+                if self._holder_lock_keys(holder_did) <= keys:
+                    yield
+                    return
+
     def forget_holder(self, holder_did: str) -> ForgetSummary:
-        credential_ids = [
-            credential_id
-            for credential_id, credential in self._credentials.items()
-            if credential.holder_did == holder_did
-        ]
-        for credential_id in credential_ids:
-            credential = self._credentials.pop(credential_id, None)
-            if credential:
-                self._transaction_index.pop(credential.transaction_id, None)
-                normalized = self._normalize_credential_id(credential.credential_id)
-                self._credential_aliases.pop(credential.credential_id, None)
-                if normalized:
-                    self._credential_aliases.pop(normalized, None)
-
-        presentations_to_remove = [
-            pid
-            for pid, presentation in self._presentations.items()
-            if presentation.holder_did == holder_did
-        ]
-        for pid in presentations_to_remove:
-            self.delete_presentation(pid)
+        with self._holding_holder(holder_did):
+            return self._forget_holder_locked(holder_did)
 
-        results_to_remove = [
-            key
-            for key, result in self._results.items()
-            if result.presentation.holder_did == holder_did
-        ]
-        for key in results_to_remove:
-            self._results.pop(key, None)
+    def _forget_holder_locked(self, holder_did: str) -> ForgetSummary:
+        credential_ids = self._index_members(self._holder_credentials, holder_did)
+        presentation_ids = self._index_members(self._holder_presentations, holder_did)
+        result_keys = self._index_members(self._holder_results, holder_did)
+
+        for credential_id in credential_ids:
+            self._delete_credential_locked(credential_id)
+        for presentation_id in presentation_ids:
+            self._delete_presentation_locked(presentation_id)
+        for session_id, presentation_id in result_keys:
+            self._pop_result(session_id, presentation_id)
 
         return ForgetSummary(
             holder_did=holder_did,
             credentials_removed=len(credential_ids),
-            presentations_removed=len(presentations_to_remove),
-            verification_results_removed=len(results_to_remove),
+            presentations_removed=len(presentation_ids),
+            verification_results_removed=len(result_keys),
         )
 
     def purge_session(self, session_id: str) -> None:
-        session = self._verification_sessions.pop(session_id, None)
-        if session and session.transaction_id:
-            self._session_index.pop(session.transaction_id, None)
-        presentations_to_remove = [
-            pid
-            for pid, presentation in self._presentations.items()
-            if presentation.session_id == session_id
-        ]
-        for pid in presentations_to_remove:
-            self.delete_presentation(pid)
-        keys_to_remove = [key for key in self._results if key.startswith(f"{session_id}:")]
-        for key in keys_to_remove:
-            self._results.pop(key, None)
+        with self._locks.hold(("session", session_id)):
+            session = self._verification_sessions.pop(session_id, None)
+            if session and session.transaction_id:
+                self._session_index.pop(session.transaction_id, None)
+            self._expiry.cancel(("session", session_id))
+            for pid in list(self._session_presentations.get(session_id, ())):
+                self._delete_presentation_locked(pid)
+            for pid in list(self._session_results.get(session_id, ())):
+                self._pop_result(session_id, pid)
 
     # Housekeeping ---------------------------------------------------------
-    def cleanup_expired(self, now: Optional[datetime] = None) -> None:
-        reference = now or datetime.utcnow()
+    def _schedule_credential(self, credential: CredentialOffer) -> None:
+        key = ("credential", credential.credential_id)
+        if credential.status == CredentialStatus.OFFERED:
+            self._expiry.schedule(key, credential.expires_at)
+        elif credential.status == CredentialStatus.ISSUED and (
+            credential.primary_scope == DisclosureScope.MEDICATION_PICKUP
+            or credential.payload is not None
+        ):
+            self._expiry.schedule(key, credential.retention_expires_at)
+        else:
+            # Declined, revoked and already sealed credentials need no
+            # further housekeeping.
+            self._expiry.cancel(key)
+
+    def _expire_credential(self, credential_id: str, reference: datetime) -> None:
+        with self._locks.hold(("credential", credential_id)):
+            credential = self._load_credential(credential_id)
+            if credential is None:
+                return
+            now = deadline_from(reference)
+
+            # Expire credential offers that were never accepted
+            if credential.status == CredentialStatus.OFFERED:
+                if now > deadline_from(credential.expires_at):
+                    self.delete_credential(credential_id)
+                    return
+
+            # Seal or remove issued credentials whose retention elapsed
+            elif credential.status == CredentialStatus.ISSUED:
+                retention = deadline_from(credential.retention_expires_at)
+                if retention is not None and now > retention:
+                    if credential.primary_scope == DisclosureScope.MEDICATION_PICKUP:
+                        self.delete_credential(credential_id)
+                        return
+                    if credential.payload is not None:
+                        credential.payload = None
+                        credential.selected_disclosures.clear()
+                        credential.sealed_at = reference
+                        credential.last_action_at = reference
+                        self.update_credential(credential)
+                        return
+
+            # The offer changed without going through update_credential; put
+            # it back on the schedule according to its current state.
+            self._schedule_credential(credential)
+
+    def _expire_session(self, session_id: str, reference: datetime) -> None:
+        with self._locks.hold(("session", session_id)):
+            session = self._verification_sessions.get(session_id)
+            if session is None:
+                return
+            if deadline_from(reference) > deadline_from(session.expires_at):
+                self.purge_session(session_id)
+            else:
+                self._expiry.schedule(("session", session_id), session.expires_at)
+
+    def cleanup_expired(
+        self, now: Optional[datetime] = None, budget_seconds: Optional[float] = None
+    ) -> int:
+        """Process scheduled deadlines that have passed and return the count.
+
+        With ``budget_seconds`` the tick stops once the budget is spent and
+        leaves the remaining due entries for the next call. Each entry is
+        expired under its own stripe, so request threads are never blocked
+        for the whole tick.
+        """
 
-        # Expire credential offers that were never accepted
-        expired_offers = [
-            credential_id
-            for credential_id, credential in self._credentials.items()
-            if credential.status == CredentialStatus.OFFERED
-            and reference > credential.expires_at
-        ]
-        for credential_id in expired_offers:
-            self.delete_credential(credential_id)
-
-        # Seal or remove issued credentials whose retention elapsed
-        for credential in list(self._credentials.values()):
-            if credential.status != CredentialStatus.ISSUED:
-                continue
-            if credential.retention_expires_at and reference > credential.retention_expires_at:
-                if credential.primary_scope == DisclosureScope.MEDICATION_PICKUP:
-                    self.delete_credential(credential.credential_id)
-                    continue
-                if credential.payload is not None:
-                    credential.payload = None
-                    credential.selected_disclosures.clear()
-                    credential.sealed_at = reference
-                    credential.last_action_at = reference
-                    self.update_credential(credential)
-
-        # Remove expired verification sessions
-        expired_sessions = [
-            session_id
-            for session_id, session in self._verification_sessions.items()
-            if not session.is_active(reference)
-        ]
-        for session_id in expired_sessions:
-            self.purge_session(session_id)
+        reference = now or datetime.utcnow()
+        stop_at = time.monotonic() + budget_seconds if budget_seconds is not None else None
+        processed = 0
+        while stop_at is None or time.monotonic() < stop_at:
+            key = self._expiry.pop_due(reference)
+            if key is None:
+                break
+            kind, identifier = key
+            if kind == "credential":
+                self._expire_credential(identifier, reference)
+            else:
+                self._expire_session(identifier, reference)
+            processed += 1
+        self._expiry.record_tick(processed)
+        return processed
+
+    def expiry_backlog(self, now: Optional[datetime] = None) -> int:
+        return self._expiry.due_count(now or datetime.utcnow())
+
+    def expiry_metrics(self) -> Dict[str, int]:
+        return self._expiry.metrics()
 
     def reset(self) -> None:
-        self.__init__()
+        with self._locks.hold_all():
+            self._init_state()
+
+
+# Any backend ``create_store`` may return. SQLiteStore mirrors the public
+# InMemoryStore methods but is not a subclass, so only those are shared.
+StoreBackend = Union[InMemoryStore, "SQLiteStore"]
+
+
+def create_store() -> StoreBackend:
+    """Build the store selected by ``MEDSSI_STORE_BACKEND`` (``memory`` or ``sqlite``).
+
+    The in-memory backend becomes durable when ``MEDSSI_STORE_JOURNAL_DIR``
+    names a directory for its write-ahead log and snapshots, and keeps
+    credentials as compact records when ``MEDSSI_STORE_COMPACT=1``.
+    """
+
+    backend = os.getenv("MEDSSI_STORE_BACKEND", "memory").strip().lower()
+    if backend == "sqlite":
+        from .sqlite_store import SQLiteStore
+
+        return SQLiteStore(os.getenv("MEDSSI_SQLITE_PATH", "medssi.sqlite3"))
+    codec = RecordCodec() if os.getenv("MEDSSI_STORE_COMPACT", "0") in {"1", "true", "True"} else None
+    journal_dir = os.getenv("MEDSSI_STORE_JOURNAL_DIR", "").strip()
+    if journal_dir:
+        from .journal import JournaledStore
+
+        return JournaledStore(
+            journal_dir,
+            codec=codec,
+            commit_interval=float(os.getenv("MEDSSI_JOURNAL_COMMIT_MS", "2")) / 1000,
+            durable=os.getenv("MEDSSI_JOURNAL_DURABLE", "1") not in {"0", "false", "False"},
+            snapshot_interval=float(os.getenv("MEDSSI_SNAPSHOT_INTERVAL_SECONDS", "300")),
+        )
+    return InMemoryStore(codec=codec)
 
 
-store = InMemoryStore()
+store: StoreBackend = create_store()
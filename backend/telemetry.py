@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# Upper bounds in milliseconds; sandbox calls range from a few ms (cached
+# edge) to the 15 s read timeout.
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 15000, 30000,
+)
+
+LABELS = ("base", "operation", "status", "error")
+
+
+def status_class(status: Optional[int]) -> str:
+    return f"{status // 100}xx" if status else "none"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Series:
+    __slots__ = ("counts", "count", "sum_ms", "max_ms")
+
+    def __init__(self, buckets: int) -> None:
+        self.counts = [0] * (buckets + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+
+class UpstreamTelemetry:
+    """Latency histograms for upstream calls, one series per label set.
+
+    Labels are the sandbox base URL, the logical operation, the response
+    status class (``2xx``..``5xx``, or ``none`` when no response arrived)
+    and the error kind (``none``, ``connection``, ``timeout``,
+    ``pool_exhausted``, ``circuit_open``). Observing is a bisect and a few
+    additions under one lock, cheap enough to stay on in production.
+    Counters are per process, like the other system metrics.
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS, *, enabled: bool = True) -> None:
+        self.buckets_ms = tuple(sorted(float(bound) for bound in buckets_ms))
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str, str], _Series] = {}
+
+    def observe(
+        self,
+        base: str,
+        operation: str,
+        elapsed: float,
+        *,
+        status: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        elapsed_ms = elapsed * 1000
+        key = (base, operation, status_class(status), error or "none")
+        index = bisect.bisect_left(self.buckets_ms, elapsed_ms)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets_ms))
+            series.counts[index] += 1
+            series.count += 1
+            series.sum_ms += elapsed_ms
+            if elapsed_ms > series.max_ms:
+                series.max_ms = elapsed_ms
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def _snapshot(self) -> List[Tuple[Tuple[str, str, str, str], List[int], int, float, float]]:
+        with self._lock:
+            return [
+                (key, list(series.counts), series.count, series.sum_ms, series.max_ms)
+                for key, series in sorted(self._series.items())
+            ]
+
+    def _quantile(self, counts: List[int], total: int, max_ms: float, q: float) -> float:
+        # Linear interpolation inside the bucket, as histogram_quantile does.
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for index, count in enumerate(counts):
+            upper = self.buckets_ms[index] if index < len(self.buckets_ms) else max_ms
+            if count and seen + count >= rank:
+                return round(min(lower + (upper - lower) * (rank - seen) / count, max_ms), 3)
+            seen += count
+            lower = upper
+        return round(max_ms, 3)
+
+    # Exposition ----------------------------------------------------------------
+    def metrics(self) -> Dict[str, Any]:
+        series = []
+        for key, counts, total, sum_ms, max_ms in self._snapshot():
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets_ms, counts):
+                running += count
+                cumulative[_number(bound)] = running
+            cumulative["+Inf"] = total
+            series.append(
+                {
+                    **dict(zip(LABELS, key)),
+                    "count": total,
+                    "sum_ms": round(sum_ms, 3),
+                    "mean_ms": round(sum_ms / total, 3) if total else 0.0,
+                    "max_ms": round(max_ms, 3),
+                    "p50_ms": self._quantile(counts, total, max_ms, 0.5),
+                    "p90_ms": self._quantile(counts, total, max_ms, 0.9),
+                    "p99_ms": self._quantile(counts, total, max_ms, 0.99),
+                    "buckets": cumulative,
+                }
+            )
+        return {"enabled": self.enabled, "buckets_ms": list(self.buckets_ms), "series": series}
+
+    def prometheus(self, name: str = "medssi_upstream_request_duration_seconds") -> str:
+        lines = [
+            f"# HELP {name} Latency of calls to the MODA sandbox APIs.",
+            f"# TYPE {name} histogram",
+        ]
+        for key, counts, total, sum_ms, _max_ms in self._snapshot():
+            labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(LABELS, key))
+            running = 0
+            for bound, count in zip(self.buckets_ms, counts):
+                running += count
+                lines.append(f'{name}_bucket{{{labels},le="{_number(bound / 1000)}"}} {running}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {total}')
+            lines.append(f"{name}_sum{{{labels}}} {_number(sum_ms / 1000)}")
+            lines.append(f"{name}_count{{{labels}}} {total}")
+        return "\n".join(lines) + "\n"
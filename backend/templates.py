@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from .models import CredentialPayload, DisclosurePolicy, DisclosureScope
+
+
+class VCTemplate(NamedTuple):
+    """Request-independent issuance defaults for one MODA VC type."""
+
+    slug: str
+    scope: DisclosureScope
+    sample_values: Dict[str, str]
+    field_order: List[str]
+    policy_fields: List[str]
+    policies: List[DisclosurePolicy]
+    payload: CredentialPayload
+
+
+class TemplateSet(NamedTuple):
+    """Every :class:`VCTemplate` plus the shared sample payload for one day.
+
+    ``sample_fields`` is ``sample.dict()``; callers merge overrides into a
+    shallow copy of it and only re-validate the top-level fields they
+    touched, sharing the rest with ``sample``. Nothing here may be mutated
+    in place.
+    """
+
+    day: date
+    sample: CredentialPayload
+    sample_fields: Dict[str, Any]
+    default_policies: List[DisclosurePolicy]
+    templates: Dict[str, VCTemplate]
+    fallback: VCTemplate
+
+    def get(self, slug: str) -> VCTemplate:
+        return self.templates.get(slug, self.fallback)
+
+
+class TemplateRegistry:
+    """Holds the current :class:`TemplateSet`, rebuilt when the date changes.
+
+    Sample payloads and MODA field defaults contain dates relative to
+    today, so ``build`` takes the day and the set is rebuilt on the first
+    call after local midnight. Concurrent callers at the rollover wait for
+    a single rebuild; everyone else reads the current set without locking.
+    """
+
+    def __init__(self, build: Callable[[date], TemplateSet], *, clock: Callable[[], date] = date.today) -> None:
+        self.build = build
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._current: Optional[TemplateSet] = None
+        self.builds = 0
+        self.build_ms = 0.0
+
+    def current(self) -> TemplateSet:
+        day = self.clock()
+        current = self._current
+        if current is not None and current.day == day:
+            return current
+        with self._lock:
+            if self._current is None or self._current.day != day:
+                self._rebuild(day)
+            return self._current
+
+    def rebuild(self) -> TemplateSet:
+        with self._lock:
+            self._rebuild(self.clock())
+            return self._current
+
+    def _rebuild(self, day: date) -> None:
+        # Caller holds the lock.
+        started = time.perf_counter()
+        self._current = self.build(day)
+        self.build_ms = (time.perf_counter() - started) * 1000
+        self.builds += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        current = self._current
+        return {
+            "day": current.day.isoformat() if current else None,
+            "templates": sorted(current.templates) if current else [],
+            "builds": self.builds,
+            "build_ms": self.build_ms,
+        }
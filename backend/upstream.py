@@ -0,0 +1,494 @@
+from __future__ import annotations
+
+import asyncio
+import http.client
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Mapping, Optional, Tuple
+
+try:  # pragma: no cover - optional dependency for non-blocking upstream calls
+    import httpx
+except Exception:  # pragma: no cover - fall back to the pooled sync client
+    httpx = None
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+# while it sat idle; the request never reached the application.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+    ConnectionAbortedError,
+)
+
+
+class UpstreamError(Exception):
+    """Raised when the upstream host cannot be reached or stops responding.
+
+    ``kind`` is a coarse label for metrics: ``connection``, ``timeout``,
+    ``pool_exhausted``, ``circuit_open`` or ``blocked`` (refused by a
+    ``peer_check``).
+    """
+
+    def __init__(self, reason: str, kind: str = "connection") -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.kind = kind
+
+
+class UpstreamResponse:
+    __slots__ = ("status", "reason", "headers", "body", "charset")
+
+    def __init__(
+        self,
+        status: int,
+        reason: str,
+        headers: Mapping[str, str],
+        body: bytes,
+        charset: Optional[str] = None,
+    ) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.charset = charset
+
+
+class _PooledHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection that resumes the pool's last TLS session."""
+
+    def __init__(self, host: str, port: Optional[int], *, pool: "HostPool", **kwargs: Any) -> None:
+        super().__init__(host, port, **kwargs)
+        self._pool = pool
+
+    def connect(self) -> None:
+        # TCP connect and optional proxy CONNECT, then the TLS handshake.
+        http.client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=server_hostname, session=self._pool.tls_session
+        )
+        if self.sock.session_reused:
+            self._pool.count("tls_resumed")
+
+
+class HostPool:
+    """Keep-alive connections to one ``scheme://host:port``.
+
+    At most ``max_size`` connections exist at a time; callers beyond that
+    wait for a connection to be released and the wait is recorded. Idle
+    connections older than ``idle_seconds`` are dropped instead of reused.
+    ``peer_check(host, address)`` sees the address each new connection
+    actually reached (not a separate DNS answer) and may refuse it before
+    anything is sent; behind a proxy the peer is the proxy, so it is skipped.
+    """
+
+    def __init__(
+        self,
+        scheme: str,
+        host: str,
+        port: int,
+        *,
+        max_size: int,
+        connect_timeout: float,
+        read_timeout: float,
+        idle_seconds: float,
+        pool_timeout: float,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        peer_check: Optional[Callable[[str, str], Optional[str]]] = None,
+    ) -> None:
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.max_size = max(max_size, 1)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_seconds = idle_seconds
+        self.pool_timeout = pool_timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.tls_session: Optional[ssl.SSLSession] = None
+        self.peer_check = peer_check
+        self._proxy = self._proxy_for(scheme, host)
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._idle: Deque[Tuple[http.client.HTTPConnection, float]] = deque()
+        self._in_use = 0
+        self._stats: Dict[str, float] = {
+            "requests": 0,
+            "opened": 0,
+            "reused": 0,
+            "tls_resumed": 0,
+            "closed": 0,
+            "stale_retries": 0,
+            "errors": 0,
+            "blocked": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+    @staticmethod
+    def _proxy_for(scheme: str, host: str) -> Optional[Tuple[str, int]]:
+        # urllib honoured HTTP(S)_PROXY / NO_PROXY; keep doing so.
+        proxy = urllib.request.getproxies().get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        parsed = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+        return parsed.hostname or "", parsed.port or 80
+
+    def count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    # Connection management ----------------------------------------------
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            if self._proxy:
+                conn: http.client.HTTPConnection = _PooledHTTPSConnection(
+                    self._proxy[0], self._proxy[1], pool=self,
+                    timeout=self.connect_timeout, context=self.ssl_context,
+                )
+                conn.set_tunnel(self.host, self.port)
+            else:
+                conn = _PooledHTTPSConnection(
+                    self.host, self.port, pool=self,
+                    timeout=self.connect_timeout, context=self.ssl_context,
+                )
+        elif self._proxy:
+            conn = http.client.HTTPConnection(
+                self._proxy[0], self._proxy[1], timeout=self.connect_timeout
+            )
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+        conn.connect()
+        if self.peer_check is not None and not self._proxy:
+            blocked = self.peer_check(self.host, conn.sock.getpeername()[0])
+            if blocked is not None:
+                conn.close()
+                self.count("blocked")
+                raise UpstreamError(blocked, "blocked")
+        # The connect timeout covered TCP + TLS; reads get their own budget.
+        conn.sock.settimeout(self.read_timeout)
+        self.count("opened")
+        return conn
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            if not self._slots.acquire(timeout=self.pool_timeout):
+                raise UpstreamError(f"Connection pool for {self.host} exhausted", "pool_exhausted")
+            waited = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats["waits"] += 1
+                self._stats["wait_ms_total"] += waited
+                self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited)
+        now = time.monotonic()
+        with self._lock:
+            self._in_use += 1
+            while self._idle:
+                conn, idle_since = self._idle.pop()
+                if now - idle_since <= self.idle_seconds:
+                    self._stats["reused"] += 1
+                    return conn, True
+                conn.close()
+                self._stats["closed"] += 1
+        try:
+            return self._new_connection(), False
+        except (OSError, http.client.HTTPException) as exc:
+            self._release(None)
+            self.count("errors")
+            if isinstance(exc, socket.timeout):
+                raise UpstreamError("connect timed out", "timeout") from None
+            raise UpstreamError(str(exc) or exc.__class__.__name__) from None
+        except BaseException:
+            self._release(None)
+            raise
+
+    def _release(self, conn: Optional[http.client.HTTPConnection]) -> None:
+        with self._lock:
+            self._in_use -= 1
+            if conn is not None:
+                self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    def _discard(self, conn: http.client.HTTPConnection) -> None:
+        conn.close()
+        self.count("closed")
+        self._release(None)
+
+    # Requests -----------------------------------------------------------
+    def _target(self, path: str) -> str:
+        if self.scheme == "http" and self._proxy:
+            return f"http://{self.host}:{self.port}{path}"
+        return path
+
+    def request(
+        self, method: str, path: str, body: Optional[bytes], headers: Mapping[str, str]
+    ) -> UpstreamResponse:
+        self.count("requests")
+        for attempt in range(2):
+            conn, reused = self._acquire()
+            sent = False
+            try:
+                conn.request(method, self._target(path), body=body, headers=dict(headers))
+                sent = True
+                response = conn.getresponse()
+                payload = response.read()
+            except _STALE_ERRORS as exc:
+                self._discard(conn)
+                # Retry once on a fresh connection when a reused one turned
+                # out to be closed, unless a non-idempotent request may have
+                # already been processed.
+                if reused and attempt == 0 and (not sent or method in IDEMPOTENT_METHODS):
+                    self.count("stale_retries")
+                    continue
+                self.count("errors")
+                raise UpstreamError(str(exc) or exc.__class__.__name__) from None
+            except (OSError, http.client.HTTPException) as exc:
+                self._discard(conn)
+                self.count("errors")
+                if isinstance(exc, socket.timeout):
+                    raise UpstreamError("timed out", "timeout") from None
+                raise UpstreamError(str(exc) or exc.__class__.__name__) from None
+            if isinstance(conn.sock, ssl.SSLSocket) and conn.sock.session is not None:
+                self.tls_session = conn.sock.session
+            if response.will_close:
+                self._discard(conn)
+            else:
+                self._release(conn)
+            return UpstreamResponse(
+                response.status,
+                response.reason,
+                response.headers,
+                payload,
+                response.headers.get_content_charset(),
+            )
+        raise UpstreamError("unreachable")  # pragma: no cover
+
+    def close(self) -> None:
+        with self._lock:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
+                self._stats["closed"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(
+                {
+                    "max_size": self.max_size,
+                    "in_use": self._in_use,
+                    "idle": len(self._idle),
+                    "connect_timeout": self.connect_timeout,
+                    "read_timeout": self.read_timeout,
+                }
+            )
+        return stats
+
+
+class UpstreamClient:
+    """Shared keep-alive client with one :class:`HostPool` per upstream origin."""
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 15.0,
+        idle_seconds: float = 30.0,
+        pool_timeout: float = 10.0,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        peer_check: Optional[Callable[[str, str], Optional[str]]] = None,
+    ) -> None:
+        self.max_size = max_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_seconds = idle_seconds
+        self.pool_timeout = pool_timeout
+        self.ssl_context = ssl_context
+        self.peer_check = peer_check
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple[str, str, int], HostPool] = {}
+
+    def pool_for(self, url: str) -> Tuple[HostPool, str]:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in {"http", "https"} or not parts.hostname:
+            raise UpstreamError(f"Unsupported upstream URL {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = HostPool(
+                    scheme,
+                    parts.hostname,
+                    port,
+                    max_size=self.max_size,
+                    connect_timeout=self.connect_timeout,
+                    read_timeout=self.read_timeout,
+                    idle_seconds=self.idle_seconds,
+                    pool_timeout=self.pool_timeout,
+                    ssl_context=self.ssl_context,
+                    peer_check=self.peer_check,
+                )
+                self._pools[key] = pool
+        return pool, path
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> UpstreamResponse:
+        pool, path = self.pool_for(url)
+        return pool.request(method.upper(), path, body, headers or {})
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            pools = dict(self._pools)
+        return {
+            f"{scheme}://{host}:{port}": pool.metrics()
+            for (scheme, host, port), pool in pools.items()
+        }
+
+
+class AsyncUpstreamClient:
+    """Non-blocking counterpart of :class:`UpstreamClient` for async routes.
+
+    Uses one pooled ``httpx.AsyncClient`` (keep-alive, same timeouts as the
+    sync client) so a slow upstream costs a coroutine per waiting request
+    instead of a threadpool slot. Its connection limit is separate from the
+    sync pool's ``max_size``: ``max_connections`` in total (default 1000),
+    beyond which requests wait up to ``pool_timeout`` and then fail with
+    ``pool_exhausted``. Without httpx installed, requests run the sync
+    client (and its smaller pool) in a worker thread.
+    """
+
+    def __init__(self, sync_client: UpstreamClient, *, max_connections: int = 1000) -> None:
+        self.sync_client = sync_client
+        self.max_connections = max(max_connections, 1)
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def backend(self) -> str:
+        return "httpx" if httpx is not None else "threadpool"
+
+    def _host_stats(self, url: str) -> Dict[str, float]:
+        parts = urllib.parse.urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "in_flight": 0,
+                    "max_in_flight": 0,
+                    "latency_ms_total": 0.0,
+                }
+            return stats
+
+    def _http_client(self) -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            sync = self.sync_client
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    connect=sync.connect_timeout,
+                    read=sync.read_timeout,
+                    write=sync.read_timeout,
+                    pool=sync.pool_timeout,
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=sync.idle_seconds,
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    async def _send(
+        self, method: str, url: str, body: Optional[bytes], headers: Mapping[str, str]
+    ) -> UpstreamResponse:
+        if httpx is None:
+            return await asyncio.to_thread(
+                self.sync_client.request, method, url, body=body, headers=headers
+            )
+        try:
+            response = await self._http_client().request(
+                method, url, content=body, headers=dict(headers)
+            )
+        except httpx.PoolTimeout:
+            host = urllib.parse.urlsplit(url).hostname
+            raise UpstreamError(f"Connection pool for {host} exhausted", "pool_exhausted") from None
+        except httpx.TimeoutException:
+            raise UpstreamError("timed out", "timeout") from None
+        except httpx.HTTPError as exc:
+            raise UpstreamError(str(exc) or exc.__class__.__name__) from None
+        return UpstreamResponse(
+            response.status_code,
+            response.reason_phrase,
+            response.headers,
+            response.content,
+            response.charset_encoding,
+        )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> UpstreamResponse:
+        stats = self._host_stats(url)
+        with self._lock:
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        started = time.perf_counter()
+        try:
+            return await self._send(method.upper(), url, body, headers or {})
+        except UpstreamError:
+            with self._lock:
+                stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                stats["in_flight"] -= 1
+                stats["latency_ms_total"] += (time.perf_counter() - started) * 1000
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = {key: dict(stats) for key, stats in self._stats.items()}
+        return {"backend": self.backend, "max_connections": self.max_connections, "hosts": hosts}
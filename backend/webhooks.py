@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import heapq
+import ipaddress
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import AbstractSet, Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .upstream import UpstreamClient, UpstreamError
+
+
+# 4xx answers worth retrying; every other 4xx means the batch will never land.
+RETRYABLE_CLIENT_STATUSES = frozenset({408, 409, 425, 429})
+
+
+def _address_block_reason(host: str, address: str) -> Optional[str]:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    if not ip.is_global or ip.is_multicast:
+        return f"{host} resolves to non-public address {ip}"
+    return None
+
+
+def callback_block_reason(url: str, allowed_hosts: AbstractSet[str] = frozenset()) -> Optional[str]:
+    """Why results must not be POSTed to ``url``, or ``None`` if they may.
+
+    Hosts listed in ``allowed_hosts`` are always accepted. Any other host
+    must resolve, and only to public addresses: loopback, private, shared,
+    link-local (cloud metadata), multicast, reserved and unspecified
+    addresses are refused so a verifier cannot point webhooks at internal
+    services. This is an early check; :func:`callback_peer_block_reason`
+    enforces the same rule on the connection itself.
+    """
+
+    parsed = urlsplit(url)
+    host = (parsed.hostname or "").lower()
+    if not host:
+        return "callback URL has no host"
+    if host in allowed_hosts:
+        return None
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError, ValueError):
+        return f"{host} does not resolve"
+    for info in infos:
+        blocked = _address_block_reason(host, str(info[4][0]))
+        if blocked is not None:
+            return blocked
+    return None
+
+
+def callback_peer_block_reason(
+    host: str, address: str, allowed_hosts: AbstractSet[str] = frozenset()
+) -> Optional[str]:
+    """``peer_check`` for the webhook client: refuse a connected internal peer.
+
+    Runs on the address the socket actually connected to, so a host whose
+    DNS answer changes between :func:`callback_block_reason` and the connect
+    (DNS rebinding) is still refused before anything is sent.
+    """
+
+    if host.lower() in allowed_hosts:
+        return None
+    return _address_block_reason(host, address)
+
+
+class WebhookDispatcher:
+    """Background POST delivery of events to registered callback URLs.
+
+    ``enqueue`` never blocks the request path: events go into a bounded
+    queue (a full queue dead-letters the event). A single worker thread
+    waits ``batch_wait`` after the first event so that results for the same
+    URL can share one POST of up to ``batch_size`` events. Transport
+    errors, 5xx and throttling answers are retried with jittered exponential
+    backoff; batches that exhaust ``max_attempts`` or get a permanent 4xx
+    land in a bounded dead-letter list that can be re-queued.
+
+    Delivery is serial: the one worker POSTs batch after batch, so a slow
+    receiver (up to the client's read timeout on every attempt) delays
+    delivery to every other URL behind it. ``guard`` is consulted right
+    before each POST (see :func:`callback_block_reason`) and the client's
+    ``peer_check`` on every new connection; a URL refused by either is
+    dead-lettered without a request being sent.
+    """
+
+    def __init__(
+        self,
+        client: UpstreamClient,
+        *,
+        queue_size: int = 1000,
+        batch_size: int = 20,
+        batch_wait: float = 0.2,
+        max_attempts: int = 6,
+        backoff_seconds: float = 1.0,
+        backoff_max_seconds: float = 60.0,
+        dead_letter_size: int = 500,
+        secret: Optional[str] = None,
+        guard: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> None:
+        self.client = client
+        self.guard = guard
+        self.queue_size = max(queue_size, 1)
+        self.batch_size = max(batch_size, 1)
+        self.batch_wait = batch_wait
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._secret = secret.encode("utf-8") if secret else None
+        self._cond = threading.Condition()
+        self._queue: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._retries: List[Tuple[float, int, str, List[Dict[str, Any]], int]] = []
+        self._sequence = itertools.count()
+        self._dead: Deque[Dict[str, Any]] = deque(maxlen=max(dead_letter_size, 1))
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self.enqueued = 0
+        self.delivered_events = 0
+        self.delivered_batches = 0
+        self.failed_attempts = 0
+        self.dead_lettered = 0
+
+    # Producer side ----------------------------------------------------------
+    def enqueue(self, url: str, event: Dict[str, Any]) -> bool:
+        """Queue ``event`` for ``url``; ``False`` if it was dead-lettered."""
+
+        with self._cond:
+            if len(self._queue) >= self.queue_size:
+                self._dead_letter(url, [event], 0, "queue full")
+                return False
+            self._queue.append((url, event))
+            self.enqueued += 1
+            self._ensure_worker()
+            self._cond.notify()
+            return True
+
+    def redeliver_dead_letters(self) -> int:
+        """Move every dead-lettered batch back to the retry schedule."""
+
+        with self._cond:
+            letters = list(self._dead)
+            self._dead.clear()
+            now = time.monotonic()
+            for letter in letters:
+                self._schedule(now, letter["url"], letter["events"], 0)
+            if letters:
+                self._ensure_worker()
+                self._cond.notify()
+            return len(letters)
+
+    def _ensure_worker(self) -> None:
+        # Caller holds _cond. Started lazily so a prefork parent never owns it.
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="webhook-dispatcher", daemon=True)
+            self._worker.start()
+
+    # Worker side ------------------------------------------------------------
+    def _schedule(self, due: float, url: str, events: List[Dict[str, Any]], attempts: int) -> None:
+        heapq.heappush(self._retries, (due, next(self._sequence), url, events, attempts))
+
+    def _dead_letter(self, url: str, events: List[Dict[str, Any]], attempts: int, error: str) -> None:
+        # Caller holds _cond.
+        self.dead_lettered += len(events)
+        self._dead.append(
+            {
+                "url": url,
+                "events": events,
+                "attempts": attempts,
+                "error": error,
+                "failed_at": datetime.utcnow().isoformat(),
+            }
+        )
+
+    def _take_work(self) -> Optional[List[Tuple[str, List[Dict[str, Any]], int]]]:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                due = bool(self._retries) and self._retries[0][0] <= now
+                if self._queue or due or self._closed:
+                    break
+                timeout = self._retries[0][0] - now if self._retries else None
+                self._cond.wait(timeout)
+            if self._closed and not self._queue:
+                for _due, _seq, url, events, attempts in self._retries:
+                    self._dead_letter(url, events, attempts, "shut down")
+                self._retries.clear()
+                return None
+            collect = bool(self._queue) and not self._closed
+
+        if collect and self.batch_wait:
+            time.sleep(self.batch_wait)
+
+        work: List[Tuple[str, List[Dict[str, Any]], int]] = []
+        with self._cond:
+            grouped: Dict[str, List[Dict[str, Any]]] = {}
+            while self._queue:
+                url, event = self._queue.popleft()
+                grouped.setdefault(url, []).append(event)
+            for url, events in grouped.items():
+                for start in range(0, len(events), self.batch_size):
+                    work.append((url, events[start : start + self.batch_size], 0))
+            now = time.monotonic()
+            while self._retries and self._retries[0][0] <= now:
+                _due, _seq, url, events, attempts = heapq.heappop(self._retries)
+                work.append((url, events, attempts))
+        return work
+
+    def _run(self) -> None:
+        while True:
+            work = self._take_work()
+            if work is None:
+                return
+            for url, events, attempts in work:
+                self._deliver(url, events, attempts)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_seconds * (2 ** (attempts - 1)), self.backoff_max_seconds)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _deliver(self, url: str, events: List[Dict[str, Any]], attempts: int) -> None:
+        body = json.dumps({"events": events}, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json", "X-MedSSI-Event-Count": str(len(events))}
+        if self._secret:
+            digest = hmac.new(self._secret, body, hashlib.sha256).hexdigest()
+            headers["X-MedSSI-Signature"] = f"sha256={digest}"
+
+        attempts += 1
+        blocked = self.guard(url) if self.guard is not None else None
+        if blocked is not None:
+            with self._cond:
+                self.failed_attempts += 1
+                self._dead_letter(url, events, attempts, f"blocked: {blocked}")
+            return
+        try:
+            response = self.client.request("POST", url, body=body, headers=headers)
+            status: Optional[int] = response.status
+            error = f"HTTP {response.status}"
+        except UpstreamError as exc:
+            if exc.kind == "blocked":
+                with self._cond:
+                    self.failed_attempts += 1
+                    self._dead_letter(url, events, attempts, f"blocked: {exc.reason}")
+                return
+            status = None
+            error = exc.reason
+
+        with self._cond:
+            if status is not None and 200 <= status < 300:
+                self.delivered_batches += 1
+                self.delivered_events += len(events)
+                return
+            self.failed_attempts += 1
+            permanent = status is not None and 400 <= status < 500 and status not in RETRYABLE_CLIENT_STATUSES
+            if permanent or attempts >= self.max_attempts:
+                self._dead_letter(url, events, attempts, error)
+                return
+            self._schedule(time.monotonic() + self._backoff(attempts), url, events, attempts)
+
+    # Lifecycle ----------------------------------------------------------------
+    def close(self, timeout: float = 5.0) -> None:
+        """Deliver what is queued once more, then stop the worker.
+
+        Pending retries are dead-lettered. The next ``enqueue`` starts a new
+        worker, so an app that is started again keeps delivering.
+        """
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout=timeout)
+        with self._cond:
+            self._closed = False
+
+    # Introspection ------------------------------------------------------------
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "queue_size": self.queue_size,
+                "retrying": sum(len(entry[3]) for entry in self._retries),
+                "enqueued": self.enqueued,
+                "delivered_events": self.delivered_events,
+                "delivered_batches": self.delivered_batches,
+                "failed_attempts": self.failed_attempts,
+                "dead_lettered": self.dead_lettered,
+                "dead_letters": len(self._dead),
+            }
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Dead-letter summaries without the (possibly sensitive) payloads."""
+
+        with self._cond:
+            return [
+                {
+                    "url": letter["url"],
+                    "event_count": len(letter["events"]),
+                    "session_ids": [event.get("session_id") for event in letter["events"]],
+                    "attempts": letter["attempts"],
+                    "error": letter["error"],
+                    "failed_at": letter["failed_at"],
+                }
+                for letter in self._dead
+            ]
@@ -0,0 +1,68 @@
+"""Helpers shared by the check and benchmark scripts in this directory.
+
+Not a script itself. ``python scripts/<name>.py`` puts this directory on
+``sys.path``, so the scripts import it as ``from _support import ...``.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple, Type
+
+
+def check(label: str, condition: bool) -> None:
+    """Print PASS/FAIL for one check and exit non-zero on the first failure."""
+
+    print(f"{'PASS' if condition else 'FAIL'}  {label}")
+    if not condition:
+        raise SystemExit(1)
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """``pct`` percentile of an already sorted list (0.0 when it is empty)."""
+
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)] if ordered else 0.0
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler base for local stand-ins of upstreams and receivers.
+
+    Subclasses implement ``do_GET``/``do_POST`` and answer with ``_send``.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:  # keep the output readable
+        pass
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, payload: Optional[dict] = None) -> None:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # fan-out checks connect all at once
+
+    def handle_error(self, request, client_address) -> None:
+        # Timed-out clients and cancelled hedges hang up mid-response; that
+        # is expected here.
+        pass
+
+
+def serve(handler: Type[BaseHTTPRequestHandler]) -> Tuple[StandInServer, str]:
+    """Serve ``handler`` on an ephemeral 127.0.0.1 port; return it and its base URL."""
+
+    server = StandInServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
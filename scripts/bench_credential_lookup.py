@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Time InMemoryStore.get_credential for each credential reference form.
+
+Usage:
+    python scripts/bench_credential_lookup.py [--credentials 100000] [--lookups 20000]
+
+Wallets send credential IDs as stored, as ``urn:uuid:<id>``, as a DID style
+``did:example:...:<id>`` or as the issuer URL ``https://.../api/credential/<id>``.
+The script measures each form against the normalized-ID index and, for
+comparison, against the linear scan the store used before the index existed.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.models import (  # noqa: E402
+    CredentialOffer,
+    CredentialStatus,
+    DisclosureScope,
+    IdentityAssuranceLevel,
+    IssuanceMode,
+    normalize_credential_id,
+)
+from backend.store import InMemoryStore  # noqa: E402
+
+
+FORMS = {
+    "exact": lambda raw: f"urn:uuid:{raw}",
+    "bare": lambda raw: raw,
+    "did": lambda raw: f"did:example:issuer:{raw}",
+    "url": lambda raw: f"https://issuer-sandbox.wallet.gov.tw/api/credential/{raw}",
+    "miss": lambda raw: f"urn:uuid:{uuid.uuid4()}",
+}
+
+
+def build_store(count: int) -> tuple:
+    store = InMemoryStore()
+    now = datetime.utcnow()
+    raw_ids = []
+    for _ in range(count):
+        raw = str(uuid.uuid4())
+        store.persist_credential(
+            CredentialOffer(
+                credential_id=f"urn:uuid:{raw}",
+                transaction_id=str(uuid.uuid4()),
+                issuer_id="did:example:issuer",
+                primary_scope=DisclosureScope.MEDICAL_RECORD,
+                ial=IdentityAssuranceLevel.NHI_CARD_PIN,
+                mode=IssuanceMode.WITH_DATA,
+                qr_token=uuid.uuid4().hex,
+                nonce=uuid.uuid4().hex,
+                status=CredentialStatus.OFFERED,
+                created_at=now,
+                expires_at=now + timedelta(minutes=5),
+                last_action_at=now,
+                disclosure_policies=[],
+            )
+        )
+        raw_ids.append(raw)
+    return store, raw_ids
+
+
+def linear_lookup(store: InMemoryStore, credential_id: str) -> Optional[CredentialOffer]:
+    direct = store._credentials.get(credential_id)
+    if direct:
+        return direct
+    normalized = normalize_credential_id(credential_id)
+    for stored_id, credential in store._credentials.items():
+        if normalize_credential_id(stored_id) == normalized:
+            return credential
+    return None
+
+
+def time_lookups(lookup: Callable[[str], object], references: List[str]) -> float:
+    started = time.perf_counter()
+    for reference in references:
+        lookup(reference)
+    return (time.perf_counter() - started) / len(references) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--credentials", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--linear-lookups", type=int, default=50)
+    args = parser.parse_args()
+
+    store, raw_ids = build_store(args.credentials)
+    rng = random.Random(7)
+    print(f"{'form':>6} {'indexed µs':>12} {'linear µs':>12}")
+    for name, form in FORMS.items():
+        references = [form(rng.choice(raw_ids)) for _ in range(args.lookups)]
+        indexed = time_lookups(store.get_credential, references)
+        linear = time_lookups(
+            lambda reference: linear_lookup(store, reference), references[: args.linear_lookups]
+        )
+        print(f"{name:>6} {indexed:>12.2f} {linear:>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
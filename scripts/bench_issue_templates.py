@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark local issuance with the per-VC template registry.
+
+Usage:
+    python scripts/bench_issue_templates.py [--calls 2000]
+
+Builds offers in-process (without persisting them) for typical MODA
+``vc_cond`` / ``vc_cons`` / ``vc_algy`` / ``vc_rx`` requests, a request with
+no fields and a plain FHIR ``payload`` override, and prints microseconds
+per offer with the registry warm and with it rebuilt before every call
+(what each request used to pay). Also checks that issuing with overrides
+leaves the shared template payloads untouched and that the registry
+rebuilds on date rollover with date-dependent defaults moved forward.
+Exits non-zero on the first failed check.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend import main  # noqa: E402
+from backend.templates import TemplateRegistry  # noqa: E402
+from _support import check  # noqa: E402
+
+REQUESTS: Dict[str, Dict[str, Any]] = {
+    "vc_cond": {"vcUid": "vc_cond", "fields": [{"ename": "cond_code", "content": "K29.7"}, {"ename": "cond_display", "content": "GASTRITIS"}]},
+    "vc_cons": {"vcUid": "vc_cons", "fields": [{"ename": "consentEnd", "content": "2027-01-01"}]},
+    "vc_algy": {"vcUid": "vc_algy", "fields": [{"ename": "algyName", "content": "ASPIRIN"}]},
+    "vc_rx": {"vcUid": "vc_rx", "fields": [{"ename": "medCode", "content": "A02BC05"}, {"ename": "qtyValue", "content": "7"}]},
+    "no fields": {"vcUid": "vc_cond"},
+    "payload": {"issuerId": "did:example:clinic", "payload": {"condition": {"recordedDate": "2024-01-01"}}},
+}
+
+
+def per_call_us(request: Any, calls: int, rebuild: bool) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        if rebuild:
+            main.issuance_templates.rebuild()
+        main._issue_parsed(request, persist=False)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main_bench() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    templates = main.issuance_templates.current()
+    before = {slug: template.payload.json() for slug, template in templates.templates.items()}
+    sample_before = templates.sample.json()
+    for body in REQUESTS.values():
+        main._issue_parsed(main._parse_issue_with_data(json.loads(json.dumps(body))), persist=False)
+    check("template payloads unchanged by overrides", {slug: t.payload.json() for slug, t in templates.templates.items()} == before)
+    check("sample payload unchanged by overrides", templates.sample.json() == sample_before)
+
+    today = date.today()
+    clock = {"day": today}
+    registry = TemplateRegistry(main._build_issuance_templates, clock=lambda: clock["day"])
+    first = registry.current()
+    check("registry reused within a day", registry.current() is first and registry.builds == 1)
+    clock["day"] = today + timedelta(days=1)
+    second = registry.current()
+    check("registry rebuilt on date rollover", second is not first and registry.builds == 2)
+    check(
+        "date-dependent defaults move forward",
+        second.get("vc_cons").sample_values["cons_end"] == (today + timedelta(days=181)).isoformat()
+        and second.sample.issued_on == today + timedelta(days=1),
+    )
+    print(f"      template build {registry.build_ms:.2f} ms")
+
+    print(f"\n{'request':>10} {'warm us':>9} {'rebuilt us':>11}")
+    for label, body in REQUESTS.items():
+        request = main._parse_issue_with_data(json.loads(json.dumps(body)))
+        per_call_us(request, 50, rebuild=False)
+        warm = per_call_us(request, args.calls, rebuild=False)
+        rebuilt = per_call_us(request, max(args.calls // 10, 1), rebuild=True)
+        print(f"{label:>10} {warm:>9.1f} {rebuilt:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_bench())
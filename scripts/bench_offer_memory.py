@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Compare per-offer memory of full pydantic offers and compact store records.
+
+Usage:
+    python scripts/bench_offer_memory.py [--count 1000000] [--repr full,compact]
+
+Each representation is measured in a fresh subprocess: the script fills an
+InMemoryStore with ``--count`` issued-with-data offers (FHIR payload, payload
+template, three disclosure policies, MODA alias fields) and reports the
+resident-set growth divided by the offer count. At the default of one
+million offers the full representation needs several GB of RAM; pass a
+smaller ``--count`` for a quick comparison.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.models import (  # noqa: E402
+    CredentialOffer,
+    CredentialPayload,
+    CredentialStatus,
+    DisclosurePolicy,
+    DisclosureScope,
+    FHIRCodeableConcept,
+    FHIRCoding,
+    FHIRConditionSummary,
+    FHIRIdentifier,
+    IdentityAssuranceLevel,
+    IssuanceMode,
+)
+from backend.records import RecordCodec  # noqa: E402
+from backend.store import InMemoryStore  # noqa: E402
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def make_offer(index: int, now: datetime) -> CredentialOffer:
+    payload = CredentialPayload(
+        condition=FHIRConditionSummary(
+            id=f"cond-{index}",
+            code=FHIRCodeableConcept(
+                coding=[FHIRCoding(system="http://hl7.org/fhir/sid/icd-10", code="K29.7", display="Gastritis")],
+                text="Gastritis",
+            ),
+            recordedDate=date.today(),
+            encounter=FHIRIdentifier(system="urn:medssi:encounter-id", value=f"enc-{index}"),
+            subject=FHIRIdentifier(system="did:example", value=f"did:example:patient-{index}"),
+        ),
+        encounter_summary_hash=f"urn:sha256:{uuid.uuid4().hex}",
+        managing_organization=FHIRIdentifier(system="urn:medssi:org", value="org:TW-TPE-001"),
+        issued_on=date.today(),
+    )
+    fields = [
+        "condition.code.coding[0].code",
+        "condition.recordedDate",
+        "managing_organization.value",
+    ]
+    return CredentialOffer(
+        credential_id=f"urn:uuid:{uuid.uuid4()}",
+        transaction_id=str(uuid.uuid4()),
+        issuer_id="did:example:issuer",
+        primary_scope=DisclosureScope.MEDICAL_RECORD,
+        ial=IdentityAssuranceLevel.NHI_CARD_PIN,
+        mode=IssuanceMode.WITH_DATA,
+        qr_token=uuid.uuid4().hex,
+        nonce=uuid.uuid4().hex[:16],
+        status=CredentialStatus.OFFERED,
+        created_at=now,
+        expires_at=now + timedelta(minutes=5),
+        last_action_at=now,
+        disclosure_policies=[
+            DisclosurePolicy(scope=scope, fields=list(fields), description="Sandbox default")
+            for scope in DisclosureScope
+        ],
+        holder_did=f"did:example:holder-{index % 1000}",
+        payload=payload,
+        payload_template=payload.copy(deep=True),
+        external_fields={"cond_code": "K29.7", "cond_display": "Gastritis", "org_id": "TW-TPE-001"},
+    )
+
+
+def measure(representation: str, count: int) -> None:
+    store = InMemoryStore(codec=RecordCodec() if representation == "compact" else None)
+    now = datetime.utcnow()
+    gc.collect()
+    before = rss_bytes()
+    started = time.perf_counter()
+    for index in range(count):
+        store.persist_credential(make_offer(index, now))
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    grown = rss_bytes() - before
+    print(
+        f"{representation:>8} {count:>10,} {grown / count:>12,.0f} "
+        f"{grown / 2**20:>10,.1f} {count / elapsed:>10,.0f}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--repr", default="full,compact")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(args.child, args.count)
+        return 0
+
+    print(f"{'repr':>8} {'offers':>10} {'bytes/offer':>12} {'MiB':>10} {'offers/s':>10}")
+    for representation in [value for value in args.repr.split(",") if value]:
+        subprocess.run(
+            [sys.executable, __file__, "--child", representation, "--count", str(args.count)],
+            check=True,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
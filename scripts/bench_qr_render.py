@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Benchmark QR rendering across options and inline vs process-pool rendering.
+
+Usage:
+    python scripts/bench_qr_render.py [--repeat 10] [--threads 16] [--renders 200] [--workers 4]
+
+Part one renders a typical ``modadigitalwallet://credential_offer`` deep
+link once per combination of format (png when Pillow or PyPNG is
+installed, svg, json matrix), error correction (L/M/Q/H), box size and
+border, and prints the resulting QR version, output size and mean render
+time. Part two renders ``--renders`` codes from ``--threads`` request-like
+threads, first inline (GIL-bound) and then through a ``QRRenderPool`` with
+``--workers`` processes, and prints throughput and p50/p99 latency.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import secrets
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+from urllib.parse import urlencode
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend import qr  # noqa: E402
+from _support import percentile  # noqa: E402
+
+
+def deep_link() -> str:
+    # Same shape as main._build_qr_payload(..., "credential").
+    params = {
+        "client_id_scheme": "redirect_uri",
+        "state": str(uuid.uuid4()),
+        "request_uri": f"https://issuer-oidvci.medssi.dev/api/credential/request/{secrets.token_urlsafe(24)}",
+        "client_id": "https://issuer-oidvci.medssi.dev/api/credential/authorization-response",
+    }
+    return f"modadigitalwallet://credential_offer?{urlencode(params)}"
+
+
+def sweep(repeat: int) -> None:
+    payload = deep_link()
+    formats = [name for name in qr.MEDIA_TYPES if qr.can_render(name)]
+    print(f"payload: {len(payload)} characters; formats: {', '.join(formats)}\n")
+    print(f"{'format':>6} {'ec':>3} {'box':>4} {'border':>6} {'version':>7} {'bytes':>8} {'ms':>8}")
+    for image_format in formats:
+        for level in qr.ERROR_CORRECTION_LEVELS:
+            for box_size in (4, 10):
+                for border in (1, 4):
+                    if image_format == "json" and box_size != 10:
+                        continue  # box size does not affect the matrix
+                    options = qr.RenderOptions(image_format, level, box_size, border)
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        body = qr.render(payload, options)
+                    elapsed_ms = (time.perf_counter() - started) / repeat * 1000
+                    matrix = json.loads(qr.render(payload, options._replace(image_format="json")))
+                    print(
+                        f"{image_format:>6} {level:>3} {box_size:>4} {border:>6} {matrix['version']:>7} "
+                        f"{len(body):>8} {elapsed_ms:>8.2f}"
+                    )
+
+
+def concurrent(renderer: "qr.QRRenderPool", threads: int, renders: int, options: "qr.RenderOptions") -> None:
+    payloads = [deep_link() for _ in range(renders)]
+    latencies: List[float] = []
+
+    def one(payload: str) -> None:
+        started = time.perf_counter()
+        renderer.render(payload, options)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    renderer.render(payloads[0], options)  # start worker processes outside the timing
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(one, payloads))
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    label = f"{renderer.workers} workers" if renderer.workers else "inline"
+    print(
+        f"{label:>10} {renders / elapsed:>8.1f} {percentile(ordered, 50):>8.1f} {percentile(ordered, 99):>8.1f}"
+        f"   {renderer.metrics()}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--skip-sweep", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_sweep:
+        sweep(args.repeat)
+    options = qr.RenderOptions("png" if qr.can_render("png") else "svg")
+    print(f"\n{args.renders} {options.image_format} renders from {args.threads} threads")
+    print(f"{'renderer':>10} {'per s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in (0, args.workers):
+        renderer = qr.QRRenderPool(workers, max_pending=args.threads)
+        try:
+            concurrent(renderer, args.threads, args.renders, options)
+        finally:
+            renderer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Benchmark the sandbox proxy paths against a recorded upstream cassette.
+
+Usage:
+    # capture once, against the real sandbox or backend.gov_simulator
+    MEDSSI_GOV_ISSUER_BASE=... MEDSSI_GOV_VERIFIER_BASE=... \\
+        python scripts/bench_replay.py --cassette cassettes/sandbox.jsonl --mode record
+    # replay before and after a change
+    python scripts/bench_replay.py --cassette cassettes/sandbox.jsonl [--latency zero]
+
+Runs the API in-process and drives a fixed, seeded workload through three
+paths: ``gov_issue_medical_card`` (``POST /api/medical/card/issue``),
+``_forward_oidvp_qrcode`` (``GET /api/oidvp/qrcode``) and the nonce import
+path (``GET /v2/api/credential/nonce/{tx}`` for an offer that only exists
+upstream). Because the workload is seeded, a replay sends the same requests
+as the recording and matches them exactly. Prints p50/p90/p99/mean per path
+and the cassette hit counts. Tokens, credentials, nonces and disclosed
+data are redacted in the cassette.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from _support import percentile  # noqa: E402
+
+
+async def run(args: argparse.Namespace) -> Dict[str, List[float]]:
+    import httpx
+
+    from backend import main
+
+    issuer = {"Authorization": f"Bearer {args.issuer_token}"}
+    verifier = {"Authorization": f"Bearer {args.verifier_token}"}
+    rng = random.Random(args.seed)
+    timings: Dict[str, List[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def timed(name: str, call):
+        started = time.perf_counter()
+        response = await call
+        timings[name].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            timings[f"{name} errors"].append(0.0)
+        return response
+
+    async def iteration(client: httpx.AsyncClient, index: int, verifier_tx: str, record_id: str) -> None:
+        async with semaphore:
+            payload = {"vcUid": args.vc_uid, "fields": [{"ename": "record_id", "content": record_id}]}
+            issued = await timed("medical_card_issue", client.post("/api/medical/card/issue", json=payload, headers=issuer))
+            await timed(
+                "oidvp_qrcode",
+                client.get("/api/oidvp/qrcode", params={"transactionId": verifier_tx}, headers=verifier),
+            )
+            transaction_id = issued.json().get("transactionId") if issued.status_code < 300 else None
+            if transaction_id:
+                await timed(
+                    "nonce_import", client.get(f"/v2/api/credential/nonce/{transaction_id}", headers=issuer)
+                )
+
+    # Draw every identifier up front so the request sequence does not depend
+    # on how the concurrent iterations interleave.
+    plan = [(index, str(uuid.UUID(int=rng.getrandbits(128), version=4)), f"{rng.getrandbits(64):016x}")
+            for index in range(args.iterations)]
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=120) as client:
+        await asyncio.gather(*(iteration(client, *step) for step in plan))
+    if main.upstream_cassette is not None:
+        print(json.dumps(main.upstream_cassette.metrics()))
+    return timings
+
+
+def main_bench() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--latency", choices=["recorded", "zero"], default="recorded")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--vc-uid", default="00000000_vc_medical_record")
+    parser.add_argument("--issuer-token", default="koreic2ZEFZ2J4oo2RaZu58yGVXiqDQy")
+    parser.add_argument("--verifier-token", default="J3LdHEiVxmHBYJ6iStnmATLblzRkz2AC")
+    args = parser.parse_args()
+
+    if args.mode == "record" and os.path.exists(args.cassette):
+        raise SystemExit(f"{args.cassette} exists; remove it or choose another path to record")
+    os.environ["MEDSSI_UPSTREAM_CASSETTE"] = args.cassette
+    os.environ["MEDSSI_UPSTREAM_CASSETTE_MODE"] = args.mode
+    os.environ["MEDSSI_UPSTREAM_REPLAY_LATENCY"] = args.latency
+
+    timings = asyncio.run(run(args))
+    print(f"{'path':>20} {'count':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'mean':>8}")
+    for name, values in sorted(timings.items()):
+        if name.endswith("errors"):
+            continue
+        ordered = sorted(values)
+        errors = len(timings.get(f"{name} errors", []))
+        print(
+            f"{name:>20} {len(ordered):>6} {percentile(ordered, 50):>8.2f} {percentile(ordered, 90):>8.2f} "
+            f"{percentile(ordered, 99):>8.2f} {sum(ordered) / len(ordered):>8.2f}"
+            + (f"  ({errors} errors)" if errors else "")
+        )
+    print("(latencies in ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_bench())
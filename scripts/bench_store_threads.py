@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Measure InMemoryStore throughput as the number of threads grows.
+
+Usage:
+    python scripts/bench_store_threads.py [--seconds 2] [--threads 1,2,4,8,16]
+                                          [--credentials 20000] [--holders 2000]
+                                          [--stripes 64]
+
+Each worker thread runs the mix FastAPI's threadpool sees during a demo:
+nonce lookups by transaction ID, wallet listings by holder DID and credential
+updates, plus one reaper thread calling ``cleanup_expired``. Every thread
+count is run twice, with the configured lock stripes and with a single stripe
+(equivalent to one global lock), so the effect of striping is visible next to
+the GIL-bound baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.models import (  # noqa: E402
+    CredentialOffer,
+    CredentialStatus,
+    DisclosureScope,
+    IdentityAssuranceLevel,
+    IssuanceMode,
+)
+from backend.store import InMemoryStore  # noqa: E402
+
+
+def build_store(stripes: int, credentials: int, holders: int) -> tuple:
+    store = InMemoryStore(lock_stripes=stripes)
+    now = datetime.utcnow()
+    transactions = []
+    for index in range(credentials):
+        transaction_id = str(uuid.uuid4())
+        store.persist_credential(
+            CredentialOffer(
+                credential_id=f"urn:uuid:{uuid.uuid4()}",
+                transaction_id=transaction_id,
+                issuer_id="did:example:issuer",
+                primary_scope=DisclosureScope.MEDICAL_RECORD,
+                ial=IdentityAssuranceLevel.NHI_CARD_PIN,
+                mode=IssuanceMode.WITH_DATA,
+                qr_token=uuid.uuid4().hex,
+                nonce=uuid.uuid4().hex,
+                status=CredentialStatus.OFFERED,
+                created_at=now,
+                expires_at=now + timedelta(minutes=5),
+                last_action_at=now,
+                disclosure_policies=[],
+                holder_did=f"did:example:holder-{index % holders}",
+            )
+        )
+        transactions.append(transaction_id)
+    return store, transactions
+
+
+def run(store: InMemoryStore, transactions: list, holders: int, threads: int, seconds: float) -> float:
+    stop = threading.Event()
+    counts = [0] * threads
+    errors: list = []
+
+    def worker(slot: int) -> None:
+        rng = random.Random(slot)
+        done = 0
+        try:
+            while not stop.is_set():
+                roll = rng.random()
+                if roll < 0.7:
+                    store.get_credential_by_transaction(rng.choice(transactions))
+                elif roll < 0.9:
+                    store.list_credentials_for_holder(f"did:example:holder-{rng.randrange(holders)}")
+                else:
+                    credential = store.get_credential_by_transaction(rng.choice(transactions))
+                    if credential is not None:
+                        credential.last_action_at = datetime.utcnow()
+                        store.update_credential(credential)
+                done += 1
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+        counts[slot] = done
+
+    def reaper() -> None:
+        while not stop.wait(0.05):
+            store.cleanup_expired(budget_seconds=0.005)
+
+    workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    workers.append(threading.Thread(target=reaper))
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return sum(counts) / seconds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--threads", default="1,2,4,8,16")
+    parser.add_argument("--credentials", type=int, default=20000)
+    parser.add_argument("--holders", type=int, default=2000)
+    parser.add_argument("--stripes", type=int, default=64)
+    args = parser.parse_args()
+
+    thread_counts = [int(value) for value in args.threads.split(",") if value]
+    print(f"{'threads':>7} {'stripes':>7} {'ops/s':>12}")
+    for stripes in (args.stripes, 1):
+        store, transactions = build_store(stripes, args.credentials, args.holders)
+        for threads in thread_counts:
+            throughput = run(store, transactions, args.holders, threads, args.seconds)
+            print(f"{threads:>7} {stripes:>7} {throughput:>12,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
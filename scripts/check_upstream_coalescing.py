@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Check that identical concurrent sandbox calls share one upstream request.
+
+Usage:
+    python scripts/check_upstream_coalescing.py [--callers 20]
+
+Starts a local fake sandbox that counts hits per path and answers slowly,
+then fires concurrent identical calls through ``_call_remote_api`` (threads)
+and ``_call_remote_api_async`` (one event loop). Identical calls must reach
+the fake once per burst; calls with a different token or body must not be
+merged. Exits non-zero on the first failure.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend import main  # noqa: E402
+from _support import StandInHandler, check, serve  # noqa: E402
+
+
+HITS: Counter = Counter()
+
+
+class FakeSandboxHandler(StandInHandler):
+    def _answer(self, payload: dict) -> None:
+        HITS[(self.command, self.path)] += 1
+        time.sleep(0.3)
+        self._send(200, payload)
+
+    def do_GET(self) -> None:
+        self._answer({"path": self.path, "token": self.headers.get("access-token")})
+
+    def do_POST(self) -> None:
+        self._answer({"echo": json.loads(self._read_body() or b"{}")})
+
+
+def main_check() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=20)
+    args = parser.parse_args()
+
+    server, base = serve(FakeSandboxHandler)
+    poll = dict(method="GET", base_url=base, path="/api/oidvp/result", params={"transactionId": "tx-1"})
+
+    with ThreadPoolExecutor(max_workers=args.callers) as executor:
+        results = list(
+            executor.map(lambda _: main._call_remote_api(token="verifier-a", **poll), range(args.callers))
+        )
+    check("threaded GET polls reach the upstream once", HITS[("GET", "/api/oidvp/result?transactionId=tx-1")] == 1)
+    check("every caller gets the shared answer", all(result == results[0] for result in results))
+    check("callers get their own dict", len({id(result) for result in results}) == args.callers)
+
+    HITS.clear()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        tokens = list(executor.map(
+            lambda token: main._call_remote_api(token=token, **poll)["token"],
+            ["verifier-a", "verifier-b", "verifier-a", "verifier-b"],
+        ))
+    check("different tokens are never merged", sorted(tokens) == ["verifier-a"] * 2 + ["verifier-b"] * 2)
+    check("one upstream call per token", HITS[("GET", "/api/oidvp/result?transactionId=tx-1")] == 2)
+
+    async def burst() -> list:
+        posts = [
+            main._call_remote_api_async(
+                method="POST", base_url=base, path="/api/oidvp/qrcode", token="verifier-a",
+                payload={"ref": "ref-1" if index % 2 else "ref-2"},
+            )
+            for index in range(args.callers)
+        ]
+        nonces = [
+            main._call_remote_api_async(
+                method="GET", base_url=base, path="/api/credential/nonce/tx-9", token="wallet",
+            )
+            for _ in range(args.callers)
+        ]
+        return await asyncio.gather(*posts, *nonces)
+
+    HITS.clear()
+    started = time.perf_counter()
+    asyncio.run(burst())
+    elapsed = time.perf_counter() - started
+    check("async nonce polls reach the upstream once", HITS[("GET", "/api/credential/nonce/tx-9")] == 1)
+    check("identical POST bodies share a call, distinct ones do not", HITS[("POST", "/api/oidvp/qrcode")] == 2)
+    check("burst completes in about one upstream round trip", elapsed < 1.0)
+
+    HITS.clear()
+    main._call_remote_api(token="verifier-a", **poll)
+    main._call_remote_api(token="verifier-a", **poll)
+    check("sequential calls are not cached", HITS[("GET", "/api/oidvp/result?transactionId=tx-1")] == 2)
+
+    print(json.dumps(main.upstream_flights.metrics(), indent=2))
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_check())
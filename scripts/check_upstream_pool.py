@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Exercise the pooled upstream client against a local stand-in server.
+
+Usage:
+    python scripts/check_upstream_pool.py
+
+Starts a keep-alive HTTP/1.1 server on 127.0.0.1 that mimics the sandbox
+(JSON bodies, a slow endpoint, an endpoint that drops idle connections and a
+4xx error) and checks connection reuse, stale-connection retry, read
+timeouts, pool waits under concurrency and error pass-through, then that the
+async client fans out far beyond the sync pool size (with httpx installed).
+Prints the per-host pool metrics at the end and exits non-zero on the first
+failure.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.upstream import AsyncUpstreamClient, UpstreamClient, UpstreamError  # noqa: E402
+from _support import StandInHandler, check, serve  # noqa: E402
+
+
+class PoolHandler(StandInHandler):
+    def do_GET(self) -> None:
+        if self.path.startswith("/slow"):
+            time.sleep(0.5)
+        if self.path.startswith("/missing"):
+            self._send(404, {"code": "404", "message": "not found"})
+            return
+        if self.path.startswith("/hangup"):
+            # Answer, then drop the keep-alive connection without telling the
+            # client, as an idle-timeout on the upstream would.
+            self._send(200, {"ok": True})
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self._send(200, {"path": self.path, "token": self.headers.get("access-token")})
+
+    def do_POST(self) -> None:
+        payload = json.loads(self._read_body() or b"{}")
+        self._send(200, {"echo": payload})
+
+
+def main() -> int:
+    server, base = serve(PoolHandler)
+
+    client = UpstreamClient(max_size=2, connect_timeout=1.0, read_timeout=0.2, pool_timeout=5.0)
+    headers = {"access-token": "stand-in"}
+
+    for _ in range(5):
+        response = client.request("GET", f"{base}/api/credential/nonce/abc", headers=headers)
+    stats = client.metrics()[base]
+    check("sequential requests reuse one connection", stats["opened"] == 1 and stats["reused"] == 4)
+    check("headers reach the upstream", json.loads(response.body)["token"] == "stand-in")
+
+    response = client.request("POST", f"{base}/api/qrcode/data", body=b'{"a": 1}', headers=headers)
+    check("POST bodies round-trip", json.loads(response.body) == {"echo": {"a": 1}})
+
+    client.request("GET", f"{base}/hangup", headers=headers)
+    time.sleep(0.05)
+    response = client.request("GET", f"{base}/after-hangup", headers=headers)
+    stats = client.metrics()[base]
+    check(
+        "closed keep-alive connection is replaced transparently",
+        response.status == 200 and stats["stale_retries"] >= 1,
+    )
+
+    response = client.request("GET", f"{base}/missing", headers=headers)
+    check("4xx responses are returned, not raised", response.status == 404)
+
+    try:
+        client.request("GET", f"{base}/slow", headers=headers)
+        timed_out = False
+    except UpstreamError as exc:
+        timed_out = exc.reason == "timed out"
+    check("read timeout is enforced separately from connect", timed_out)
+
+    wide = UpstreamClient(max_size=2, connect_timeout=1.0, read_timeout=2.0)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda _: wide.request("GET", f"{base}/slow"), range(6)))
+    wide_stats = wide.metrics()[base]
+    check("pool never exceeds max_size", wide_stats["opened"] <= 2)
+    check("callers beyond the pool size wait", wide_stats["waits"] >= 1)
+
+    # The async pool has its own limit: 40 slow calls at once must neither
+    # queue behind the 2-connection sync pool nor time out waiting for it.
+    fanout = AsyncUpstreamClient(
+        UpstreamClient(max_size=2, connect_timeout=1.0, read_timeout=2.0, pool_timeout=0.2),
+        max_connections=100,
+    )
+
+    async def fan_out() -> float:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(fanout.request("GET", f"{base}/slow") for _ in range(40)))
+        await fanout.aclose()
+        check("async fan-out beyond the sync pool size succeeds", all(r.status == 200 for r in responses))
+        return time.perf_counter() - started
+
+    if fanout.backend == "httpx":
+        elapsed = asyncio.run(fan_out())
+        host_stats = fanout.metrics()["hosts"][base]
+        check("async calls run concurrently", host_stats["max_in_flight"] == 40 and elapsed < 2.0)
+
+    print(json.dumps({"narrow": client.metrics(), "wide": wide.metrics(), "async": fanout.metrics()}, indent=2))
+    client.close()
+    wide.close()
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
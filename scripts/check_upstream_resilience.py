@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Exercise the upstream circuit breaker, retry budget and hedging.
+
+Usage:
+    python scripts/check_upstream_resilience.py
+
+Starts a local stand-in server whose health can be toggled (503 responses),
+and one endpoint where every fourth answer stalls. Checks that consecutive
+failures open the breaker, that open breakers fail without contacting the
+upstream, that a half-open probe closes the circuit again, that GET retries
+stay within the retry budget and that, once the latency window is warm,
+every stalled request is raced by a hedge that wins (checked on the
+hedge counters, not wall-clock time). Exits non-zero on the first failure.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.resilience import (  # noqa: E402
+    CircuitBreaker,
+    CircuitOpenError,
+    UpstreamGuards,
+)
+from backend.upstream import AsyncUpstreamClient, UpstreamClient, UpstreamResponse  # noqa: E402
+from _support import StandInHandler, check, serve  # noqa: E402
+
+
+class FlakyHandler(StandInHandler):
+    healthy = True
+    hits = 0
+    slow_calls = itertools.count()
+    stalls = 0
+
+    def do_GET(self) -> None:
+        FlakyHandler.hits += 1
+        if self.path.startswith("/sometimes-slow"):
+            # Every fourth call stalls, like a sandbox node stuck in GC.
+            if next(FlakyHandler.slow_calls) % 4 == 3:
+                FlakyHandler.stalls += 1
+                time.sleep(1.0)
+            self._send(200, {"ok": True})
+            return
+        if not FlakyHandler.healthy:
+            self._send(503, {"code": "503", "message": "maintenance"})
+            return
+        self._send(200, {"ok": True})
+
+
+def main() -> int:
+    server, base = serve(FlakyHandler)
+    client = UpstreamClient(max_size=4, connect_timeout=1.0, read_timeout=2.0)
+
+    guards = UpstreamGuards(
+        failure_threshold=3, open_seconds=0.5, retry_ratio=0.0, retry_min_per_second=0.0
+    )
+    guard = guards.for_url(base)
+    send = lambda: client.request("GET", f"{base}/api/oidvp/result")  # noqa: E731
+
+    FlakyHandler.healthy = False
+    statuses = []
+    while guard.breaker.state == CircuitBreaker.CLOSED:
+        statuses.append(guard.call(send, idempotent=True).status)
+    check("503 answers are passed through", set(statuses) == {503})
+    check("retries count towards the threshold", len(statuses) == 2)
+    check("consecutive failures open the breaker", guard.breaker.state == CircuitBreaker.OPEN)
+
+    hits_before = FlakyHandler.hits
+    try:
+        guard.call(send, idempotent=True)
+        rejected = False
+    except CircuitOpenError:
+        rejected = True
+    check("open breaker fails fast", rejected and FlakyHandler.hits == hits_before)
+
+    retries = guard.metrics()["retries"]
+    check("retries stay within the retry budget", 0 < retries <= 10)
+
+    FlakyHandler.healthy = True
+    time.sleep(0.6)
+    check("breaker moves to half-open", guard.breaker.state == CircuitBreaker.HALF_OPEN)
+    check("half-open probe succeeds", guard.call(send, idempotent=True).status == 200)
+    check("successful probe closes the breaker", guard.breaker.state == CircuitBreaker.CLOSED)
+
+    hedged = UpstreamGuards(hedge_percentile=50, hedge_min_seconds=0.01).for_url(base)
+    async_client = AsyncUpstreamClient(client)
+
+    async def run_hedged() -> Tuple[Dict[str, Any], int]:
+        async def calls(count: int) -> None:
+            for _ in range(count):
+                await hedged.call_async(
+                    lambda: async_client.request("GET", f"{base}/sometimes-slow"), idempotent=True
+                )
+
+        # The first 20 calls fill the latency window hedging is based on;
+        # after that every stalled request must have been raced by a hedge.
+        await calls(20)
+        warm = (hedged.metrics(), FlakyHandler.stalls)
+        await calls(20)
+        await async_client.aclose()
+        return warm
+
+    warm, stalls_before = asyncio.run(run_hedged())
+    stats = hedged.metrics()
+    stalls = FlakyHandler.stalls - stalls_before
+    check("slow primaries trigger hedges", stats["hedges"] >= 1 and stats["hedge_wins"] >= 1)
+    check(
+        "every stall after warm-up is hedged",
+        stalls >= 1 and stats["hedges"] - warm["hedges"] >= stalls and stats["hedge_wins"] > warm["hedge_wins"],
+    )
+
+    racing = UpstreamGuards(hedge_percentile=50, hedge_min_seconds=0.01).for_url(f"{base}/race")
+    for _ in range(20):
+        racing.latency.observe(0.001)
+    admissions = iter([False, None])  # the breaker opens between the state check and the hedge
+
+    async def slow_ok() -> UpstreamResponse:
+        await asyncio.sleep(0.1)
+        return UpstreamResponse(200, "OK", {}, b"{}")
+
+    racing.breaker.try_acquire = lambda: next(admissions)
+    balance = racing.budget.metrics()["balance"]
+    answer = asyncio.run(racing.call_async(slow_ok, idempotent=True))
+    check(
+        "a hedge the breaker rejects leaves the primary running",
+        answer.status == 200 and racing.hedges == 0 and racing.budget.metrics()["balance"] >= balance,
+    )
+
+    print(json.dumps({"breaker": guards.metrics(), "hedged": stats}, indent=2))
+    client.close()
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())